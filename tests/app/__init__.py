@@ -1 +1,11 @@
 from .test_csv_loader import *
+from .test_spread_data import *
+from .test_cta_indicator import *
+from .test_tick_file import *
+from .test_option_greeks import *
+from .test_option_pricing import *
+from .test_binomial_tree import *
+from .test_spread_backtesting import *
+from .test_cta_load_cache import *
+from .test_cta_shared_history import *
+from .test_data_recorder import *
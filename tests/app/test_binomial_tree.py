@@ -0,0 +1,63 @@
+"""
+Test if vectorized binomial tree gives the same result as the previous
+tree implementation, and batch functions the same as scalar ones
+"""
+import unittest
+
+import numpy as np
+
+from vnpy.app.option_master.pricing import binomial_tree
+from vnpy.app.option_master.pricing.binomial_tree import VEGA_BUMP
+
+
+# f, k, t, v, cp, (price, delta, gamma, theta, vega), impv of price * 1.01,
+# calculated by generate_tree with n=15 and r=0.03
+EXPECTED = [
+    (4700, 4500, 0.1, 0.2, 1, (242.50563308682658, 0.766926623793548, 0.0010570569072370865, -1.946168292190844, 5.159180259927609), 0.2047),
+    (4700, 4500, 0.1, 0.2, -1, (42.5056330868273, -0.2330733762064493, 0.0010570569072370804, -1.9461682921907952, 5.159180259832397), 0.2008),
+    (4700, 4900, 0.5, 0.35, 1, (380.5697370844635, 0.480856546207511, 0.0003526557566384333, -1.9928536308366418, 13.655874962447408), 0.3528),
+    (4700, 4900, 0.5, 0.35, -1, (580.5697370844632, -0.5191434537924912, 0.0003526557566384332, -1.9928536308366418, 13.6558749624198), 0.3543),
+    (4700, 5500, 0.3, 0.25, -1, (844.0848277447487, -0.8617469370602633, 0.0003460255483396631, -0.995999860129994, 6.573206457132983), 0.2628),
+    (3.3, 3.2, 0.05, 0.15, -1, (0.010702714093030951, -0.17382179812943005, 2.373484746047355, -0.0012116427990991165, 0.0017191443327671762), 0.1506),
+    (3.3, 3.5, 1.0, 0.5, 1, (0.5820084972348338, 0.5526714422561781, 0.24330501177101385, -0.001393445287091885, 0.013339544153589955), 0.5044),
+    (3.3, 2.8, 0.2, 0.3, 1, (0.5211126615326922, 0.9061654816728908, 0.3866949274652289, -0.0007901355108284706, 0.00320924759544076), 0.3162),
+]
+
+
+class TestBinomialTree(unittest.TestCase):
+
+    def test_previous_results(self):
+        for f, k, t, v, cp, expected, impv in EXPECTED:
+            result = binomial_tree.calculate_greeks(f, k, 0.03, t, v, cp, 15)
+
+            for value, expected_value in zip(result[:4], expected[:4]):
+                self.assertLessEqual(abs(value - expected_value), 1e-13 * abs(expected_value))
+
+            # Vega is difference of prices divided by the bump, compare the price difference
+            vega_diff = abs(result[4] - expected[4]) * VEGA_BUMP * v * 100
+            self.assertLessEqual(vega_diff, 1e-13 * expected[0])
+
+            self.assertEqual(binomial_tree.calculate_impv(expected[0] * 1.01, f, k, 0.03, t, cp, 15), impv)
+
+    def test_batch(self):
+        rng = np.random.default_rng(0)
+        size = 100
+        f = rng.uniform(4000, 5000, size)
+        k = rng.choice(np.arange(4000, 5050, 50), size)
+        t = rng.choice([0.05, 0.1, 0.3], size)
+        v = rng.uniform(0.1, 0.5, size)
+        cp = rng.choice([1, -1], size)
+
+        result = binomial_tree.calculate_greeks_array(f, k, 0.03, t, v, cp, 30)
+        for i in range(size):
+            expected = binomial_tree.calculate_greeks(f[i], k[i], 0.03, t[i], v[i], cp[i], 30)
+            np.testing.assert_allclose([x[i] for x in result], expected, rtol=1e-13, atol=0)
+
+        price = result[0] + rng.uniform(-10, 10, size)
+        impv = binomial_tree.calculate_impv_array(price, f, k, 0.03, t, cp, 30)
+        for i in range(size):
+            self.assertEqual(impv[i], binomial_tree.calculate_impv(price[i], f[i], k[i], 0.03, t[i], cp[i], 30))
+
+
+if __name__ == "__main__":
+    unittest.main()
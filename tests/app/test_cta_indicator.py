@@ -0,0 +1,215 @@
+"""
+Test if incremental indicators of CtaLineBar give the same result as talib
+"""
+import importlib.util
+import pickle
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import talib as ta
+
+import vnpy
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.object import BarData
+
+try:
+    from vnpy.app.cta_strategy_pro.cta_line_bar import CtaMinuteBar
+except ImportError:
+    CtaMinuteBar = None
+
+
+def load_indicator_module():
+    """
+    Load cta_indicator.py by file path, it only depends on numpy and math,
+    while importing cta_strategy_pro package needs the whole app.
+    """
+    path = Path(vnpy.__file__).parent.joinpath("app", "cta_strategy_pro", "cta_indicator.py")
+    spec = importlib.util.spec_from_file_location("cta_indicator", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+cta_indicator = load_indicator_module()
+IncMA = cta_indicator.IncMA
+IncBoll = cta_indicator.IncBoll
+IncEMA = cta_indicator.IncEMA
+IncMACD = cta_indicator.IncMACD
+IncRSI = cta_indicator.IncRSI
+IncATR = cta_indicator.IncATR
+IncDMI = cta_indicator.IncDMI
+RollingMax = cta_indicator.RollingMax
+RollingMin = cta_indicator.RollingMin
+
+
+def create_prices(size: int = 1000) -> tuple:
+    """Random walk close with high and low around it"""
+    rng = np.random.default_rng(0)
+    close = 3000 + np.cumsum(rng.normal(0, 5, size))
+    high = close + rng.uniform(0, 5, size)
+    low = close - rng.uniform(0, 5, size)
+    return close, high, low
+
+
+class DummyStrategy:
+    """"""
+
+    def write_log(self, msg: str, *args, **kwargs):
+        pass
+
+    def write_error(self, msg: str, *args, **kwargs):
+        pass
+
+
+class DummyTick:
+    """"""
+
+    datetime = datetime(2020, 1, 2)
+
+
+class TestCtaIndicator(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.close, self.high, self.low = create_prices()
+
+    def assert_close(self, result: list, expected: np.ndarray, tol: float = 1e-8):
+        """Compare values where talib result is available"""
+        result = np.array([np.nan if x is None else x for x in result], dtype=float)
+        mask = ~np.isnan(expected)
+        self.assertFalse(np.isnan(result[mask]).any())
+        np.testing.assert_allclose(result[mask], expected[mask], rtol=0, atol=tol)
+
+    def test_ma_ema(self):
+        for n in (1, 5, 20):
+            ma = IncMA(n)
+            ema = IncEMA(n)
+            ma_values, ma_peeks, ema_values, ema_peeks = [], [], [], []
+            for x in self.close:
+                ma_peeks.append(ma.peek(x))
+                ma_values.append(ma.update(x))
+                ema_peeks.append(ema.peek(x))
+                ema_values.append(ema.update(x))
+
+            self.assert_close(ma_values, ta.MA(self.close, n))
+            self.assert_close(ma_peeks, ta.MA(self.close, n))
+            self.assert_close(ema_values, ta.EMA(self.close, n))
+            self.assert_close(ema_peeks, ta.EMA(self.close, n))
+
+    def test_boll(self):
+        for n in (5, 20):
+            boll = IncBoll(n, 2)
+            result = [boll.update(x) for x in self.close]
+            upper, middle, lower = ta.BBANDS(self.close, n, 2, 2, 0)
+            self.assert_close([x[0] for x in result], upper, 1e-6)
+            self.assert_close([x[1] for x in result], middle, 1e-6)
+            self.assert_close([x[2] for x in result], lower, 1e-6)
+
+    def test_macd(self):
+        macd = IncMACD(12, 26, 9)
+        result = [macd.update(x) for x in self.close]
+        for i, expected in enumerate(ta.MACD(self.close, 12, 26, 9)):
+            self.assert_close([x[i] for x in result], expected)
+
+    def test_rsi_atr(self):
+        for n in (6, 14):
+            rsi = IncRSI(n)
+            atr = IncATR(n)
+            rsi_values, atr_values = [], []
+            for h, l, c in zip(self.high, self.low, self.close):
+                rsi_values.append(rsi.update(c))
+                atr_values.append(atr.update(h, l, c))
+
+            self.assert_close(rsi_values, ta.RSI(self.close, n))
+            self.assert_close(atr_values, ta.ATR(self.high, self.low, self.close, n))
+
+    def test_dmi(self):
+        n = 14
+        dmi = IncDMI(n)
+        result = [dmi.update(h, l, c) or (None,) * 4 for h, l, c in zip(self.high, self.low, self.close)]
+
+        tr = ta.SUM(ta.TRANGE(self.high, self.low, self.close), n)
+        pdi = ta.SUM(ta.PLUS_DM(self.high, self.low, 1), n) * 100 / tr
+        mdi = ta.SUM(ta.MINUS_DM(self.high, self.low, 1), n) * 100 / tr
+        dx = 100 * np.abs(mdi - pdi) / (pdi + mdi)
+        adx = np.full(len(dx), np.nan)
+        adx[n:] = ta.EMA(dx[n:], n)
+        adx[:2 * n] = np.nan
+
+        self.assert_close([x[0] for x in result], pdi, 1e-6)
+        self.assert_close([x[1] for x in result], mdi, 1e-6)
+        self.assert_close([x[2] for x in result], dx, 1e-6)
+        self.assert_close([x[3] for x in result], adx, 1e-6)
+
+    def test_rolling_max_min(self):
+        for n in (2, 9):
+            rolling_max = RollingMax(n)
+            rolling_min = RollingMin(n)
+            max_values = [rolling_max.update(x) for x in self.high]
+            min_values = [rolling_min.update(x) for x in self.low]
+            self.assert_close(max_values, ta.MAX(self.high, n))
+            self.assert_close(min_values, ta.MIN(self.low, n))
+
+
+@unittest.skipIf(CtaMinuteBar is None, "cta_strategy_pro can not be imported")
+class TestCtaLineBar(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.close, self.high, self.low = create_prices()
+
+    def test_restore_old_pickle(self):
+        setting = {
+            "name": "M1",
+            "bar_interval": 1,
+            "interval": Interval.MINUTE,
+            "price_tick": 1,
+            "para_ma1_len": 5,
+            "para_ema1_len": 10,
+            "para_rsi1_len": 14,
+        }
+
+        bars = []
+        dt = datetime(2020, 1, 2, 9)
+        for price in self.close[:300].round():
+            bars.append(BarData(
+                gateway_name="",
+                symbol="rb2010",
+                exchange=Exchange.SHFE,
+                datetime=dt,
+                interval=Interval.MINUTE,
+                open_price=price,
+                high_price=price + 2,
+                low_price=price - 2,
+                close_price=price,
+                volume=10
+            ))
+            dt += timedelta(minutes=1)
+
+        kline = CtaMinuteBar(DummyStrategy(), None, setting)
+        kline.cur_tick = DummyTick()
+        for bar in bars[:200]:
+            kline.line_bar.append(bar)
+            kline.on_bar(bar)
+
+        # Pickle saved before incremental indicators were added
+        kline.strategy = None
+        data = pickle.loads(pickle.dumps(kline.__dict__))
+        for name in ["array_count", "indicators", "array_series", "indicator_plan", "indicator_timing"]:
+            data.pop(name)
+
+        restored = CtaMinuteBar(DummyStrategy(), None, setting)
+        restored.__dict__.update(data)
+        restored.strategy = DummyStrategy()
+        for bar in bars[200:]:
+            restored.line_bar.append(bar)
+            restored.on_bar(bar)
+
+        close = np.array([bar.close_price for bar in bars])
+        self.assertAlmostEqual(restored.line_ma1[-1], ta.MA(close, 5)[-1], 4)
+        self.assertAlmostEqual(restored.line_ema1[-1], ta.EMA(close, 10)[-1], 4)
+        self.assertAlmostEqual(restored.line_rsi1[-1], ta.RSI(close, 14)[-1], 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+"""
+Test if repeated history loads of cta backtesting read database only once
+"""
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.database.database import BaseDatabaseManager
+from vnpy.trader.database.initialize import init_cache
+from vnpy.trader.object import BarData
+from vnpy.trader.setting import SETTINGS
+
+try:
+    from vnpy.app.cta_strategy import backtesting
+except ImportError:
+    backtesting = None
+
+
+START = datetime(2020, 1, 2, 9)
+END = START + timedelta(minutes=99)
+
+
+class CountingDatabaseManager(BaseDatabaseManager):
+    """Bars generated in memory, with every query counted"""
+
+    def __init__(self):
+        self.query_count = 0
+
+    def load_bar_data(self, symbol, exchange, interval, start, end, **kwargs):
+        self.query_count += 1
+        return [
+            BarData(
+                gateway_name="DB",
+                symbol=symbol,
+                exchange=exchange,
+                datetime=START + timedelta(minutes=i),
+                interval=interval,
+                close_price=i
+            )
+            for i in range(100)
+        ]
+
+    def load_tick_data(self, symbol, exchange, start, end, **kwargs):
+        self.query_count += 1
+        return []
+
+    def save_bar_data(self, datas):
+        pass
+
+    def save_tick_data(self, datas):
+        pass
+
+    def get_newest_bar_data(self, symbol, exchange, interval):
+        return None
+
+    def get_newest_tick_data(self, symbol, exchange):
+        return None
+
+    def clean(self, symbol):
+        pass
+
+
+@unittest.skipIf(backtesting is None, "cta backtesting can not be imported")
+class TestCtaLoadCache(unittest.TestCase):
+
+    def setUp(self) -> None:
+        backtesting.load_cached_bar_data.cache_clear()
+        backtesting.load_cached_tick_data.cache_clear()
+
+    def tearDown(self) -> None:
+        backtesting.load_cached_bar_data.cache_clear()
+        backtesting.load_cached_tick_data.cache_clear()
+
+    def check_load(self, cache_size: float):
+        """"""
+        database = CountingDatabaseManager()
+        manager = init_cache(database, {"cache_size": cache_size})
+
+        with mock.patch.object(backtesting, "database_manager", manager):
+            for _ in range(2):
+                bars = backtesting.load_bar_data("rb2010", Exchange.SHFE, Interval.MINUTE, START, END)
+                self.assertEqual(len(bars), 100)
+                backtesting.load_tick_data("rb2010", Exchange.SHFE, START, END)
+
+            self.assertEqual(database.query_count, 2)
+
+            # Streaming backtesting bypasses cache
+            backtesting.load_bar_data("rb2010", Exchange.SHFE, Interval.MINUTE, START, END, False)
+            self.assertEqual(database.query_count, 3)
+
+    def test_default_setting(self):
+        self.check_load(SETTINGS["database.cache_size"])
+
+    def test_read_cache(self):
+        self.check_load(100)
+
+
+if __name__ == "__main__":
+    unittest.main()
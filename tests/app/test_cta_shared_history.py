@@ -0,0 +1,89 @@
+"""
+Test if optimization workers replay history data from shared memory
+"""
+import unittest
+from datetime import datetime, timedelta
+
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.object import BarData, TickData
+
+try:
+    from vnpy.app.cta_strategy import backtesting
+except ImportError:
+    backtesting = None
+
+
+START = datetime(2020, 1, 2, 9)
+
+
+@unittest.skipIf(backtesting is None, "cta backtesting can not be imported")
+class TestCtaSharedHistory(unittest.TestCase):
+
+    def check_replay(self, history_data: list):
+        """"""
+        shm, shared_info = backtesting.create_shared_history(history_data)
+        try:
+            # Small chunk size to cover replay across chunks
+            shared_history = backtesting.SharedHistory(shared_info, chunk_size=7)
+            try:
+                self.assertEqual(len(shared_history), len(history_data))
+                self.assertTrue(shared_history)
+
+                # Every replay yields the same data again
+                for _ in range(2):
+                    self.assertEqual(list(shared_history), history_data)
+            finally:
+                shared_history.close()
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def test_bar(self):
+        bars = [
+            BarData(
+                gateway_name="DB",
+                symbol="rb2010",
+                exchange=Exchange.SHFE,
+                datetime=START + timedelta(minutes=i),
+                interval=Interval.MINUTE,
+                volume=i * 10,
+                open_interest=1000 + i,
+                open_price=3500 + i,
+                high_price=3510 + i,
+                low_price=3490 + i,
+                close_price=3505.5 + i
+            )
+            for i in range(50)
+        ]
+        self.check_replay(bars)
+
+    def test_tick(self):
+        ticks = [
+            TickData(
+                gateway_name="DB",
+                symbol="rb2010",
+                exchange=Exchange.SHFE,
+                datetime=START + timedelta(milliseconds=500 * i),
+                name="螺纹钢2010",
+                last_price=3500 + i,
+                bid_price_1=3499 + i,
+                ask_price_1=3501 + i
+            )
+            for i in range(20)
+        ]
+        self.check_replay(ticks)
+
+    def test_empty(self):
+        shm, shared_info = backtesting.create_shared_history([])
+        try:
+            shared_history = backtesting.SharedHistory(shared_info)
+            self.assertFalse(shared_history)
+            self.assertEqual(list(shared_history), [])
+            shared_history.close()
+        finally:
+            shm.close()
+            shm.unlink()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,158 @@
+"""
+Test if data recorder saves buffered data in group commits
+"""
+import time
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from vnpy.event import EventEngine
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.object import BarData, TickData
+from vnpy.app.data_recorder import engine as recorder
+
+
+START = datetime(2020, 1, 2, 9)
+
+
+def create_tick(i: int) -> TickData:
+    """"""
+    return TickData(
+        gateway_name="CTP",
+        symbol="rb2010",
+        exchange=Exchange.SHFE,
+        datetime=START + timedelta(milliseconds=500 * i),
+        last_price=3500 + i
+    )
+
+
+def create_bar(i: int) -> BarData:
+    """"""
+    return BarData(
+        gateway_name="CTP",
+        symbol="rb2010",
+        exchange=Exchange.SHFE,
+        datetime=START + timedelta(minutes=i),
+        interval=Interval.MINUTE,
+        close_price=3500 + i
+    )
+
+
+class FakeDatabaseManager:
+    """Every save call recorded, the first fail_count calls raise error"""
+
+    def __init__(self, fail_count: int = 0):
+        self.fail_count = fail_count
+        self.tick_batches = []
+        self.bar_batches = []
+
+    def save(self, batches: list, datas: list):
+        if self.fail_count:
+            self.fail_count -= 1
+            raise ConnectionError("database is down")
+        batches.append(list(datas))
+
+    def save_tick_data(self, datas):
+        self.save(self.tick_batches, datas)
+
+    def save_bar_data(self, datas):
+        self.save(self.bar_batches, datas)
+
+
+class TestDataRecorder(unittest.TestCase):
+
+    def create_engine(self, database: FakeDatabaseManager, setting: dict):
+        """"""
+        patchers = [
+            mock.patch.object(recorder, "database_manager", database),
+            mock.patch.object(recorder, "load_json", return_value=setting),
+            mock.patch.object(recorder, "save_json")
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        engine = recorder.RecorderEngine(None, EventEngine())
+        engine.retry_interval = 0.01
+        self.addCleanup(engine.close)
+        return engine
+
+    def wait_until(self, condition, timeout: float = 5):
+        """"""
+        end = time.time() + timeout
+        while not condition():
+            if time.time() > end:
+                self.fail("condition not met before timeout")
+            time.sleep(0.01)
+
+    def test_flush_size(self):
+        database = FakeDatabaseManager()
+        engine = self.create_engine(database, {"flush_size": 3, "flush_interval": 60})
+
+        for i in range(7):
+            engine.record_bar(create_bar(i))
+
+        self.wait_until(lambda: len(database.bar_batches) == 2)
+        self.assertEqual([len(batch) for batch in database.bar_batches], [3, 3])
+        self.assertEqual(engine.get_metrics()["buffered"]["bar"], 1)
+
+        engine.close()
+        self.assertEqual([len(batch) for batch in database.bar_batches], [3, 3, 1])
+        self.assertEqual(engine.get_metrics()["saved_count"], 7)
+
+    def test_flush_interval(self):
+        database = FakeDatabaseManager()
+        engine = self.create_engine(database, {"flush_size": 1000, "flush_interval": 0.1})
+
+        engine.record_tick(create_tick(0))
+        engine.record_tick(create_tick(1))
+
+        self.wait_until(lambda: database.tick_batches)
+        self.assertEqual(database.tick_batches[0], [create_tick(0), create_tick(1)])
+
+    def test_close_flush(self):
+        database = FakeDatabaseManager()
+        engine = self.create_engine(database, {"flush_size": 1000, "flush_interval": 60})
+
+        for i in range(5):
+            engine.record_tick(create_tick(i))
+        engine.record_bar(create_bar(0))
+        engine.record_bar(create_bar(1))
+        self.assertFalse(database.tick_batches)
+
+        engine.close()
+        self.assertEqual(database.tick_batches, [[create_tick(i) for i in range(5)]])
+        self.assertEqual(database.bar_batches, [[create_bar(0), create_bar(1)]])
+
+        metrics = engine.get_metrics()
+        self.assertEqual(metrics["flush_count"], 2)
+        self.assertEqual(metrics["saved_count"], 7)
+        self.assertEqual(metrics["queue_size"], 0)
+
+    def test_retry(self):
+        database = FakeDatabaseManager(fail_count=1)
+        engine = self.create_engine(database, {"flush_size": 1000, "flush_interval": 60})
+
+        engine.record_bar(create_bar(0))
+        engine.close()
+
+        self.assertEqual(database.bar_batches, [[create_bar(0)]])
+        self.assertEqual(engine.get_metrics()["failed_count"], 0)
+
+    def test_retry_failed(self):
+        database = FakeDatabaseManager(fail_count=2)
+        engine = self.create_engine(database, {"flush_size": 1000, "flush_interval": 60})
+
+        engine.record_bar(create_bar(0))
+        engine.record_bar(create_bar(1))
+        engine.close()
+
+        self.assertFalse(database.bar_batches)
+
+        metrics = engine.get_metrics()
+        self.assertEqual(metrics["failed_count"], 2)
+        self.assertEqual(metrics["saved_count"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,151 @@
+"""
+Test if throttled greeks calculation of PortfolioData gives the same result
+as updating greeks on every tick
+"""
+import unittest
+from datetime import datetime, timedelta
+
+from vnpy.app.option_master.base import PortfolioData
+from vnpy.app.option_master.pricing import black_76
+from vnpy.trader.constant import Exchange, OptionType, Product
+from vnpy.trader.object import ContractData, TickData
+
+
+def create_portfolio() -> PortfolioData:
+    """Portfolio with two chains of different underlying"""
+    portfolio = PortfolioData("IO.CFFEX")
+
+    for month, days in [("2010", 30), ("2011", 60)]:
+        for strike in range(4500, 4950, 50):
+            for option_type, flag in [(OptionType.CALL, "C"), (OptionType.PUT, "P")]:
+                contract = ContractData(
+                    symbol=f"IO{month}-{flag}-{strike}",
+                    exchange=Exchange.CFFEX,
+                    name="",
+                    product=Product.OPTION,
+                    size=100,
+                    pricetick=0.2,
+                    option_strike=strike,
+                    option_underlying=f"IO{month}",
+                    option_type=option_type,
+                    option_expiry=datetime.now() + timedelta(days=days),
+                    option_portfolio="IO",
+                    option_index=str(strike),
+                    gateway_name="TEST"
+                )
+                portfolio.add_option(contract)
+
+        underlying = ContractData(
+            symbol=f"IF{month}",
+            exchange=Exchange.CFFEX,
+            name="",
+            product=Product.FUTURES,
+            size=300,
+            pricetick=0.2,
+            gateway_name="TEST"
+        )
+        portfolio.set_chain_underlying(f"IO{month}.CFFEX", underlying)
+
+    portfolio.set_interest_rate(0.03)
+    portfolio.set_pricing_model(black_76)
+
+    for i, option in enumerate(portfolio.options.values()):
+        if i % 3 == 0:
+            option.long_pos = 2
+            option.calculate_net_pos()
+
+    return portfolio
+
+
+def create_ticks(portfolio: PortfolioData, underlying_price: float) -> list:
+    """"""
+    ticks = []
+
+    for option in portfolio.options.values():
+        intrinsic = max(0, option.option_type * (underlying_price - option.strike_price))
+        ticks.append(TickData(
+            symbol=option.symbol,
+            exchange=option.exchange,
+            datetime=datetime.now(),
+            bid_price_1=intrinsic + 60,
+            ask_price_1=intrinsic + 62,
+            gateway_name="TEST"
+        ))
+
+    for symbol in ["IF2010", "IF2011"]:
+        for i in range(10):
+            price = underlying_price + i * 0.2
+            ticks.append(TickData(
+                symbol=symbol,
+                exchange=Exchange.CFFEX,
+                datetime=datetime.now(),
+                bid_price_1=price - 0.2,
+                ask_price_1=price + 0.2,
+                gateway_name="TEST"
+            ))
+
+    return ticks
+
+
+def get_greeks(portfolio: PortfolioData) -> list:
+    """"""
+    result = [(portfolio.pos_delta, portfolio.pos_gamma, portfolio.pos_theta, portfolio.pos_vega)]
+    for option in portfolio.options.values():
+        result.append((option.mid_impv, option.theo_delta, option.pos_vega))
+    return result
+
+
+class TestOptionGreeks(unittest.TestCase):
+
+    def test_dirty_greeks(self):
+        portfolio = create_portfolio()
+        reference = create_portfolio()
+
+        for tick in create_ticks(portfolio, 4700):
+            self.assertTrue(portfolio.mark_tick_dirty(tick))
+            reference.update_tick(tick)
+
+        self.assertEqual(set(portfolio.dirty_chains), {"IO2010.CFFEX", "IO2011.CFFEX"})
+        self.assertEqual(sorted(portfolio.calculate_dirty_greeks()), ["IO2010.CFFEX", "IO2011.CFFEX"])
+        self.assertEqual(get_greeks(portfolio), get_greeks(reference))
+
+        # Nothing to recalculate until next tick
+        self.assertFalse(portfolio.dirty_chains)
+        self.assertEqual(portfolio.calculate_dirty_greeks(), [])
+
+    def test_dirty_chain_only(self):
+        portfolio = create_portfolio()
+        for tick in create_ticks(portfolio, 4700):
+            portfolio.mark_tick_dirty(tick)
+        portfolio.calculate_dirty_greeks()
+
+        tick = TickData(
+            symbol="IO2011-C-4700",
+            exchange=Exchange.CFFEX,
+            datetime=datetime.now(),
+            bid_price_1=150,
+            ask_price_1=152,
+            gateway_name="TEST"
+        )
+        portfolio.mark_tick_dirty(tick)
+        self.assertEqual(list(portfolio.dirty_chains), ["IO2011.CFFEX"])
+        self.assertEqual(portfolio.calculate_dirty_greeks(), ["IO2011.CFFEX"])
+
+        snapshot = portfolio.get_greeks_snapshot(["IO2011.CFFEX"])
+        self.assertEqual(snapshot["chain_symbols"], ["IO2011.CFFEX"])
+        self.assertEqual(snapshot["pos_delta"], portfolio.pos_delta)
+
+    def test_unknown_tick(self):
+        portfolio = create_portfolio()
+        tick = TickData(
+            symbol="rb2010",
+            exchange=Exchange.SHFE,
+            datetime=datetime.now(),
+            gateway_name="TEST"
+        )
+        self.assertFalse(portfolio.mark_tick_dirty(tick))
+        self.assertFalse(portfolio.dirty_chains)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+"""
+Test if array pricing functions give the same result as scalar ones
+"""
+import unittest
+
+import numpy as np
+
+from vnpy.app.option_master.pricing import black_scholes, black_76
+
+
+class TestOptionPricing(unittest.TestCase):
+
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        size = 2000
+        self.s = rng.uniform(2, 4, size)
+        self.k = self.s * rng.uniform(0.8, 1.2, size)
+        self.t = rng.uniform(0.01, 1, size)
+        self.v = rng.uniform(0.05, 0.6, size)
+        self.cp = rng.choice([1, -1], size)
+        self.r = 0.03
+
+    def test_greeks(self):
+        for model in (black_scholes, black_76):
+            result = model.calculate_greeks_array(self.s, self.k, self.r, self.t, self.v, self.cp)
+
+            for i in range(len(self.s)):
+                expected = model.calculate_greeks(
+                    self.s[i], self.k[i], self.r, self.t[i], self.v[i], int(self.cp[i])
+                )
+                for array, value in zip(result, expected):
+                    self.assertAlmostEqual(array[i], value, 10)
+
+    def test_impv(self):
+        for model in (black_scholes, black_76):
+            price, _, _, _, vega = model.calculate_greeks_array(
+                self.s, self.k, self.r, self.t, self.v, self.cp
+            )
+            guess_vega = model.calculate_greeks_array(
+                self.s, self.k, self.r, self.t, 0.3, self.cp
+            )[4]
+
+            # Newton's method is dominated by rounding error when vega is tiny
+            mask = (vega > 1e-3) & (guess_vega > 1e-3)
+            intrinsic = np.maximum(self.cp * (self.s - self.k), 0)
+            price = np.concatenate([price[mask], intrinsic - 0.01])
+            s, k, t, cp = [
+                np.concatenate([x[mask], x]) for x in (self.s, self.k, self.t, self.cp)
+            ]
+
+            result = model.calculate_impv_array(price, s, k, self.r, t, cp)
+            expected = [
+                model.calculate_impv(price[i], s[i], k[i], self.r, t[i], int(cp[i]))
+                for i in range(len(price))
+            ]
+            np.testing.assert_allclose(result, expected, rtol=1e-9, atol=0)
+
+    def test_impv_diverged(self):
+        # Newton step of these options becomes non-finite
+        cases = [
+            (0.52425, 3.3735, 2.8794, 0.03, 0.4115, 1),
+            (0.09086, 3.84132, 3.15028, 0.03, 0.031242, -1),
+        ]
+
+        for model in (black_scholes, black_76):
+            for price, s, k, r, t, cp in cases:
+                expected = model.calculate_impv(price, s, k, r, t, cp)
+                self.assertEqual(model.calculate_impv_array(price, s, k, r, t, cp), expected)
+                self.assertEqual(model.calculate_impv_array([price], [s], [k], r, [t], [cp])[0], expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,220 @@
+"""
+Test if spread bars loaded with arrays are the same as loaded bar by bar,
+and fast backtesting gives the same result as event backtesting
+"""
+import random
+import unittest
+from datetime import datetime, timedelta
+from typing import Dict, List
+from unittest import mock
+
+from vnpy.app.spread_trading import base
+from vnpy.app.spread_trading.base import LegData, SpreadData, load_bar_data, load_bar_array
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.database.database import BaseDatabaseManager
+from vnpy.trader.object import BarData
+from vnpy.trader.utility import round_to
+
+try:
+    from vnpy.app.spread_trading.backtesting import BacktestingEngine
+    from vnpy.app.spread_trading.strategies.statistical_arbitrage_strategy import StatisticalArbitrageStrategy
+except ImportError:
+    BacktestingEngine = None
+
+
+START = datetime(2020, 1, 2, 9)
+END = datetime(2030, 1, 1)
+
+
+class MemoryDatabaseManager(BaseDatabaseManager):
+    """Leg bars kept in memory"""
+
+    def __init__(self, bars: Dict[str, List[BarData]]):
+        self.bars = bars
+
+    def load_bar_data(self, symbol, exchange, interval, start, end, **kwargs):
+        return [bar for bar in self.bars[symbol] if start <= bar.datetime <= end]
+
+    def load_tick_data(self, symbol, exchange, start, end, **kwargs):
+        return []
+
+    def save_bar_data(self, datas):
+        pass
+
+    def save_tick_data(self, datas):
+        pass
+
+    def get_newest_bar_data(self, symbol, exchange, interval):
+        return None
+
+    def get_newest_tick_data(self, symbol, exchange):
+        return None
+
+    def clean(self, symbol):
+        pass
+
+
+def create_bars(symbol: str, price: float, count: int, skip: float) -> List[BarData]:
+    """Random walk bars of trading hours, some of them missing"""
+    bars = []
+    dt = START
+
+    for _ in range(count):
+        dt += timedelta(minutes=1)
+        if dt.hour >= 15:
+            dt += timedelta(hours=18)
+
+        price += random.choice([-2, -1, 0, 1, 2]) + random.choice([0, 0.25, 0.5])
+        if random.random() < skip:
+            continue
+
+        bars.append(BarData(
+            gateway_name="DB",
+            symbol=symbol,
+            exchange=Exchange.SHFE,
+            datetime=dt,
+            interval=Interval.MINUTE,
+            open_price=price - random.choice([0, 1]),
+            high_price=price + 1,
+            low_price=price - 1,
+            close_price=price
+        ))
+
+    return bars
+
+
+def load_bar_data_reference(
+    spread: SpreadData,
+    leg_bars: Dict[str, List[BarData]],
+    pricetick: float
+) -> List[tuple]:
+    """Spread bars calculated bar by bar, as reference"""
+    bars = {}
+    leg_dicts = {}
+    for vt_symbol in spread.legs.keys():
+        bars = {bar.datetime: bar for bar in leg_bars[vt_symbol.split(".")[0]]}
+        leg_dicts[vt_symbol] = bars
+
+    result = []
+    for dt in bars.keys():
+        spread_price = 0
+        spread_available = True
+
+        for vt_symbol, bars in leg_dicts.items():
+            leg_bar = bars.get(dt, None)
+            if leg_bar:
+                spread_price += spread.price_multipliers[vt_symbol] * leg_bar.close_price
+            else:
+                spread_available = False
+
+        if spread_available:
+            if pricetick:
+                spread_price = round_to(spread_price, pricetick)
+            result.append((dt, spread_price))
+
+    return result
+
+
+class TestSpreadBacktesting(unittest.TestCase):
+
+    def setUp(self) -> None:
+        random.seed(0)
+        load_bar_data.cache_clear()
+        load_bar_array.cache_clear()
+
+        legs = [LegData("rb2010.SHFE"), LegData("rb2101.SHFE")]
+        self.spread = SpreadData(
+            "rb-spread",
+            legs,
+            {"rb2010.SHFE": 1, "rb2101.SHFE": -1},
+            {"rb2010.SHFE": 1, "rb2101.SHFE": -1},
+            "rb2010.SHFE",
+            {"rb2010.SHFE": False, "rb2101.SHFE": False},
+            1
+        )
+
+    def tearDown(self) -> None:
+        load_bar_data.cache_clear()
+        load_bar_array.cache_clear()
+
+    def check_load_bar_data(self, leg_bars: Dict[str, List[BarData]]):
+        """"""
+        with mock.patch.object(base, "database_manager", MemoryDatabaseManager(leg_bars)):
+            for pricetick in (0, 0.5, 1):
+                spread_bars = load_bar_data(self.spread, Interval.MINUTE, START, END, pricetick)
+                self.assertTrue(spread_bars)
+                self.assertEqual(
+                    [(bar.datetime, bar.close_price) for bar in spread_bars],
+                    load_bar_data_reference(self.spread, leg_bars, pricetick)
+                )
+
+                for bar in spread_bars:
+                    self.assertEqual(bar.vt_symbol, "rb-spread.LOCAL")
+                    self.assertEqual(bar.interval, Interval.MINUTE)
+                    self.assertEqual(
+                        (bar.open_price, bar.high_price, bar.low_price),
+                        (bar.close_price, bar.close_price, bar.close_price)
+                    )
+
+    def test_load_aligned(self):
+        self.check_load_bar_data({
+            "rb2010": create_bars("rb2010", 3500, 2000, 0),
+            "rb2101": create_bars("rb2101", 3450, 2000, 0)
+        })
+
+    def test_load_misaligned(self):
+        self.check_load_bar_data({
+            "rb2010": create_bars("rb2010", 3500, 2000, 0.05),
+            "rb2101": create_bars("rb2101", 3450, 2200, 0.05)
+        })
+
+    @unittest.skipIf(BacktestingEngine is None, "spread backtesting can not be imported")
+    def test_fast_backtesting(self):
+        leg_bars = {
+            "rb2010": create_bars("rb2010", 3500, 5000, 0.01),
+            "rb2101": create_bars("rb2101", 3450, 5000, 0.01)
+        }
+
+        results = []
+        with mock.patch.object(base, "database_manager", MemoryDatabaseManager(leg_bars)):
+            for fast in (False, True):
+                self.spread.net_pos = 0
+
+                engine = BacktestingEngine()
+                engine.set_parameters(
+                    spread=self.spread,
+                    interval=Interval.MINUTE,
+                    start=START,
+                    end=END,
+                    rate=0,
+                    slippage=0,
+                    size=10,
+                    pricetick=1,
+                    capital=1000000
+                )
+                engine.add_strategy(StatisticalArbitrageStrategy, {})
+
+                if fast:
+                    engine.load_array_data()
+                    engine.run_fast_backtesting()
+                else:
+                    engine.load_data()
+                    engine.run_backtesting()
+                engine.calculate_result()
+
+                trades = [
+                    (trade.datetime, trade.direction, trade.offset, trade.price, trade.volume)
+                    for trade in engine.trades.values()
+                ]
+                daily_results = {
+                    d: (result.close_price, result.trade_count, result.net_pnl)
+                    for d, result in engine.daily_results.items()
+                }
+                results.append((trades, daily_results))
+
+        self.assertTrue(results[0][0])
+        self.assertEqual(results[0], results[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+"""
+Test if incremental spread pricing gives the same result as full calculation
+"""
+import random
+import unittest
+from datetime import datetime
+
+from vnpy.app.spread_trading.base import LegData, SpreadData, calculate_inverse_volume
+from vnpy.trader.constant import Exchange
+from vnpy.trader.object import TickData
+from vnpy.trader.utility import floor_to
+
+
+def calculate_full_price(spread: SpreadData) -> tuple:
+    """Spread price calculated from all legs, as reference"""
+    bid_price = 0
+    ask_price = 0
+    bid_volumes = []
+    ask_volumes = []
+
+    for leg in spread.legs.values():
+        if not leg.bid_volume or not leg.ask_volume:
+            return 0, 0, 0, 0
+
+        price_multiplier = spread.price_multipliers[leg.vt_symbol]
+        if price_multiplier > 0:
+            bid_price += leg.bid_price * price_multiplier
+            ask_price += leg.ask_price * price_multiplier
+        else:
+            bid_price += leg.ask_price * price_multiplier
+            ask_price += leg.bid_price * price_multiplier
+
+        bid_volume = leg.bid_volume
+        ask_volume = leg.ask_volume
+        if spread.inverse_contracts[leg.vt_symbol]:
+            bid_volume = calculate_inverse_volume(bid_volume, leg.bid_price, leg.size)
+            ask_volume = calculate_inverse_volume(ask_volume, leg.ask_price, leg.size)
+
+        trading_multiplier = abs(spread.trading_multipliers[leg.vt_symbol])
+        bid_volumes.append(floor_to(bid_volume / trading_multiplier, spread.min_volume))
+        ask_volumes.append(floor_to(ask_volume / trading_multiplier, spread.min_volume))
+
+    return bid_price, ask_price, min(bid_volumes), min(ask_volumes)
+
+
+class TestSpreadData(unittest.TestCase):
+
+    def setUp(self) -> None:
+        symbols = ["rb2010.SHFE", "rb2101.SHFE", "rb2105.SHFE", "BTC-USD.OKEX"]
+        self.legs = {vt_symbol: LegData(vt_symbol) for vt_symbol in symbols}
+        self.legs["BTC-USD.OKEX"].size = 100
+
+        self.spreads = [
+            SpreadData(
+                "calendar",
+                [self.legs["rb2010.SHFE"], self.legs["rb2101.SHFE"]],
+                {"rb2010.SHFE": 1, "rb2101.SHFE": -1},
+                {"rb2010.SHFE": 1, "rb2101.SHFE": -1},
+                "rb2010.SHFE",
+                {"rb2010.SHFE": False, "rb2101.SHFE": False},
+                1
+            ),
+            SpreadData(
+                "butterfly",
+                [self.legs["rb2010.SHFE"], self.legs["rb2101.SHFE"], self.legs["rb2105.SHFE"]],
+                {"rb2010.SHFE": 1, "rb2101.SHFE": -2, "rb2105.SHFE": 1},
+                {"rb2010.SHFE": 1, "rb2101.SHFE": -2, "rb2105.SHFE": 1},
+                "rb2101.SHFE",
+                {"rb2010.SHFE": False, "rb2101.SHFE": False, "rb2105.SHFE": False},
+                1
+            ),
+            SpreadData(
+                "inverse",
+                [self.legs["rb2105.SHFE"], self.legs["BTC-USD.OKEX"]],
+                {"rb2105.SHFE": 1, "BTC-USD.OKEX": -1},
+                {"rb2105.SHFE": 1, "BTC-USD.OKEX": -3},
+                "rb2105.SHFE",
+                {"rb2105.SHFE": False, "BTC-USD.OKEX": True},
+                0.1
+            ),
+        ]
+
+    def test_incremental_price(self):
+        random.seed(0)
+        symbols = list(self.legs.keys())
+
+        for i in range(2000):
+            vt_symbol = random.choice(symbols)
+            symbol, exchange = vt_symbol.split(".")
+            bid_price = random.randint(3500, 3510)
+
+            tick = TickData(
+                symbol=symbol,
+                exchange=Exchange(exchange),
+                datetime=datetime.now(),
+                bid_price_1=bid_price,
+                ask_price_1=bid_price + random.randint(1, 2),
+                bid_volume_1=random.choice([0, 5, 20, 37]),
+                ask_volume_1=random.choice([3, 20, 41]),
+                gateway_name="TEST"
+            )
+
+            if not self.legs[vt_symbol].update_tick(tick):
+                continue
+
+            for spread in self.spreads:
+                if vt_symbol in spread.legs:
+                    spread.update_leg_price(vt_symbol)
+
+                result = (spread.bid_price, spread.ask_price, spread.bid_volume, spread.ask_volume)
+                self.assertEqual(result, calculate_full_price(spread))
+
+    def test_unchanged_tick(self):
+        leg = self.legs["rb2010.SHFE"]
+        tick = TickData(
+            symbol="rb2010",
+            exchange=Exchange.SHFE,
+            datetime=datetime.now(),
+            bid_price_1=3500,
+            ask_price_1=3501,
+            bid_volume_1=10,
+            ask_volume_1=10,
+            last_price=3500,
+            gateway_name="TEST"
+        )
+        self.assertTrue(leg.update_tick(tick))
+
+        tick.last_price = 3501
+        self.assertFalse(leg.update_tick(tick))
+        self.assertEqual(leg.last_price, 3501)
+
+        tick.ask_volume_1 = 9
+        self.assertTrue(leg.update_tick(tick))
+
+
+if __name__ == "__main__":
+    unittest.main()
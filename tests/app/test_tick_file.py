@@ -0,0 +1,84 @@
+"""
+Test if binary tick file keeps tick data and drops invalid prices
+"""
+import os
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from vnpy.app.tick_recorder.tick_file import append_ticks_to_bin_file, TickFileReader
+from vnpy.trader.constant import Exchange
+from vnpy.trader.object import TickData
+
+
+DBL_MAX = sys.float_info.max
+
+
+class TestTickFile(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.folder = tempfile.TemporaryDirectory()
+        self.file_name = os.path.join(self.folder.name, "rb2010.SHFE_2020-06-01.tick")
+
+    def tearDown(self) -> None:
+        self.folder.cleanup()
+
+    def create_ticks(self, start: datetime, count: int) -> list:
+        """"""
+        ticks = []
+        for i in range(count):
+            ticks.append(TickData(
+                gateway_name="CTP",
+                symbol="rb2010",
+                exchange=Exchange.SHFE,
+                datetime=start + timedelta(milliseconds=500 * i),
+                trading_day="2020-06-01",
+                last_price=3500 + i,
+                bid_price_1=3499 + i,
+                ask_price_1=3501 + i,
+                bid_volume_1=10,
+                ask_volume_1=20,
+                volume=100 + i
+            ))
+        return ticks
+
+    def test_round_trip(self):
+        start = datetime(2020, 6, 1, 9)
+        ticks = self.create_ticks(start, 10)
+        append_ticks_to_bin_file(self.file_name, ticks[:4])
+        append_ticks_to_bin_file(self.file_name, ticks[4:])
+
+        loaded = TickFileReader(self.file_name).load_ticks()
+        self.assertEqual(len(loaded), len(ticks))
+        for tick, result in zip(ticks, loaded):
+            self.assertEqual(result.datetime, tick.datetime)
+            self.assertEqual(result.last_price, tick.last_price)
+            self.assertEqual(result.bid_price_1, tick.bid_price_1)
+            self.assertEqual(result.volume, tick.volume)
+
+    def test_invalid_price(self):
+        ticks = self.create_ticks(datetime(2020, 6, 1, 8, 59), 3)
+
+        # Prices not set by CTP before market open
+        ticks[0].open_price = DBL_MAX
+        ticks[0].high_price = float("inf")
+        ticks[1].low_price = float("nan")
+        ticks[2].ask_price_5 = DBL_MAX
+
+        append_ticks_to_bin_file(self.file_name, ticks)
+
+        reader = TickFileReader(self.file_name)
+        self.assertEqual(reader.header["price_scale"], 10000)
+
+        loaded = reader.load_ticks()
+        self.assertEqual(len(loaded), 3)
+        self.assertEqual(loaded[0].open_price, 0)
+        self.assertEqual(loaded[0].high_price, 0)
+        self.assertEqual(loaded[1].low_price, 0)
+        self.assertEqual(loaded[2].ask_price_5, 0)
+        self.assertEqual(loaded[2].last_price, 3502)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1 @@
+from .test_tdx_pool import *
@@ -0,0 +1,106 @@
+"""
+Test if tdx connection pool works fine
+"""
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from vnpy.data.tdx.tdx_future_data import TdxFutureData, TdxFutureDataPool
+
+
+class FakeTdxFutureData(TdxFutureData):
+    """Fake client without connecting to tdx server"""
+
+    fail_count = {}
+    lock = threading.Lock()
+
+    def connect(self, is_reconnect=False):
+        self.connection_status = True
+
+    def ping(self, ip: str, port: int = 7709):
+        return timedelta(milliseconds=sum(int(x) for x in ip.split(".")))
+
+    def get_bars(self, symbol: str, period: str, **kwargs):
+        time.sleep(0.05)
+
+        # Fail twice for symbol starting with F
+        with self.lock:
+            count = self.fail_count.get(symbol, 0)
+            if symbol.startswith("F") and count < 2:
+                self.fail_count[symbol] = count + 1
+                return False, []
+
+        return True, [{"symbol": symbol, "ip": self.best_ip["ip"]}]
+
+
+class FakeTdxApi:
+    """Record server connected to"""
+
+    connected = []
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def connect(self, ip: str, port: int):
+        self.connected.append(ip)
+
+    def get_instrument_count(self):
+        return 10000
+
+
+class TestTdxFutureDataPool(unittest.TestCase):
+
+    def setUp(self):
+        FakeTdxFutureData.fail_count = {}
+        self.pool = TdxFutureDataPool(pool_size=4, retry_interval=0.01, client_class=FakeTdxFutureData)
+
+    def test_select_best_ips(self):
+        best_ips = self.pool.select_best_ips()
+        self.assertEqual(len(best_ips), 4)
+        self.assertEqual(best_ips[0]["ip"], "120.24.0.77")
+
+    def test_get_bars(self):
+        symbols = [f"RB{i}" for i in range(20)]
+
+        start = time.time()
+        results = self.pool.get_bars([{"symbol": s, "period": "1min"} for s in symbols])
+        elapsed = time.time() - start
+
+        self.assertEqual([bars[0]["symbol"] for _, bars in results], symbols)
+        self.assertEqual(len(set(bars[0]["ip"] for _, bars in results)), 4)
+        # 20 tasks of 0.05s on 4 connections
+        self.assertLess(elapsed, 20 * 0.05 / 2)
+
+    def test_retry(self):
+        self.pool.max_retry = 1
+        results = self.pool.get_bars([{"symbol": "FU", "period": "1min"}, {"symbol": "RB", "period": "1min"}])
+        self.assertEqual([result for result, _ in results], [False, True])
+
+        results = self.pool.get_bars([{"symbol": "FU", "period": "1min"}])
+        self.assertTrue(results[0][0])
+        self.assertEqual(self.pool.get_statistics()["retried_count"], 1)
+        self.assertEqual(self.pool.get_statistics()["failed_count"], 1)
+
+    def test_reconnect(self):
+        cache = {"ip": "10.0.0.1", "port": 7709, "datetime": datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+        best_ip = {"ip": "10.0.0.2", "port": 7709}
+
+        with mock.patch("vnpy.data.tdx.tdx_future_data.TdxExHq_API", FakeTdxApi), \
+                mock.patch("vnpy.data.tdx.tdx_future_data.get_cache_json", return_value=cache):
+            FakeTdxApi.connected = []
+
+            # Client of pool keeps its own server after reconnect
+            client = TdxFutureData(best_ip=dict(best_ip), fixed_ip=True)
+            client.connect(is_reconnect=True)
+
+            # Single client reloads cached best server
+            single = TdxFutureData(best_ip=dict(best_ip))
+            single.connect(is_reconnect=True)
+
+        self.assertEqual(FakeTdxApi.connected, ["10.0.0.2", "10.0.0.1"])
+
+
+if __name__ == '__main__':
+    unittest.main()
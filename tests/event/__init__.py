@@ -0,0 +1 @@
+from .test_event_engine import *
@@ -0,0 +1,130 @@
+"""
+Test if event engine works fine
+"""
+import unittest
+from threading import Thread
+from time import sleep
+
+from vnpy.event import Event, EventEngine, ShardedEventEngine
+from vnpy.event.engine import EventStatistics, LatencyStat
+
+
+class Data:
+
+    def __init__(self, vt_symbol: str, value: int):
+        self.vt_symbol = vt_symbol
+        self.value = value
+
+
+class TestEventEngine(unittest.TestCase):
+
+    def run_engine(self, engine: EventEngine, count: int = 1000):
+        received = []
+        general = []
+
+        engine.register("eTest", lambda event: received.append(event.data))
+        engine.register_general(lambda event: general.append(event.type))
+        engine.start()
+
+        for i in range(count):
+            engine.put(Event("eTest", i))
+
+        for _ in range(50):
+            if len(received) == count:
+                break
+            sleep(0.1)
+
+        engine.stop()
+        return received, general
+
+    def test_process(self):
+        received, general = self.run_engine(EventEngine())
+        self.assertEqual(received, list(range(1000)))
+        self.assertIn("eTest", general)
+
+    def test_process_batch(self):
+        engine = EventEngine(batch_size=64)
+        received, general = self.run_engine(engine)
+        self.assertEqual(received, list(range(1000)))
+        self.assertIn("eTest", general)
+        self.assertGreater(engine.get_high_water(), 0)
+
+    def test_statistics(self):
+        engine = EventEngine(debug=True)
+        self.run_engine(engine, 100)
+
+        data = engine.get_statistics()
+        self.assertEqual(data["wait"]["eTest"]["count"], 100)
+        self.assertTrue(any(name.startswith("eTest ") for name in data["handler"]))
+        self.assertIn("eTest", data["rate"])
+
+        for d in data["handler"].values():
+            self.assertLessEqual(d["p50"], d["p99"])
+            self.assertLessEqual(d["p99"], d["max"])
+
+    def test_rate_readers(self):
+        statistics = EventStatistics()
+        for _ in range(10):
+            statistics.add_event("eTest")
+
+        # Reading does not reset rates of other readers
+        self.assertGreater(statistics.get_rates("dump")["eTest"], 0)
+        self.assertGreater(statistics.get_rates()["eTest"], 0)
+        self.assertEqual(statistics.get_rates("dump")["eTest"], 0)
+
+        statistics.add_event("eTest")
+        self.assertGreater(statistics.get_rates()["eTest"], 0)
+        self.assertGreater(statistics.get_rates("dump")["eTest"], 0)
+
+    def test_latency_concurrent(self):
+        stat = LatencyStat(100)
+        active = True
+
+        def run():
+            i = 0
+            while active:
+                stat.add(i % 1000)
+                i += 1
+
+        thread = Thread(target=run)
+        thread.start()
+        try:
+            for _ in range(1000):
+                data = stat.get_data()
+                self.assertLessEqual(data["p50"], data["max"])
+        finally:
+            active = False
+            thread.join()
+
+    def test_sharded(self):
+        engine = ShardedEventEngine(shard_count=4)
+        ticks = {}
+        orders = []
+
+        def on_tick(event):
+            ticks.setdefault(event.data.vt_symbol, []).append(event.data.value)
+
+        engine.register("eTick.", on_tick)
+        engine.register("eOrder.", lambda event: orders.append(event.data.value))
+        engine.start()
+
+        symbols = [f"rb{i}.SHFE" for i in range(20)]
+        for i in range(100):
+            engine.put(Event("eOrder.", Data("", i)))
+            for vt_symbol in symbols:
+                engine.put(Event("eTick.", Data(vt_symbol, i)))
+
+        for _ in range(50):
+            if sum(len(values) for values in ticks.values()) == 2000 and len(orders) == 100:
+                break
+            sleep(0.1)
+
+        engine.stop()
+
+        self.assertEqual(orders, list(range(100)))
+        for vt_symbol in symbols:
+            self.assertEqual(ticks[vt_symbol], list(range(100)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,195 @@
+"""
+Test if rpc codecs keep data and rpc client receives subscribed topics
+"""
+import socket
+import unittest
+from datetime import datetime, timezone
+from time import sleep
+
+import zmq
+
+from vnpy.event import Event
+from vnpy.rpc import RpcServer, RpcClient
+from vnpy.rpc.codec import PickleCodec, BinaryCodec
+from vnpy.trader.constant import Direction, Exchange, Interval, Offset, Status
+from vnpy.trader.object import TickData, OrderData, TradeData, BarData
+
+
+def get_free_port() -> int:
+    """"""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def create_objects() -> list:
+    """"""
+    dt = datetime(2020, 6, 1, 9, 0, 0, 500000)
+
+    tick = TickData(
+        gateway_name="CTP",
+        symbol="rb2010",
+        exchange=Exchange.SHFE,
+        datetime=dt,
+        name="螺纹钢2010",
+        last_price=3500,
+        bid_price_1=3499,
+        ask_price_1=3501,
+        volume=100
+    )
+    order = OrderData(
+        gateway_name="CTP",
+        symbol="rb2010",
+        exchange=Exchange.SHFE,
+        orderid="1_1",
+        direction=Direction.LONG,
+        offset=Offset.OPEN,
+        price=3500,
+        volume=1,
+        status=Status.ALLTRADED,
+        time="09:00:00"
+    )
+    trade = TradeData(
+        gateway_name="CTP",
+        symbol="rb2010",
+        exchange=Exchange.SHFE,
+        orderid="1_1",
+        tradeid="1",
+        direction=Direction.LONG,
+        offset=Offset.OPEN,
+        price=3500,
+        volume=1,
+        time="09:00:00"
+    )
+    bar = BarData(
+        gateway_name="CTP",
+        symbol="rb2010",
+        exchange=Exchange.SHFE,
+        datetime=dt,
+        interval=Interval.MINUTE,
+        open_price=3500,
+        close_price=3501
+    )
+    return [tick, order, trade, bar]
+
+
+class TestCodec(unittest.TestCase):
+
+    def assert_round_trip(self, codec: PickleCodec, obj):
+        """"""
+        result = codec.decode(codec.encode(obj))
+        self.assertIs(type(result), type(obj))
+        self.assertEqual(result.__dict__, obj.__dict__)
+        return result
+
+    def test_round_trip(self):
+        for codec in (PickleCodec(), BinaryCodec()):
+            for obj in create_objects():
+                self.assert_round_trip(codec, obj)
+
+                event = codec.decode(codec.encode(Event("eTest", obj)))
+                self.assertEqual(event.type, "eTest")
+                self.assertEqual(event.data.__dict__, obj.__dict__)
+
+            self.assertEqual(codec.decode(codec.encode(["func", (1,), {"a": None}])), ["func", (1,), {"a": None}])
+
+    def test_changed_attributes(self):
+        codec = BinaryCodec()
+        tick, order, trade, bar = create_objects()
+
+        # Derived attributes changed after init are kept
+        order.gateway_name = "RPC"
+        trade.vt_tradeid = "CTP.100"
+        bar.extra = {"open_interest": 1}
+        tick.datetime = None
+
+        for obj in (tick, order, trade, bar):
+            self.assertEqual(codec.encode(obj)[:1], b"O")
+            self.assert_round_trip(codec, obj)
+
+    def test_fallback(self):
+        codec = BinaryCodec()
+        tick = create_objects()[0]
+        tick.datetime = datetime(2020, 6, 1, tzinfo=timezone.utc)
+
+        self.assertEqual(codec.encode(tick)[:1], b"P")
+        self.assert_round_trip(codec, tick)
+
+
+class DummyClient(RpcClient):
+    """"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.received = []
+
+    def callback(self, topic: str, data):
+        self.received.append((topic, data))
+
+
+class TestRpc(unittest.TestCase):
+
+    def setUp(self) -> None:
+        port = get_free_port()
+        self.rep_address = f"tcp://127.0.0.1:{port}"
+        self.pub_address = f"tcp://127.0.0.1:{get_free_port()}"
+
+    def publish_until(self, server: RpcServer, received: list, topics: list):
+        """Publish until subscriber is connected"""
+        for _ in range(50):
+            for topic in topics:
+                server.publish(topic, topic)
+            sleep(0.1)
+
+            if received:
+                break
+
+    def test_topic_filter(self):
+        server = RpcServer(BinaryCodec(), multipart=True)
+        server.register(lambda x: x * 2)
+        server.start(self.rep_address, self.pub_address)
+
+        client = DummyClient(BinaryCodec(), multipart=True)
+        client.subscribe_topic("eTick.rb")
+        client.start(self.rep_address, self.pub_address)
+
+        try:
+            self.assertEqual(client.__getattr__("<lambda>")(2), 4)
+
+            self.publish_until(server, client.received, ["eOrder", "eTick.rb2010", "eTick.ag2012"])
+            self.assertTrue(client.received)
+            self.assertEqual({topic for topic, _ in client.received}, {"eTick.rb2010"})
+        finally:
+            client.stop()
+            server.stop()
+            client.join()
+            server.join()
+
+    def test_compatible(self):
+        server = RpcServer()
+        server.start(self.rep_address, self.pub_address)
+
+        # Client of older versions
+        context = zmq.Context()
+        socket_sub = context.socket(zmq.SUB)
+        socket_sub.setsockopt_string(zmq.SUBSCRIBE, "")
+        socket_sub.connect(self.pub_address)
+
+        received = []
+        try:
+            for _ in range(50):
+                server.publish("eTick.rb2010", 1)
+                if socket_sub.poll(100):
+                    received.append(socket_sub.recv_pyobj())
+                    break
+
+            self.assertEqual(received, [["eTick.rb2010", 1]])
+        finally:
+            socket_sub.close()
+            context.term()
+            server.stop()
+            server.join()
+
+
+if __name__ == "__main__":
+    unittest.main()
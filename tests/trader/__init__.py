@@ -1,2 +1,4 @@
 from .test_database import *
 from .test_settings import *
+from .test_utility import *
+from .test_database_cache import *
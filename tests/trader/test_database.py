@@ -12,7 +12,10 @@ from vnpy.trader.object import BarData, TickData
 
 os.environ["VNPY_TESTING"] = "1"
 
-profiles = {Driver.SQLITE: {"driver": "sqlite", "database": "test_db.db"}}
+profiles = {
+    Driver.SQLITE: {"driver": "sqlite", "database": "test_db.db"},
+    Driver.FILE: {"driver": "file", "database": "test_file_db"},
+}
 if "VNPY_TEST_ONLY_SQLITE" not in os.environ:
     profiles.update(
         {
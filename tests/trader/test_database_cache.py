@@ -0,0 +1,148 @@
+"""
+Test if read cache of database manager stitches ranges and invalidates saved data
+"""
+import os
+import unittest
+from datetime import datetime, timedelta
+
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.object import BarData
+
+os.environ["VNPY_TESTING"] = "1"
+
+from vnpy.trader.database.database import BaseDatabaseManager  # noqa
+from vnpy.trader.database.database_cache import CachedDatabaseManager  # noqa
+
+
+START = datetime(2020, 1, 1)
+
+
+def create_bar(dt: datetime, close_price: float = 1) -> BarData:
+    """"""
+    return BarData(
+        gateway_name="DB",
+        symbol="rb2010",
+        exchange=Exchange.SHFE,
+        datetime=dt,
+        interval=Interval.MINUTE,
+        close_price=close_price
+    )
+
+
+class MemoryDatabaseManager(BaseDatabaseManager):
+    """Bars kept in memory, with every query recorded"""
+
+    def __init__(self):
+        self.bars = {}
+        self.queries = []
+
+    def load_bar_data(self, symbol, exchange, interval, start, end, **kwargs):
+        self.queries.append(("bar", start, end))
+        return [bar for dt, bar in sorted(self.bars.items()) if start <= dt <= end]
+
+    def load_bar_array(self, symbol, exchange, interval, start, end):
+        self.queries.append(("bar_array", start, end))
+        return super().load_bar_array(symbol, exchange, interval, start, end)
+
+    def load_tick_data(self, symbol, exchange, start, end, **kwargs):
+        return []
+
+    def save_bar_data(self, datas):
+        for bar in datas:
+            self.bars[bar.datetime] = bar
+
+    def save_tick_data(self, datas):
+        pass
+
+    def get_newest_bar_data(self, symbol, exchange, interval):
+        return None
+
+    def get_newest_tick_data(self, symbol, exchange):
+        return None
+
+    def clean(self, symbol):
+        self.bars.clear()
+
+
+class TestDatabaseCache(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.database = MemoryDatabaseManager()
+        self.database.save_bar_data([create_bar(START + timedelta(minutes=i)) for i in range(1000)])
+        self.cache = CachedDatabaseManager(self.database, max_bytes=100 * 1024 * 1024)
+
+    def load(self, start: int, end: int) -> list:
+        """Load bars between minutes from START"""
+        return self.cache.load_bar_data(
+            "rb2010",
+            Exchange.SHFE,
+            Interval.MINUTE,
+            START + timedelta(minutes=start),
+            START + timedelta(minutes=end)
+        )
+
+    def expected(self, start: int, end: int) -> list:
+        """"""
+        return [START + timedelta(minutes=i) for i in range(start, end + 1)]
+
+    def test_hit(self):
+        self.load(100, 500)
+        self.database.queries.clear()
+
+        bars = self.load(200, 300)
+        self.assertEqual([bar.datetime for bar in bars], self.expected(200, 300))
+        self.assertEqual(self.database.queries, [])
+        self.assertEqual(self.cache.get_statistics()["hit_count"], 1)
+
+    def test_stitch(self):
+        self.load(100, 200)
+        self.load(300, 400)
+        self.database.queries.clear()
+
+        # Only the gaps are loaded from database
+        bars = self.load(50, 450)
+        self.assertEqual([bar.datetime for bar in bars], self.expected(50, 450))
+        self.assertEqual(
+            [(start, end) for _, start, end in self.database.queries],
+            [
+                (START + timedelta(minutes=50), START + timedelta(minutes=100)),
+                (START + timedelta(minutes=200), START + timedelta(minutes=300)),
+                (START + timedelta(minutes=400), START + timedelta(minutes=450)),
+            ]
+        )
+        self.assertEqual(self.cache.get_statistics()["segment_count"], 1)
+
+    def test_invalidate(self):
+        self.load(100, 200)
+
+        self.cache.save_bar_data([create_bar(START + timedelta(minutes=150), 2)])
+        self.assertEqual(self.cache.get_statistics()["segment_count"], 0)
+
+        self.database.queries.clear()
+        bars = self.load(100, 200)
+        self.assertEqual(len(self.database.queries), 1)
+        self.assertEqual(bars[50].close_price, 2)
+
+    def test_evict(self):
+        self.cache.max_bytes = 1
+        self.load(100, 200)
+        self.assertEqual(self.cache.get_statistics()["segment_count"], 0)
+
+        self.database.queries.clear()
+        self.load(100, 200)
+        self.assertEqual(len(self.database.queries), 1)
+
+    def test_array_forwarded(self):
+        data = self.cache.load_bar_array(
+            "rb2010",
+            Exchange.SHFE,
+            Interval.MINUTE,
+            START,
+            START + timedelta(minutes=9)
+        )
+        self.assertEqual(len(data["datetime"]), 10)
+        self.assertEqual([query[0] for query in self.database.queries], ["bar_array", "bar"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+"""
+Test if utility works fine
+"""
+import unittest
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.object import TickData
+from vnpy.trader.utility import RollingArray, BarGenerator, aggregate_tick_array
+
+
+class TestRollingArray(unittest.TestCase):
+
+    def test_append(self):
+        series = RollingArray(10)
+        expected = np.zeros(10)
+
+        for i in range(100):
+            array = series.append(i)
+
+            expected[:-1] = expected[1:]
+            expected[-1] = i
+
+            self.assertTrue(np.array_equal(array, expected))
+            self.assertTrue(array.flags["C_CONTIGUOUS"])
+
+    def test_init_array(self):
+        series = RollingArray(5, np.array([1.0, 2.0, 3.0]))
+        self.assertEqual(list(series.array), [0, 0, 1, 2, 3])
+
+        series.append(4)
+        self.assertEqual(list(series.array), [0, 1, 2, 3, 4])
+
+
+def generate_ticks():
+    """Ticks of one trading day with night session and session breaks"""
+    rng = np.random.RandomState(0)
+    sessions = [
+        (datetime(2020, 1, 2, 21), datetime(2020, 1, 2, 23), "2020-01-03"),
+        (datetime(2020, 1, 3, 9), datetime(2020, 1, 3, 10, 15), "2020-01-03"),
+        (datetime(2020, 1, 3, 10, 30), datetime(2020, 1, 3, 11, 30), "2020-01-03"),
+        (datetime(2020, 1, 3, 13, 30), datetime(2020, 1, 3, 15), "2020-01-03"),
+    ]
+
+    ticks = []
+    price = 3000
+    volume = 0
+    for start, end, trading_day in sessions:
+        dt = start
+        # Volume restarts from 0 in day session
+        if start.hour == 9:
+            volume = 0
+
+        while dt <= end:
+            price += rng.randint(-2, 3)
+            volume += rng.randint(0, 20)
+            ticks.append(TickData(
+                symbol="rb2005",
+                exchange=Exchange.SHFE,
+                datetime=dt,
+                trading_day=trading_day,
+                gateway_name="",
+                last_price=price if rng.rand() > 0.01 else 0,
+                volume=volume,
+                open_interest=100000 + rng.randint(0, 100)
+            ))
+            dt += timedelta(milliseconds=int(rng.choice([500, 1000, 7000])))
+
+    return ticks
+
+
+def to_array(ticks):
+    """"""
+    return {
+        "datetime": np.array([tick.datetime for tick in ticks], dtype="datetime64[us]"),
+        "last_price": np.array([tick.last_price for tick in ticks]),
+        "volume": np.array([tick.volume for tick in ticks]),
+        "open_interest": np.array([tick.open_interest for tick in ticks]),
+        "trading_day": np.array([tick.trading_day for tick in ticks])
+    }
+
+
+class TestAggregateTickArray(unittest.TestCase):
+
+    def setUp(self):
+        self.ticks = generate_ticks()
+
+    def generate_bars(self, window=0, interval=Interval.MINUTE):
+        """Bars from BarGenerator, including the unfinished ones"""
+        minute_bars = []
+        window_bars = []
+        generator = BarGenerator(minute_bars.append, window, window_bars.append, interval)
+
+        for tick in self.ticks:
+            generator.update_tick(tick)
+        generator.generate()
+
+        if not window:
+            return minute_bars
+
+        for bar in minute_bars:
+            generator.update_bar(bar)
+        if generator.window_bar:
+            window_bars.append(generator.window_bar)
+        return window_bars
+
+    def assert_bars_equal(self, data, bars):
+        self.assertEqual(len(data["datetime"]), len(bars))
+        self.assertEqual(data["datetime"].tolist(), [bar.datetime for bar in bars])
+
+        for name in ["open_price", "high_price", "low_price", "close_price", "volume", "open_interest"]:
+            self.assertEqual(data[name].tolist(), [getattr(bar, name) for bar in bars], name)
+
+    def test_minute_bar(self):
+        data = aggregate_tick_array(to_array(self.ticks))
+        self.assert_bars_equal(data, self.generate_bars())
+        self.assertEqual(data["trading_day"][0], "2020-01-03")
+
+    def test_x_minute_bar(self):
+        for window in [3, 5, 15]:
+            data = aggregate_tick_array(to_array(self.ticks), window)
+            self.assert_bars_equal(data, self.generate_bars(window))
+
+    def test_x_hour_bar(self):
+        for window in [1, 2]:
+            data = aggregate_tick_array(to_array(self.ticks), window, Interval.HOUR)
+            self.assert_bars_equal(data, self.generate_bars(window, Interval.HOUR))
+
+    def test_x_second_bar(self):
+        data = aggregate_tick_array(to_array(self.ticks), 15, Interval.SECOND)
+        self.assertTrue((np.diff(data["datetime"].astype(np.int64)) >= 15000000).all())
+        self.assertEqual(data["volume"].sum(), aggregate_tick_array(to_array(self.ticks))["volume"].sum())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -21,9 +21,10 @@ import copy
 import traceback
 import csv
 from datetime import datetime, timedelta
-from queue import Queue
+from queue import Queue, Empty
+from collections import OrderedDict
 from threading import Thread
-from time import time
+from time import perf_counter
 from concurrent.futures import ThreadPoolExecutor
 
 from vnpy.event import Event, EventEngine
@@ -74,6 +75,23 @@ class AccountRecorder(BaseEngine):
         self.queue = Queue()  # 队列
         self.thread = Thread(target=self.run)  # 线程
 
+        # 批量写入：同一(db, collection, 过滤条件)的更新合并为最新状态，
+        # 达到flush_size或超过flush_interval秒后，每个collection一次bulk_write
+        self.flush_size = 500
+        self.flush_interval = 1.0
+        self.max_retry = 3
+        self.pending = OrderedDict()  # (db_name, col_name, fld_key): [fld, data, retry]
+        self.metrics = {
+            "received_count": 0,    # 收到的更新数量
+            "coalesced_count": 0,   # 被合并的更新数量
+            "written_count": 0,     # 写入数据库的数量
+            "retried_count": 0,     # 重试的数量
+            "dropped_count": 0,     # 超过重试次数被丢弃的数量
+            "flush_count": 0,
+            "last_flush_latency": 0,
+            "max_flush_latency": 0
+        }
+
         # mongo数据库
         self.mongo_db = None
 
@@ -127,6 +145,11 @@ class AccountRecorder(BaseEngine):
             self.mongo_db = MongoData(host=mongo_seetting.get('host', 'localhost'),
                                       port=mongo_seetting.get('port', 27017))
 
+            # 批量写入配置
+            self.flush_size = d.get('flush_size', self.flush_size)
+            self.flush_interval = d.get('flush_interval', self.flush_interval)
+            self.max_retry = d.get('max_retry', self.max_retry)
+
             # 获取需要处理处理得账号配置
             self.account_dict = d.get('accounts', {})
 
@@ -546,24 +569,117 @@ class AccountRecorder(BaseEngine):
     # ----------------------------------------------------------------------
     def run(self):
         """运行插入线程"""
+        last_flush = perf_counter()
+
         while self.active:
+            timeout = max(last_flush + self.flush_interval - perf_counter(), 0.01)
             try:
-                db_name, col_name, fld, d = self.queue.get(block=True, timeout=1)
-                t1 = time()
-                self.mongo_db.db_update(db_name=db_name,
-                                        col_name=col_name,
-                                        data_dict=d,
-                                        filter_dict=fld,
-                                        upsert=True)
-                t2 = time()
-                execute_ms = (int(round(t2 * 1000))) - (int(round(t1 * 1000)))
-                if execute_ms > 200:
-                    self.write_log(u'运行 {}.{} 更新 耗时:{}ms >200ms,数据:{}'
-                                   .format(db_name, col_name, execute_ms, d))
-
-            except Exception as ex:
+                self.add_pending(*self.queue.get(block=True, timeout=timeout))
+
+                # 取出队列中已有的全部更新，不阻塞
+                while len(self.pending) < self.flush_size:
+                    self.add_pending(*self.queue.get_nowait())
+            except Empty:
                 pass
 
+            if len(self.pending) >= self.flush_size or perf_counter() - last_flush >= self.flush_interval:
+                self.flush()
+                last_flush = perf_counter()
+
+        # 退出前写入剩余数据
+        while True:
+            try:
+                self.add_pending(*self.queue.get_nowait())
+            except Empty:
+                break
+        self.flush()
+
+    def add_pending(self, db_name, col_name, fld, d):
+        """
+        加入待写入更新，相同过滤条件的更新合并，只保留最新数据
+        """
+        key = (db_name, col_name, json.dumps(fld, sort_keys=True, default=str))
+        self.metrics["received_count"] += 1
+
+        item = self.pending.get(key)
+        if item:
+            # $set语义：后到的字段覆盖先前的字段
+            item[1] = {**item[1], **d}
+            self.pending.move_to_end(key)
+            self.metrics["coalesced_count"] += 1
+        else:
+            self.pending[key] = [fld, d, 0]
+
+    def flush(self):
+        """
+        写入待写入更新，每个collection一次批量操作；失败的更新放回重试
+        """
+        if not self.pending or not self.mongo_db:
+            return
+
+        pending = self.pending
+        self.pending = OrderedDict()
+
+        groups = OrderedDict()
+        for (db_name, col_name, _), item in pending.items():
+            groups.setdefault((db_name, col_name), []).append(item)
+
+        for (db_name, col_name), items in groups.items():
+            t1 = perf_counter()
+            rtn = self.mongo_db.db_update_many(db_name=db_name,
+                                               col_name=col_name,
+                                               update_list=[(fld, d) for fld, d, _ in items],
+                                               upsert=True)
+            latency = perf_counter() - t1
+
+            if rtn is None:
+                for fld, d, retry in items:
+                    if retry < self.max_retry:
+                        self.metrics["retried_count"] += 1
+                        # 重试的旧数据不能覆盖期间到达的新数据
+                        self.add_retry(db_name, col_name, fld, d, retry + 1)
+                    else:
+                        self.metrics["dropped_count"] += 1
+                self.write_log(u'批量更新 {}.{} 失败,数量:{}'.format(db_name, col_name, len(items)))
+                continue
+
+            self.metrics["written_count"] += len(items)
+            self.metrics["flush_count"] += 1
+            self.metrics["last_flush_latency"] = latency
+            self.metrics["max_flush_latency"] = max(self.metrics["max_flush_latency"], latency)
+
+            if latency > 0.2:
+                self.write_log(u'批量更新 {}.{} 数量:{} 耗时:{}ms >200ms'
+                               .format(db_name, col_name, len(items), int(latency * 1000)))
+
+    def add_retry(self, db_name, col_name, fld, d, retry):
+        """失败的更新放回待写入，放在最前面"""
+        key = (db_name, col_name, json.dumps(fld, sort_keys=True, default=str))
+        item = self.pending.get(key)
+        if item:
+            item[1] = {**d, **item[1]}
+        else:
+            self.pending[key] = [fld, d, retry]
+            self.pending.move_to_end(key, last=False)
+
+    def get_metrics(self):
+        """
+        获取批量写入的统计：队列积压、待写入、合并、重试和丢弃数量，写入耗时(毫秒)
+        """
+        metrics = self.metrics
+        return {
+            "queue_size": self.queue.qsize(),
+            "pending": len(self.pending),
+            "received_count": metrics["received_count"],
+            "coalesced_count": metrics["coalesced_count"],
+            "written_count": metrics["written_count"],
+            "retried_count": metrics["retried_count"],
+            "dropped_count": metrics["dropped_count"],
+            "flush_count": metrics["flush_count"],
+            "last_flush_ms": metrics["last_flush_latency"] * 1000,
+            "max_flush_ms": metrics["max_flush_latency"] * 1000
+        }
+
     # ----------------------------------------------------------------------
     def start(self):
         """启动"""
@@ -573,9 +689,10 @@ class AccountRecorder(BaseEngine):
     # ----------------------------------------------------------------------
     def stop(self):
         """退出"""
-        if self.mongo_db:
-            self.mongo_db = None
-
+        # 先停止线程，写入剩余数据后再释放数据库
         if self.active:
             self.active = False
             self.thread.join()
+
+        if self.mongo_db:
+            self.mongo_db = None
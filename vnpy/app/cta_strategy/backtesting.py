@@ -1,10 +1,12 @@
 from collections import defaultdict
+from dataclasses import fields
 from datetime import date, datetime, timedelta
 from typing import Callable
 from itertools import product
 from functools import lru_cache
 from time import time
 import multiprocessing
+from multiprocessing import shared_memory
 import random
 
 import numpy as np
@@ -16,6 +18,7 @@ from deap import creator, base, tools, algorithms
 from vnpy.trader.constant import (Direction, Offset, Exchange,
                                   Interval, Status)
 from vnpy.trader.database import database_manager
+from vnpy.trader.database.database_cache import CachedDatabaseManager
 from vnpy.trader.object import OrderData, TradeData, BarData, TickData
 from vnpy.trader.utility import round_to
 
@@ -116,6 +119,7 @@ class BacktestingEngine:
         self.capital = 1_000_000
         self.mode = BacktestingMode.BAR
         self.inverse = False
+        self.stream = False
 
         self.strategy_class = None
         self.strategy = None
@@ -179,9 +183,14 @@ class BacktestingEngine:
         capital: int = 0,
         end: datetime = None,
         mode: BacktestingMode = BacktestingMode.BAR,
-        inverse: bool = False
+        inverse: bool = False,
+        stream: bool = False
     ):
-        """"""
+        """
+        If stream is True, history data is not loaded into memory
+        in load_data, but read from database chunk by chunk during
+        run_backtesting.
+        """
         self.mode = mode
         self.vt_symbol = vt_symbol
         self.interval = Interval(interval)
@@ -198,6 +207,7 @@ class BacktestingEngine:
         self.end = end
         self.mode = mode
         self.inverse = inverse
+        self.stream = stream
 
     def add_strategy(self, strategy_class: type, setting: dict):
         """"""
@@ -206,8 +216,11 @@ class BacktestingEngine:
             self, strategy_class.__name__, self.vt_symbol, setting
         )
 
-    def load_data(self):
+    def load_data(self, stream: bool = None):
         """"""
+        if stream is None:
+            stream = self.stream
+
         self.output("开始加载历史数据")
 
         if not self.end:
@@ -219,6 +232,22 @@ class BacktestingEngine:
 
         self.history_data.clear()       # Clear previously loaded history data
 
+        if stream:
+            self.output("使用流式加载，历史数据在回放时分段读取")
+            return
+
+        self.history_data.extend(self.iter_history_data())
+
+        self.output(f"历史数据加载完成，数据量：{len(self.history_data)}")
+
+    def iter_history_data(self, use_cache: bool = True):
+        """
+        Generator of history data, loaded from database 30 days at a time.
+
+        Only the current chunk is kept in memory. Set use_cache to False
+        to bypass the read cache of database manager, so that consumed
+        chunks can be released.
+        """
         # Load 30 days of data each time and allow for progress update
         progress_delta = timedelta(days=30)
         total_delta = self.end - self.start
@@ -237,17 +266,20 @@ class BacktestingEngine:
                     self.exchange,
                     self.interval,
                     start,
-                    end
+                    end,
+                    use_cache
                 )
             else:
                 data = load_tick_data(
                     self.symbol,
                     self.exchange,
                     start,
-                    end
+                    end,
+                    use_cache
                 )
 
-            self.history_data.extend(data)
+            yield from data
+            del data
 
             progress += progress_delta / total_delta
             progress = min(progress, 1)
@@ -257,8 +289,6 @@ class BacktestingEngine:
             start = end + interval_delta
             end += (progress_delta + interval_delta)
 
-        self.output(f"历史数据加载完成，数据量：{len(self.history_data)}")
-
     def run_backtesting(self):
         """"""
         if self.mode == BacktestingMode.BAR:
@@ -266,16 +296,23 @@ class BacktestingEngine:
         else:
             func = self.new_tick
 
+        # Stream data from database if history data is not loaded
+        if self.stream and not self.history_data:
+            history = self.iter_history_data(use_cache=False)
+        else:
+            history = iter(self.history_data)
+
         self.strategy.on_init()
 
         # Use the first [days] of history data for initializing strategy
         day_count = 0
-        ix = 0
+        first_data = None
 
-        for ix, data in enumerate(self.history_data):
+        for data in history:
             if self.datetime and data.datetime.day != self.datetime.day:
                 day_count += 1
                 if day_count >= self.days:
+                    first_data = data
                     break
 
             self.datetime = data.datetime
@@ -289,7 +326,10 @@ class BacktestingEngine:
         self.output("开始回放历史数据")
 
         # Use the rest of history data for running backtesting
-        for data in self.history_data[ix:]:
+        if first_data:
+            func(first_data)
+
+        for data in history:
             func(data)
 
         self.output("历史数据回放结束")
@@ -524,7 +564,13 @@ class BacktestingEngine:
         plt.show()
 
     def run_optimization(self, optimization_setting: OptimizationSetting, output=True):
-        """"""
+        """
+        Run exhaustive optimization with multiprocessing pool.
+
+        History data is loaded once and packed into a shared memory block.
+        Every worker replays bars/ticks from the block without copying the
+        full history data list into its own memory.
+        """
         # Get optimization setting and target
         settings = optimization_setting.generate_setting()
         target_name = optimization_setting.target_name
@@ -537,31 +583,43 @@ class BacktestingEngine:
             self.output("优化目标未设置，请检查")
             return
 
+        # Load history data once, and share it with all worker processes
+        if not self.history_data:
+            self.load_data(stream=False)
+        shm, shared_info = create_shared_history(self.history_data)
+
+        engine_parameters = (
+            self.vt_symbol,
+            self.interval,
+            self.start,
+            self.rate,
+            self.slippage,
+            self.size,
+            self.pricetick,
+            self.capital,
+            self.end,
+            self.mode,
+            self.inverse
+        )
+
         # Use multiprocessing pool for running backtesting with different setting
-        pool = multiprocessing.Pool(multiprocessing.cpu_count())
+        pool = multiprocessing.Pool(
+            multiprocessing.cpu_count(),
+            initializer=init_optimize_worker,
+            initargs=(self.strategy_class, engine_parameters, shared_info)
+        )
 
-        results = []
-        for setting in settings:
-            result = (pool.apply_async(optimize, (
-                target_name,
-                self.strategy_class,
-                setting,
-                self.vt_symbol,
-                self.interval,
-                self.start,
-                self.rate,
-                self.slippage,
-                self.size,
-                self.pricetick,
-                self.capital,
-                self.end,
-                self.mode,
-                self.inverse
-            )))
-            results.append(result)
+        try:
+            results = []
+            for setting in settings:
+                result = pool.apply_async(worker_optimize, (target_name, setting))
+                results.append(result)
 
-        pool.close()
-        pool.join()
+            pool.close()
+            pool.join()
+        finally:
+            shm.close()
+            shm.unlink()
 
         # Sort results and output
         result_values = [result.get() for result in results]
@@ -633,6 +691,12 @@ class BacktestingEngine:
         ga_mode = self.mode
         ga_inverse = self.inverse
 
+        # Load history data once and reuse it for every evaluation
+        global ga_history_data
+        if not self.history_data:
+            self.load_data(stream=False)
+        ga_history_data = self.history_data
+
         # Set up genetic algorithem
         toolbox = base.Toolbox()
         toolbox.register("individual", tools.initIterate, creator.Individual, generate_parameter)
@@ -1180,10 +1244,14 @@ def optimize(
     capital: int,
     end: datetime,
     mode: BacktestingMode,
-    inverse: bool
+    inverse: bool,
+    history_data: list = None
 ):
     """
     Function for running in multiprocessing.pool
+
+    If history_data is given, it is used directly instead of loading
+    data from database.
     """
     engine = BacktestingEngine()
 
@@ -1202,7 +1270,10 @@ def optimize(
     )
 
     engine.add_strategy(strategy_class, setting)
-    engine.load_data()
+    if history_data is None:
+        engine.load_data()
+    else:
+        engine.history_data = history_data
     engine.run_backtesting()
     engine.calculate_result()
     statistics = engine.calculate_statistics(output=False)
@@ -1230,7 +1301,8 @@ def _ga_optimize(parameter_values: tuple):
         ga_capital,
         ga_end,
         ga_mode,
-        ga_inverse
+        ga_inverse,
+        ga_history_data
     )
     return (result[1],)
 
@@ -1240,8 +1312,181 @@ def ga_optimize(parameter_values: list):
     return _ga_optimize(tuple(parameter_values))
 
 
-@lru_cache(maxsize=999)
+def create_shared_history(history_data: list):
+    """
+    Pack history data (bar or tick) into a columnar shared memory block.
+
+    Datetime is stored as int64 microseconds, float fields as float64
+    and str fields as fixed width unicode.
+    Returns the shared memory object (to be closed and unlinked by the
+    caller) and the info used by SharedHistory.
+    """
+    data_class = type(history_data[0]) if history_data else BarData
+    first = history_data[0] if history_data else None
+
+    dtype = []
+    for field in fields(data_class):
+        if field.name in ("gateway_name", "symbol", "exchange", "interval"):
+            continue
+        if field.type is datetime:
+            dtype.append((field.name, np.int64))
+        elif field.type is float:
+            dtype.append((field.name, np.float64))
+        elif field.type is str:
+            width = max([len(getattr(data, field.name)) for data in history_data] + [1])
+            dtype.append((field.name, f"U{width}"))
+    dtype = np.dtype(dtype)
+
+    shm = shared_memory.SharedMemory(create=True, size=max(dtype.itemsize * len(history_data), 1))
+    array = np.ndarray(len(history_data), dtype=dtype, buffer=shm.buf)
+
+    tzinfo = first.datetime.tzinfo if first else None
+    for name in dtype.names:
+        if name == "datetime":
+            values = [data.datetime.replace(tzinfo=None) for data in history_data]
+            array[name] = np.array(values, dtype="datetime64[us]").astype(np.int64)
+        else:
+            array[name] = [getattr(data, name) for data in history_data]
+
+    shared_info = {
+        "name": shm.name,
+        "dtype": dtype.descr,
+        "count": len(history_data),
+        "data_class": data_class,
+        "gateway_name": first.gateway_name if first else "",
+        "symbol": first.symbol if first else "",
+        "exchange": first.exchange if first else None,
+        "interval": getattr(first, "interval", None),
+        "tzinfo": tzinfo
+    }
+    return shm, shared_info
+
+
+class SharedHistory:
+    """
+    Read-only view of history data in the shared memory block created
+    by create_shared_history.
+
+    Bar/tick objects are created chunk by chunk while iterating, so the
+    history data is only held once in shared memory and not copied into
+    every worker process.
+    """
+
+    def __init__(self, shared_info: dict, chunk_size: int = 10000):
+        """"""
+        self.chunk_size = chunk_size
+        self.shm = shared_memory.SharedMemory(name=shared_info["name"])
+
+        dtype = np.dtype(shared_info["dtype"])
+        self.array = np.ndarray(shared_info["count"], dtype=dtype, buffer=self.shm.buf)
+
+        self.data_class = shared_info["data_class"]
+        self.tzinfo = shared_info["tzinfo"]
+        self.names = [name for name in dtype.names if name != "datetime"]
+
+        self.kwargs = {
+            "gateway_name": shared_info["gateway_name"],
+            "symbol": shared_info["symbol"],
+            "exchange": shared_info["exchange"]
+        }
+        if self.data_class is BarData:
+            self.kwargs["interval"] = shared_info["interval"]
+
+    def __len__(self):
+        """"""
+        return len(self.array)
+
+    def __iter__(self):
+        """"""
+        for i in range(0, len(self.array), self.chunk_size):
+            chunk = self.array[i:i + self.chunk_size]
+
+            columns = [chunk[name].tolist() for name in self.names]
+            datetimes = chunk["datetime"].astype("datetime64[us]").tolist()
+
+            for dt, values in zip(datetimes, zip(*columns)):
+                if self.tzinfo:
+                    dt = dt.replace(tzinfo=self.tzinfo)
+                yield self.data_class(datetime=dt, **self.kwargs, **dict(zip(self.names, values)))
+
+    def close(self):
+        """
+        Release numpy view and detach from shared memory.
+        """
+        self.array = None
+        self.shm.close()
+
+
+def init_optimize_worker(strategy_class: type, engine_parameters: tuple, shared_info: dict):
+    """
+    Initializer of optimization worker process.
+
+    Strategy class and engine parameters stay resident in the worker and
+    are reused by every optimization task. History data is replayed from
+    the shared memory block directly, which stays attached until the
+    worker process exits.
+    """
+    global worker_strategy_class
+    global worker_engine_parameters
+    global worker_history_data
+
+    worker_strategy_class = strategy_class
+    worker_engine_parameters = engine_parameters
+    worker_history_data = SharedHistory(shared_info)
+
+
+def worker_optimize(target_name: str, setting: dict):
+    """
+    Run one optimization task in worker initialized by init_optimize_worker.
+    """
+    return optimize(
+        target_name,
+        worker_strategy_class,
+        setting,
+        *worker_engine_parameters,
+        history_data=worker_history_data
+    )
+
+
 def load_bar_data(
+    symbol: str,
+    exchange: Exchange,
+    interval: Interval,
+    start: datetime,
+    end: datetime,
+    cache: bool = True
+):
+    """
+    Overlapping ranges are served by the read cache of database manager,
+    see database.cache_size setting. Without the read cache, repeated
+    loads of the same range are cached by exact arguments.
+    """
+    if cache and not isinstance(database_manager, CachedDatabaseManager):
+        return load_cached_bar_data(symbol, exchange, interval, start, end)
+
+    return database_manager.load_bar_data(
+        symbol, exchange, interval, start, end, cache=cache
+    )
+
+
+def load_tick_data(
+    symbol: str,
+    exchange: Exchange,
+    start: datetime,
+    end: datetime,
+    cache: bool = True
+):
+    """"""
+    if cache and not isinstance(database_manager, CachedDatabaseManager):
+        return load_cached_tick_data(symbol, exchange, start, end)
+
+    return database_manager.load_tick_data(
+        symbol, exchange, start, end, cache=cache
+    )
+
+
+@lru_cache(maxsize=999)
+def load_cached_bar_data(
     symbol: str,
     exchange: Exchange,
     interval: Interval,
@@ -1255,7 +1500,7 @@ def load_bar_data(
 
 
 @lru_cache(maxsize=999)
-def load_tick_data(
+def load_cached_tick_data(
     symbol: str,
     exchange: Exchange,
     start: datetime,
@@ -1267,7 +1512,13 @@ def load_tick_data(
     )
 
 
+# Optimization worker related global value
+worker_strategy_class = None
+worker_engine_parameters = None
+worker_history_data = None
+
 # GA related global value
+ga_history_data = None
 ga_end = None
 ga_mode = None
 ga_target_name = None
@@ -0,0 +1,386 @@
+# encoding: UTF-8
+
+# 增量(流式)指标计算
+# 每根bar只更新O(1)的内部状态，不再对整个收盘价数组重新调用talib。
+# 结果与talib对完整序列计算的结果一致：
+#   IncMA    <-> ta.MA / ta.SMA
+#   IncBoll  <-> ta.BBANDS (ddof=0)，ddof=1时为样本标准差
+#   IncEMA   <-> ta.EMA
+#   IncMACD  <-> ta.MACD
+#   IncRSI   <-> ta.RSI
+#   IncATR   <-> ta.ATR
+#   IncDMI   <-> ta.SUM(ta.PLUS_DM(1)) / ta.SUM(ta.TRANGE)，adx为ta.EMA(dx)
+#   RollingMax/RollingMin <-> ta.MAX / ta.MIN
+# 所有指标提供:
+#   update(): 添加一根完成的bar，更新状态，返回最新值(数据不足时返回None)
+#   peek():   返回假设添加该值后的结果，不改变状态，用于rt_count_xxx实时计算
+
+import math
+from collections import deque
+
+
+class IncMA(object):
+    """简单移动平均"""
+
+    def __init__(self, n: int):
+        self.n = n
+        self.values = deque(maxlen=n)
+        self.sum = 0.0
+        self.updates = 0
+        self.value = None
+
+    @property
+    def count(self):
+        return len(self.values)
+
+    def _push(self, x: float):
+        """添加数据，维护滑动窗口的和"""
+        if len(self.values) == self.n:
+            self.sum -= self.values[0]
+        self.values.append(x)
+        self.sum += x
+
+        # 每滚动一轮重新求和，消除浮点累计误差
+        self.updates += 1
+        if self.updates >= self.n:
+            self.updates = 0
+            self.sum = math.fsum(self.values)
+
+    def _peek_sum(self, x: float):
+        """返回添加x后的(和,数量)"""
+        if len(self.values) == self.n:
+            return self.sum - self.values[0] + x, self.n
+        return self.sum + x, len(self.values) + 1
+
+    def update(self, x: float):
+        self._push(x)
+        self.value = self.sum / len(self.values)
+        return self.value
+
+    def peek(self, x: float):
+        s, count = self._peek_sum(x)
+        return s / count
+
+
+class IncBoll(IncMA):
+    """布林线: 滑动窗口的均值和标准差"""
+
+    def __init__(self, n: int, dev: float = 2, ddof: int = 0):
+        super().__init__(n)
+        self.dev = dev
+        self.ddof = ddof
+        # 以第一个数据作为偏移，减少平方和的精度损失
+        self.shift = None
+        self.sum_sq = 0.0
+        self.std = None
+        self.upper = None
+        self.middle = None
+        self.lower = None
+
+    def _push(self, x: float):
+        if self.shift is None:
+            self.shift = x
+        if len(self.values) == self.n:
+            y = self.values[0] - self.shift
+            self.sum_sq -= y * y
+        y = x - self.shift
+        self.sum_sq += y * y
+
+        super()._push(x)
+        if self.updates == 0:
+            self.sum_sq = math.fsum((v - self.shift) ** 2 for v in self.values)
+
+    def _count_std(self, s: float, sum_sq: float, count: int):
+        """根据和、平方和计算标准差"""
+        if count - self.ddof <= 0:
+            return 0.0
+        d = s - self.shift * count
+        var = (sum_sq - d * d / count) / (count - self.ddof)
+        return math.sqrt(var) if var > 0 else 0.0
+
+    def update(self, x: float):
+        self._push(x)
+        count = len(self.values)
+        self.middle = self.sum / count
+        self.std = self._count_std(self.sum, self.sum_sq, count)
+        self.upper = self.middle + self.dev * self.std
+        self.lower = self.middle - self.dev * self.std
+        self.value = self.middle
+        return self.upper, self.middle, self.lower, self.std
+
+    def peek(self, x: float):
+        if self.shift is None:
+            return x, x, x, 0.0
+
+        sum_sq = self.sum_sq + (x - self.shift) ** 2
+        if len(self.values) == self.n:
+            sum_sq -= (self.values[0] - self.shift) ** 2
+
+        s, count = self._peek_sum(x)
+        std = self._count_std(s, sum_sq, count)
+        middle = s / count
+        return middle + self.dev * std, middle, middle - self.dev * std, std
+
+
+class IncEMA(object):
+    """指数移动平均，前n个数据以简单平均作为初始值(与talib一致)"""
+
+    def __init__(self, n: int):
+        self.n = n
+        self.k = 2.0 / (n + 1)
+        self.count = 0
+        self.seed_sum = 0.0
+        self.value = None
+
+    def update(self, x: float):
+        self.count += 1
+        if self.count < self.n:
+            self.seed_sum += x
+        elif self.count == self.n:
+            self.value = (self.seed_sum + x) / self.n
+        else:
+            self.value += self.k * (x - self.value)
+        return self.value
+
+    def peek(self, x: float):
+        if self.count + 1 < self.n:
+            return None
+        if self.count + 1 == self.n:
+            return (self.seed_sum + x) / self.n
+        return self.value + self.k * (x - self.value)
+
+
+class IncMACD(object):
+    """
+    MACD: dif = EMA(fast) - EMA(slow), dea = EMA(dif, signal), macd = dif - dea
+    与talib一致，快慢EMA在第slow个数据时同时初始化
+    """
+
+    def __init__(self, fast: int, slow: int, signal: int):
+        self.fast = fast
+        self.slow = slow
+        self.kf = 2.0 / (fast + 1)
+        self.ks = 2.0 / (slow + 1)
+        self.seeds = deque(maxlen=max(fast, slow))
+        self.fast_ema = None
+        self.slow_ema = None
+        self.signal = IncEMA(signal)
+
+        self.dif = None
+        self.dea = None
+        self.macd = None
+
+    def _count_emas(self, x: float):
+        """返回添加x后的快慢EMA"""
+        if self.slow_ema is not None:
+            return self.fast_ema + self.kf * (x - self.fast_ema), self.slow_ema + self.ks * (x - self.slow_ema)
+
+        if len(self.seeds) + 1 < self.seeds.maxlen:
+            return None, None
+
+        values = list(self.seeds) + [x]
+        return sum(values[-self.fast:]) / self.fast, sum(values[-self.slow:]) / self.slow
+
+    def update(self, x: float):
+        fast_ema, slow_ema = self._count_emas(x)
+        if slow_ema is None:
+            self.seeds.append(x)
+            return None, None, None
+
+        self.fast_ema, self.slow_ema = fast_ema, slow_ema
+        self.dif = fast_ema - slow_ema
+        self.dea = self.signal.update(self.dif)
+        self.macd = self.dif - self.dea if self.dea is not None else None
+        return self.dif, self.dea, self.macd
+
+    def peek(self, x: float):
+        fast_ema, slow_ema = self._count_emas(x)
+        if slow_ema is None:
+            return None, None, None
+
+        dif = fast_ema - slow_ema
+        dea = self.signal.peek(dif)
+        return dif, dea, dif - dea if dea is not None else None
+
+
+class IncRSI(object):
+    """相对强弱指标(Wilder平滑，与talib一致)"""
+
+    def __init__(self, n: int):
+        self.n = n
+        self.count = 0
+        self.pre_value = None
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self.value = None
+
+    def _count(self, x: float):
+        """返回添加x后的(平均涨幅,平均跌幅)"""
+        diff = x - self.pre_value
+        gain = diff if diff > 0 else 0.0
+        loss = -diff if diff < 0 else 0.0
+
+        if self.count + 1 < self.n:
+            return self.avg_gain + gain, self.avg_loss + loss
+        elif self.count + 1 == self.n:
+            return (self.avg_gain + gain) / self.n, (self.avg_loss + loss) / self.n
+        else:
+            return (self.avg_gain * (self.n - 1) + gain) / self.n, (self.avg_loss * (self.n - 1) + loss) / self.n
+
+    @staticmethod
+    def _rsi(avg_gain: float, avg_loss: float):
+        total = avg_gain + avg_loss
+        return 100 * avg_gain / total if total != 0 else 0.0
+
+    def update(self, x: float):
+        if self.pre_value is None:
+            self.pre_value = x
+            return None
+
+        self.avg_gain, self.avg_loss = self._count(x)
+        self.count += 1
+        self.pre_value = x
+
+        if self.count >= self.n:
+            self.value = self._rsi(self.avg_gain, self.avg_loss)
+        return self.value
+
+    def peek(self, x: float):
+        if self.pre_value is None or self.count + 1 < self.n:
+            return None
+        return self._rsi(*self._count(x))
+
+
+class IncATR(object):
+    """平均真实波幅(Wilder平滑，与talib一致)"""
+
+    def __init__(self, n: int):
+        self.n = n
+        self.count = 0
+        self.pre_close = None
+        self.tr_sum = 0.0
+        self.value = None
+
+    def _count(self, high: float, low: float, close: float):
+        """返回添加bar后的ATR(或初始化阶段的TR之和)"""
+        tr = max(high - low, abs(high - self.pre_close), abs(low - self.pre_close))
+        if self.count + 1 < self.n:
+            return self.tr_sum + tr
+        elif self.count + 1 == self.n:
+            return (self.tr_sum + tr) / self.n
+        else:
+            return (self.value * (self.n - 1) + tr) / self.n
+
+    def update(self, high: float, low: float, close: float):
+        if self.pre_close is None:
+            self.pre_close = close
+            return None
+
+        result = self._count(high, low, close)
+        self.count += 1
+        self.pre_close = close
+
+        if self.count < self.n:
+            self.tr_sum = result
+        else:
+            self.value = result
+        return self.value
+
+    def peek(self, high: float, low: float, close: float):
+        if self.pre_close is None or self.count + 1 < self.n:
+            return None
+        return self._count(high, low, close)
+
+
+class IncDMI(object):
+    """
+    趋向指标(与CtaLineBar原算法一致)
+    pdi: 上升动向指标，最近n个周期做多价差之和 / TR之和 * 100
+    mdi: 下降动向指标，最近n个周期做空价差之和 / TR之和 * 100
+    dx: 动向指数
+    adx: 平均动向指数，dx序列的EMA，dx数量不足n+1时为None
+    """
+
+    def __init__(self, n: int):
+        self.n = n
+        self.pre_high = None
+        self.pre_low = None
+        self.pre_close = None
+
+        self.trs = deque(maxlen=n)
+        self.pdms = deque(maxlen=n)
+        self.mdms = deque(maxlen=n)
+        self.dx_ema = IncEMA(n)
+
+        self.pdi = None
+        self.mdi = None
+        self.dx = None
+        self.adx = None
+
+    def update(self, high: float, low: float, close: float):
+        if self.pre_close is None:
+            self.pre_high, self.pre_low, self.pre_close = high, low, close
+            return None
+
+        diff_p = high - self.pre_high
+        diff_m = self.pre_low - low
+        self.pdms.append(diff_p if diff_p > 0 and diff_p > diff_m else 0.0)
+        self.mdms.append(diff_m if diff_m > 0 and diff_m > diff_p else 0.0)
+        self.trs.append(max(high - low, abs(high - self.pre_close), abs(low - self.pre_close)))
+        self.pre_high, self.pre_low, self.pre_close = high, low, close
+
+        if len(self.trs) < self.n:
+            return None
+
+        # 窗口只有n个数据，直接求和，与原算法逐个累加的结果一致
+        tr = math.fsum(self.trs)
+        if tr == 0:
+            self.pdi = self.mdi = 0.0
+        else:
+            self.pdi = math.fsum(self.pdms) * 100 / tr
+            self.mdi = math.fsum(self.mdms) * 100 / tr
+
+        total = self.pdi + self.mdi
+        self.dx = 100 * abs(self.mdi - self.pdi) / total if total != 0 else 0.0
+
+        self.dx_ema.update(self.dx)
+        self.adx = self.dx_ema.value if self.dx_ema.count > self.n else None
+
+        return self.pdi, self.mdi, self.dx, self.adx
+
+
+class RollingMax(object):
+    """滑动窗口最大值(单调队列，均摊O(1))"""
+
+    def __init__(self, n: int):
+        self.n = n
+        self.index = 0
+        self.queue = deque()
+        self.value = None
+
+    def _better(self, a: float, b: float):
+        return a >= b
+
+    def update(self, x: float):
+        queue = self.queue
+        while queue and self._better(x, queue[-1][1]):
+            queue.pop()
+        queue.append((self.index, x))
+        if queue[0][0] <= self.index - self.n:
+            queue.popleft()
+        self.index += 1
+        self.value = queue[0][1]
+        return self.value
+
+    def peek(self, x: float):
+        for i, v in self.queue:
+            if i > self.index - self.n:
+                return x if self._better(x, v) else v
+        return x
+
+
+class RollingMin(RollingMax):
+    """滑动窗口最小值(单调队列，均摊O(1))"""
+
+    def _better(self, a: float, b: float):
+        return a <= b
@@ -15,6 +15,7 @@ import numpy as np
 
 from collections import OrderedDict
 from datetime import datetime, timedelta
+from time import perf_counter
 
 from pykalman import KalmanFilter
 
@@ -26,9 +27,19 @@ from vnpy.app.cta_strategy_pro.base import (
     NIGHT_MARKET_SQ2,
     MARKET_ZJ)
 from vnpy.app.cta_strategy_pro.cta_period import CtaPeriod, Period
+from vnpy.app.cta_strategy_pro.cta_indicator import (
+    IncMA,
+    IncBoll,
+    IncEMA,
+    IncMACD,
+    IncRSI,
+    IncATR,
+    IncDMI,
+    RollingMax,
+    RollingMin)
 from vnpy.trader.object import BarData, TickData
 from vnpy.trader.constant import Interval, Color, Exchange
-from vnpy.trader.utility import round_to, get_trading_date, get_underlying_symbol
+from vnpy.trader.utility import round_to, get_trading_date, get_underlying_symbol, RollingArray
 
 
 def get_cta_bar_class(bar_type: str):
@@ -155,6 +166,17 @@ class CtaLineBar(object):
         self.mid4_array = np.zeros(self.max_hold_bars)  # 收盘价*2/最高/最低价 的平均价
         self.mid5_array = np.zeros(self.max_hold_bars)  # 收盘价*2/开仓价/最高/最低价 的平均价
 
+        # 上述array的滚动存储，append为O(1)，array为其连续视图
+        self.array_series = {}
+        self.array_count = 0  # 已添加到array的bar数量
+
+        # 增量指标计算器
+        self.indicators = {}
+
+        # on_bar中需执行的指标计算步骤，及各步骤的耗时统计
+        self.indicator_plan = []
+        self.indicator_timing = {}
+
         self.export_filename = None
         self.export_fields = []
 
@@ -201,6 +223,9 @@ class CtaLineBar(object):
                     self.write_log(u'导入卡尔曼过滤器失败,需先安装 pip install pykalman')
                     self.para_active_kf = False
 
+        # 根据指标参数，编译计算步骤
+        self.compile_indicator_plan()
+
     def registerEvent(self, event_type, cb_func):
         """注册事件回调函数"""
         self.cb_dict.update({event_type: cb_func})
@@ -316,6 +341,114 @@ class CtaLineBar(object):
         for key in state.__dict__.keys():
             self.__dict__[key] = state.__dict__[key]
 
+    def append_array(self, name: str, value: float):
+        """
+        添加数据到滚动数组，返回最新的numpy视图
+        如数组被外部替换(例如从pickle缓存恢复)，则从当前数组重建滚动存储
+        :param name: 数组属性名，如close_array
+        :param value: 最新值
+        :return:
+        """
+        array = self.__dict__.get(name)
+        series = self.__dict__.setdefault('array_series', {}).get(name)
+        if series is None or series.array is not array:
+            series = RollingArray(len(array), array)
+            self.array_series[name] = series
+
+        return series.append(value)
+
+    def get_array_count(self):
+        """
+        已添加到array的bar数量
+        从旧的pickle缓存恢复的K线，array_count缺失或仍为0，按已恢复的K线及数组长度计算，
+        使增量指标能用恢复的数据预热
+        :return:
+        """
+        array_count = self.__dict__.get('array_count', 0)
+        if array_count == 0:
+            array_count = min(max(self.__dict__.get('bar_len', 0) - 1, 0), len(self.close_array))
+        return array_count
+
+    def get_indicator_steps(self):
+        """
+        声明on_bar中的指标计算步骤，及其是否启用(由所依赖的指标参数决定)
+        步骤按声明顺序执行，后面的步骤可使用前面步骤的结果(如period依赖rsi、boll)
+        :return: [(步骤名称，是否需要传入bar, 是否启用)]
+        """
+        boll_active = max(self.para_boll_len, self.para_boll2_len, self.para_boll_tb_len, self.para_boll2_tb_len) > 0
+        return [
+            ('pre_high_low', False, self.para_pre_len > 0),
+            ('ma', False, max(self.para_ma1_len, self.para_ma2_len, self.para_ma3_len) > 0),
+            ('ema', False, max(self.para_ema1_len, self.para_ema2_len, self.para_ema3_len) > 0),
+            ('dmi', False, self.para_dmi_len > 0),
+            ('atr', False, max(self.para_atr1_len, self.para_atr2_len, self.para_atr3_len) > 0),
+            ('vol_ma', False, self.para_vol_len > 0),
+            ('rsi', False, max(self.para_rsi1_len, self.para_rsi2_len) > 0),
+            ('cmi', False, self.para_cmi_len > 0),
+            ('kdj', False, self.para_kdj_len > 0),
+            ('kdj_tb', False, self.para_kdj_tb_len > 0),
+            ('boll', False, boll_active),
+            ('macd', False, min(self.para_macd_fast_len, self.para_macd_slow_len, self.para_macd_signal_len) > 0),
+            ('cci', False, self.para_cci_len > 0),
+            ('kf', False, self.para_active_kf),
+            ('period', True, self.para_rsi1_len > 0
+             and (self.para_active_kf or self.para_boll_len > 0 or self.para_boll_tb_len > 0)),
+            ('skd', False, self.para_active_skd),
+            ('yb', False, self.para_active_yb),
+            ('sar', False, self.para_sar_step > 0 or self.para_sar_limit > self.para_sar_step),
+            ('golden_section', False, self.para_golden_n > 0),
+            ('area', True, self.para_active_area),
+            ('bias', False, max(self.para_bias_len, self.para_bias2_len, self.para_bias3_len) > 0),
+        ]
+
+    def compile_indicator_plan(self):
+        """
+        根据当前指标参数，生成on_bar需要执行的计算步骤
+        创建K线时自动执行；如创建后修改了指标参数，需重新调用
+        :return:
+        """
+        self.indicator_plan = [(name, with_bar) for name, with_bar, active in self.get_indicator_steps() if active]
+        self.indicator_timing = {name: [0, 0.0] for name, _ in self.indicator_plan}
+        self.write_log(u'指标计算步骤:{}'.format([name for name, _ in self.indicator_plan]))
+
+    def get_indicator_timing(self):
+        """
+        获取各指标计算步骤的耗时统计
+        :return: {步骤名称: {'count': 执行次数, 'total_ms': 总耗时(毫秒), 'avg_us': 平均耗时(微秒)}}
+        """
+        data = {}
+        for name, (count, total) in self.__dict__.get('indicator_timing', {}).items():
+            data[name] = {
+                'count': count,
+                'total_ms': round(total * 1000, 3),
+                'avg_us': round(total * 1000000 / count, 3) if count else 0
+            }
+        return data
+
+    def get_indicator(self, name: str, cls, *args, inputs=('close_array',), create=True):
+        """
+        获取增量指标计算器
+        首次使用(或参数变化、从旧的pickle缓存恢复)时，用array中已有的历史数据(不含最新一根)预热
+        :param name: 指标名称，例如ma1
+        :param cls: 指标类，例如IncMA
+        :param args: 指标参数
+        :param inputs: 指标输入的数组名
+        :param create: 不存在时是否创建(实时计算时不创建)
+        :return:
+        """
+        key = (name,) + args
+        indicators = self.__dict__.setdefault('indicators', {})
+        indicator = indicators.get(key)
+        if indicator is None and create:
+            indicator = cls(*args)
+            arrays = [self.__dict__[array_name] for array_name in inputs]
+            history_len = min(self.get_array_count(), len(arrays[0]))
+            if history_len > 1:
+                for values in zip(*[array[-history_len:-1] for array in arrays]):
+                    indicator.update(*values)
+            indicators[key] = indicator
+        return indicator
+
     def init_indicators(self):
         """ 定义所有的指标数据"""
 
@@ -731,50 +864,34 @@ class CtaLineBar(object):
         bar_mid5 = round((2 * bar.close_price + bar.open_price + bar.high_price + bar.low_price) / 5, self.round_n)
 
         # 扩展open,close,high,low numpy array列表
-        self.open_array[:-1] = self.open_array[1:]
-        self.open_array[-1] = bar.open_price
-
-        self.high_array[:-1] = self.high_array[1:]
-        self.high_array[-1] = bar.high_price
-
-        self.low_array[:-1] = self.low_array[1:]
-        self.low_array[-1] = bar.low_price
-
-        self.close_array[:-1] = self.close_array[1:]
-        self.close_array[-1] = bar.close_price
-
-        self.mid3_array[:-1] = self.mid3_array[1:]
-        self.mid3_array[-1] = bar_mid3
-
-        self.mid4_array[:-1] = self.mid4_array[1:]
-        self.mid4_array[-1] = bar_mid4
-
-        self.mid5_array[:-1] = self.mid5_array[1:]
-        self.mid5_array[-1] = bar_mid5
+        self.open_array = self.append_array('open_array', bar.open_price)
+        self.high_array = self.append_array('high_array', bar.high_price)
+        self.low_array = self.append_array('low_array', bar.low_price)
+        self.close_array = self.append_array('close_array', bar.close_price)
+        self.mid3_array = self.append_array('mid3_array', bar_mid3)
+        self.mid4_array = self.append_array('mid4_array', bar_mid4)
+        self.mid5_array = self.append_array('mid5_array', bar_mid5)
+        self.array_count = self.get_array_count() + 1
 
         self.bar_len = len(self.line_bar)
 
-        self.__count_pre_high_low()
-        self.__count_ma()
-        self.__count_ema()
-        self.__count_dmi()
-        self.__count_atr()
-        self.__count_vol_ma()
-        self.__count_rsi()
-        self.__count_cmi()
-        self.__count_kdj()
-        self.__count_kdj_tb()
-        self.__count_boll()
-        self.__count_macd()
-        self.__count_cci()
-        self.__count_kf()
-        self.__count_period(bar)
-        self.__count_skd()
-        self.__count_yb()
-        self.__count_sar()
-        self.__count_golden_section()
-        self.__count_area(bar)
-        self.__count_bias()
+        # 兼容从旧的pickle缓存恢复的K线
+        if 'indicator_plan' not in self.__dict__:
+            self.compile_indicator_plan()
+
+        # 只执行已启用的指标计算步骤，并累计耗时
+        timing = self.indicator_timing
+        for name, with_bar in self.indicator_plan:
+            func = getattr(self, '_CtaLineBar__count_' + name)
+            start = perf_counter()
+            if with_bar:
+                func(bar)
+            else:
+                func()
+            stat = timing[name]
+            stat[0] += 1
+            stat[1] += perf_counter() - start
+
         self.export_to_csv(bar)
 
         self.rt_executed = False
@@ -1358,6 +1475,14 @@ class CtaLineBar(object):
         if not (self.para_ma1_len > 0 or self.para_ma2_len > 0 or self.para_ma3_len > 0):  # 不计算
             return
 
+        # 增量更新各均线
+        ma_values = []
+        for i, ma_len in enumerate([self.para_ma1_len, self.para_ma2_len, self.para_ma3_len]):
+            if ma_len > 0:
+                ma_values.append(self.get_indicator(f'ma{i + 1}', IncMA, ma_len).update(self.close_array[-1]))
+            else:
+                ma_values.append(None)
+
         # 1、lineBar满足长度才执行计算
         if self.bar_len < min(7, self.para_ma1_len, self.para_ma2_len, self.para_ma3_len) + 2:
             self.write_log(u'数据未充分,当前Bar数据数量：{0}，计算MA需要：{1}'.
@@ -1366,10 +1491,8 @@ class CtaLineBar(object):
             return
 
         # 计算第一条MA均线
-        if self.para_ma1_len > 0:
-            count_len = min(self.para_ma1_len, self.bar_len)
-
-            barMa1 = ta.MA(self.close_array[-count_len:], count_len)[-1]
+        if self.para_ma1_len > 0 and ma_values[0] is not None:
+            barMa1 = ma_values[0]
             barMa1 = round(float(barMa1), self.round_n)
 
             if len(self.line_ma1) > self.max_hold_bars:
@@ -1385,9 +1508,8 @@ class CtaLineBar(object):
                 self.line_ma1_atan.append(ma1_atan)
 
         # 计算第二条MA均线
-        if self.para_ma2_len > 0:
-            count_len = min(self.para_ma2_len, self.bar_len)
-            barMa2 = ta.MA(self.close_array[-count_len:], count_len)[-1]
+        if self.para_ma2_len > 0 and ma_values[1] is not None:
+            barMa2 = ma_values[1]
             barMa2 = round(float(barMa2), self.round_n)
 
             if len(self.line_ma2) > self.max_hold_bars:
@@ -1403,9 +1525,8 @@ class CtaLineBar(object):
                 self.line_ma2_atan.append(ma2_atan)
 
         # 计算第三条MA均线
-        if self.para_ma3_len > 0:
-            count_len = min(self.para_ma3_len, self.bar_len)
-            barMa3 = ta.MA(self.close_array[-count_len:], count_len)[-1]
+        if self.para_ma3_len > 0 and ma_values[2] is not None:
+            barMa3 = ma_values[2]
             barMa3 = round(float(barMa3), self.round_n)
 
             if len(self.line_ma3) > self.max_hold_bars:
@@ -1503,38 +1624,24 @@ class CtaLineBar(object):
         :param ma_num:第几条均线, 1，对应inputMa1Len,,,,
         :return:
         """
-        if self.para_ma1_len > 0:
-            count_len = min(self.bar_len, self.para_ma1_len)
-            if count_len > 0:
-                close_ma_array = ta.MA(np.append(self.close_array[-count_len:], [self.line_bar[-1].close]), count_len)
-                self._rt_ma1 = round(float(close_ma_array[-1]), self.round_n)
-
-                # 计算斜率
-                if len(close_ma_array) > 2 and close_ma_array[-2] != 0:
-                    self._rt_ma1_atan = round(
-                        math.atan((close_ma_array[-1] / close_ma_array[-2] - 1) * 100) * 180 / math.pi, 3)
-
-        if self.para_ma2_len > 0:
-            count_len = min(self.bar_len, self.para_ma2_len)
-            if count_len > 0:
-                close_ma_array = ta.MA(np.append(self.close_array[-count_len:], [self.line_bar[-1].close]), count_len)
-                self._rt_ma2 = round(float(close_ma_array[-1]), self.round_n)
+        if len(self.line_bar) == 0:
+            return
+        cur_close = self.line_bar[-1].close_price
 
-                # 计算斜率
-                if len(close_ma_array) > 2 and close_ma_array[-2] != 0:
-                    self._rt_ma2_atan = round(
-                        math.atan((close_ma_array[-1] / close_ma_array[-2] - 1) * 100) * 180 / math.pi, 3)
+        for i, ma_len in enumerate([self.para_ma1_len, self.para_ma2_len, self.para_ma3_len]):
+            if ma_len <= 0:
+                continue
+            indicator = self.get_indicator(f'ma{i + 1}', IncMA, ma_len, create=False)
+            if indicator is None or indicator.value is None:
+                continue
 
-        if self.para_ma3_len > 0:
-            count_len = min(self.bar_len, self.para_ma3_len)
-            if count_len > 0:
-                close_ma_array = ta.MA(np.append(self.close_array[-count_len:], [self.line_bar[-1].close]), count_len)
-                self._rt_ma3 = round(float(close_ma_array[-1]), self.round_n)
+            rt_ma = indicator.peek(cur_close)
+            setattr(self, f'_rt_ma{i + 1}', round(float(rt_ma), self.round_n))
 
-                # 计算斜率
-                if len(close_ma_array) > 2 and close_ma_array[-2] != 0:
-                    self._rt_ma3_atan = round(
-                        math.atan((close_ma_array[-1] / close_ma_array[-2] - 1) * 100) * 180 / math.pi, 3)
+            # 计算斜率
+            if indicator.value != 0:
+                setattr(self, f'_rt_ma{i + 1}_atan',
+                        round(math.atan((rt_ma / indicator.value - 1) * 100) * 180 / math.pi, 3))
 
     @property
     def rt_ma1(self):
@@ -1585,6 +1692,14 @@ class CtaLineBar(object):
         if not (self.para_ema1_len > 0 or self.para_ema2_len > 0 or self.para_ema3_len > 0):  # 不计算
             return
 
+        # 增量更新各EMA(与talib对全部数据计算的结果一致)
+        ema_values = []
+        for i, ema_len in enumerate([self.para_ema1_len, self.para_ema2_len, self.para_ema3_len]):
+            if ema_len > 0:
+                ema_values.append(self.get_indicator(f'ema{i + 1}', IncEMA, ema_len).update(self.close_array[-1]))
+            else:
+                ema_values.append(None)
+
         ema1_data_len = min(self.para_ema1_len * 4, self.para_ema1_len + 40) if self.para_ema1_len > 0 else 0
         ema2_data_len = min(self.para_ema2_len * 4, self.para_ema2_len + 40) if self.para_ema2_len > 0 else 0
         ema3_data_len = min(self.para_ema3_len * 4, self.para_ema3_len + 40) if self.para_ema3_len > 0 else 0
@@ -1596,38 +1711,24 @@ class CtaLineBar(object):
             return
 
         # 计算第一条EMA均线
-        if self.para_ema1_len > 0:
-            count_len = min(self.para_ema1_len, self.bar_len)
-
-            # 3、获取前InputN周期(不包含当前周期）的K线
-            barEma1 = ta.EMA(self.close_array[-ema1_data_len:], count_len)[-1]
-            barEma1 = round(float(barEma1), self.round_n)
+        if self.para_ema1_len > 0 and ema_values[0] is not None:
+            barEma1 = round(float(ema_values[0]), self.round_n)
 
             if len(self.line_ema1) > self.max_hold_bars:
                 del self.line_ema1[0]
             self.line_ema1.append(barEma1)
 
         # 计算第二条EMA均线
-        if self.para_ema2_len > 0:
-            count_len = min(self.bar_len, self.para_ema2_len)
-
-            # 3、获取前InputN周期(不包含当前周期）的自适应均线
-
-            barEma2 = ta.EMA(self.close_array[-ema2_data_len:], count_len)[-1]
-
-            barEma2 = round(float(barEma2), self.round_n)
+        if self.para_ema2_len > 0 and ema_values[1] is not None:
+            barEma2 = round(float(ema_values[1]), self.round_n)
 
             if len(self.line_ema2) > self.max_hold_bars:
                 del self.line_ema2[0]
             self.line_ema2.append(barEma2)
 
         # 计算第三条EMA均线
-        if self.para_ema3_len > 0:
-            count_len = min(self.bar_len, self.para_ema3_len)
-
-            # 3、获取前InputN周期(不包含当前周期）的自适应均线
-            barEma3 = ta.EMA(self.close_array[-ema3_data_len:], count_len)[-1]
-            barEma3 = round(float(barEma3), self.round_n)
+        if self.para_ema3_len > 0 and ema_values[2] is not None:
+            barEma3 = round(float(ema_values[2]), self.round_n)
 
             if len(self.line_ema3) > self.max_hold_bars:
                 del self.line_ema3[0]
@@ -1648,31 +1749,14 @@ class CtaLineBar(object):
         if self.bar_len < max_data_len:
             return
 
-        # 计算第一条EMA均线
-        if self.para_ema1_len > 0:
-            count_len = min(self.para_ema1_len, self.bar_len)
-
-            # 3、获取前InputN周期(不包含当前周期）的K线
-            barEma1 = ta.EMA(np.append(self.close_array[-ema1_data_len:], [self.cur_price]), count_len)[-1]
-            self._rt_ema1 = round(float(barEma1), self.round_n)
-
-        # 计算第二条EMA均线
-        if self.para_ema2_len > 0:
-            count_len = min(self.bar_len, self.para_ema2_len)
-
-            # 3、获取前InputN周期(不包含当前周期）的自适应均线
-
-            barEma2 = ta.EMA(np.append(self.close_array[-ema2_data_len:], [self.cur_price]), count_len)[-1]
-
-            self._rt_ema2 = round(float(barEma2), self.round_n)
-
-        # 计算第三条EMA均线
-        if self.para_ema3_len > 0:
-            count_len = min(self.bar_len, self.para_ema3_len)
+        for i, ema_len in enumerate([self.para_ema1_len, self.para_ema2_len, self.para_ema3_len]):
+            if ema_len <= 0:
+                continue
+            indicator = self.get_indicator(f'ema{i + 1}', IncEMA, ema_len, create=False)
+            if indicator is None or indicator.value is None:
+                continue
 
-            # 3、获取前InputN周期(不包含当前周期）的自适应均线
-            barEma3 = ta.EMA(np.append(self.close_array[-ema3_data_len:], [self.cur_price]), count_len)[-1]
-            self._rt_ema3 = round(float(barEma3), self.round_n)
+            setattr(self, f'_rt_ema{i + 1}', round(float(indicator.peek(self.cur_price)), self.round_n))
 
     @property
     def rt_ema1(self):
@@ -1701,66 +1785,25 @@ class CtaLineBar(object):
         if self.para_dmi_len <= 0:  # 不计算
             return
 
+        # 增量更新最近周期的TR，PDM，MDM之和，及dx的EMA
+        dmi = self.get_indicator('dmi', IncDMI, self.para_dmi_len, inputs=('high_array', 'low_array', 'close_array'))
+        result = dmi.update(self.high_array[-1], self.low_array[-1], self.close_array[-1])
+
         # 1、lineMx满足长度才执行计算
-        if len(self.line_bar) < self.para_dmi_len + 1:
+        if result is None:
             self.write_log(u'数据未充分,当前Bar数据数量：{0}，计算DMI需要：{1}'.format(len(self.line_bar), self.para_dmi_len + 1))
             return
 
-        # 2、根据当前High，Low，(不包含当前周期）重新计算TR1，PDM，MDM和ATR
-        barTr1 = 0  # 获取InputP周期内的价差最大值之和
-        barPdm = 0  # InputP周期内的做多价差之和
-        barMdm = 0  # InputP周期内的做空价差之和
-
-        for i in range(self.bar_len - 1, self.bar_len - 1 - self.para_dmi_len, -1):  # 周期 inputDmiLen
-            # 3.1、计算TR1
-
-            # 当前周期最高与最低的价差
-            high_low_spread = self.line_bar[i].high - self.line_bar[i].low
-            # 当前周期最高与昨收价的价差
-            high_preclose_spread = abs(self.line_bar[i].high - self.line_bar[i - 1].close)
-            # 当前周期最低与昨收价的价差
-            low_preclose_spread = abs(self.line_bar[i].low - self.line_bar[i - 1].close)
-
-            # 最大价差
-            max_spread = max(high_low_spread, high_preclose_spread, low_preclose_spread)
-            barTr1 = barTr1 + float(max_spread)
-
-            # 今高与昨高的价差
-            high_prehigh_spread = self.line_bar[i].high - self.line_bar[i - 1].high
-            # 昨低与今低的价差
-            low_prelow_spread = self.line_bar[i - 1].low - self.line_bar[i].low
-
-            # 3.2、计算周期内的做多价差之和
-            if high_prehigh_spread > 0 and high_prehigh_spread > low_prelow_spread:
-                barPdm = barPdm + high_prehigh_spread
-
-            # 3.3、计算周期内的做空价差之和
-            if low_prelow_spread > 0 and low_prelow_spread > high_prehigh_spread:
-                barMdm = barMdm + low_prelow_spread
-
         # 6、计算上升动向指标，即做多的比率
-        if barTr1 == 0:
-            self.cur_pdi = 0
-        else:
-            self.cur_pdi = barPdm * 100 / barTr1
+        # 7、计算下降动向指标，即做空的比率
+        # 8、计算平均趋向指标 Adx，Adxr
+        self.cur_pdi, self.cur_mdi, dx, adx = result
 
         if len(self.line_pdi) > self.max_hold_bars:
             del self.line_pdi[0]
 
         self.line_pdi.append(self.cur_pdi)
 
-        # 7、计算下降动向指标，即做空的比率
-        if barTr1 == 0:
-            self.cur_mdi = 0
-        else:
-            self.cur_mdi = barMdm * 100 / barTr1
-
-        # 8、计算平均趋向指标 Adx，Adxr
-        if self.cur_mdi + self.cur_pdi == 0:
-            dx = 0
-        else:
-            dx = 100 * abs(self.cur_mdi - self.cur_pdi) / (self.cur_mdi + self.cur_pdi)
-
         if len(self.line_mdi) > self.max_hold_bars:
             del self.line_mdi[0]
 
@@ -1771,11 +1814,8 @@ class CtaLineBar(object):
 
         self.line_dx.append(dx)
 
-        # 平均趋向指标，MA计算
-        if len(self.line_dx) < self.para_dmi_len + 1:
-            self.cur_adx = dx
-        else:
-            self.cur_adx = ta.EMA(np.array(self.line_dx, dtype=float), self.para_dmi_len)[-1]
+        # 平均趋向指标，数据不足时取dx
+        self.cur_adx = adx if adx is not None else dx
 
         # 保存Adx值
         if len(self.line_adx) > self.max_hold_bars:
@@ -1836,6 +1876,16 @@ class CtaLineBar(object):
         if maxAtrLen <= 0:  # 不计算
             return
 
+        # 增量更新ATR(Wilder平滑)，与talib的ATR一致
+        atr_values = []
+        for i, atr_len in enumerate([self.para_atr1_len, self.para_atr2_len, self.para_atr3_len]):
+            if atr_len > 0:
+                atr = self.get_indicator(f'atr{i + 1}', IncATR, atr_len,
+                                         inputs=('high_array', 'low_array', 'close_array'))
+                atr_values.append(atr.update(self.high_array[-1], self.low_array[-1], self.close_array[-1]))
+            else:
+                atr_values.append(None)
+
         data_need_len = min(7, maxAtrLen)
 
         if self.bar_len < data_need_len:
@@ -1844,29 +1894,20 @@ class CtaLineBar(object):
             return
 
         # 计算 ATR
-        if self.para_atr1_len > 0:
-            count_len = min(self.bar_len, self.para_atr1_len)
-            self.cur_atr1 = ta.ATR(self.high_array[-count_len:], self.low_array[-count_len:],
-                                   self.close_array[-count_len:], count_len)
-            self.cur_atr1 = round(self.cur_atr1, self.round_n)
+        if atr_values[0] is not None:
+            self.cur_atr1 = round(atr_values[0], self.round_n)
             if len(self.line_atr1) > self.max_hold_bars:
                 del self.line_atr1[0]
             self.line_atr1.append(self.cur_atr1)
 
-        if self.para_atr2_len > 0:
-            count_len = min(self.bar_len, self.para_atr2_len)
-            self.cur_atr2 = ta.ATR(self.high_array[-count_len:], self.low_array[-count_len:],
-                                   self.close_array[-count_len:], count_len)
-            self.cur_atr2 = round(self.cur_atr2, self.round_n)
+        if atr_values[1] is not None:
+            self.cur_atr2 = round(atr_values[1], self.round_n)
             if len(self.line_atr2) > self.max_hold_bars:
                 del self.line_atr2[0]
             self.line_atr2.append(self.cur_atr2)
 
-        if self.para_atr3_len > 0:
-            count_len = min(self.bar_len, self.para_atr3_len)
-            self.cur_atr3 = ta.ATR(self.high_array[-count_len:], self.low_array[-count_len:],
-                                   self.close_array[-count_len:], count_len)
-            self.cur_atr3 = round(self.cur_atr3, self.round_n)
+        if atr_values[2] is not None:
+            self.cur_atr3 = round(atr_values[2], self.round_n)
 
             if len(self.line_atr3) > self.max_hold_bars:
                 del self.line_atr3[0]
@@ -1895,6 +1936,14 @@ class CtaLineBar(object):
         if self.para_rsi1_len <= 0 and self.para_rsi2_len <= 0:
             return
 
+        # 增量更新RSI(Wilder平滑)，与talib的RSI一致
+        rsi1 = None
+        if self.para_rsi1_len > 0:
+            rsi1 = self.get_indicator('rsi1', IncRSI, self.para_rsi1_len).update(self.close_array[-1])
+        rsi2 = None
+        if self.para_rsi2_len > 0:
+            rsi2 = self.get_indicator('rsi2', IncRSI, self.para_rsi2_len).update(self.close_array[-1])
+
         # 1、lineBar满足长度才执行计算
         if len(self.line_bar) < self.para_rsi1_len + 2:
             self.write_log(u'数据未充分,当前Bar数据数量：{0}，计算RSI需要：{1}'.
@@ -1904,8 +1953,9 @@ class CtaLineBar(object):
         # 计算第1根RSI曲线
         # 3、inputRsi1Len(包含当前周期）的相对强弱
 
-        barRsi = ta.RSI(self.close_array[-2 * self.para_rsi1_len:], self.para_rsi1_len)[-1]
-        barRsi = round(float(barRsi), self.round_n)
+        if rsi1 is None:
+            return
+        barRsi = round(float(rsi1), self.round_n)
 
         if len(self.line_rsi1) > self.max_hold_bars:
             del self.line_rsi1[0]
@@ -1940,11 +1990,10 @@ class CtaLineBar(object):
 
         # 计算第二根RSI曲线
         if self.para_rsi2_len > 0:
-            if self.bar_len < self.para_rsi2_len + 2:
+            if self.bar_len < self.para_rsi2_len + 2 or rsi2 is None:
                 return
 
-            barRsi = ta.RSI(self.close_array[-2 * self.para_rsi2_len:], self.para_rsi2_len)[-1]
-            barRsi = round(float(barRsi), self.round_n)
+            barRsi = round(float(rsi2), self.round_n)
 
             if len(self.line_rsi2) > self.max_hold_bars:
                 del self.line_rsi2[0]
@@ -1994,17 +2043,26 @@ class CtaLineBar(object):
                 or self.para_boll2_tb_len > 0):  # 不计算
             return
 
+        # 增量更新滑动窗口的均值、标准差
+        close = self.close_array[-1]
+        if self.para_boll_len > 0:
+            boll = self.get_indicator('boll', IncBoll, self.para_boll_len, self.para_boll_std_rate)
+            boll.update(close)
+        if self.para_boll2_len > 0:
+            boll2 = self.get_indicator('boll2', IncBoll, self.para_boll2_len, self.para_boll2_std_sate)
+            boll2.update(close)
+        if self.para_boll_tb_len > 0:
+            boll_tb = self.get_indicator('boll_tb', IncBoll, 2 * self.para_boll_tb_len, self.para_boll_std_rate, 1)
+            boll_tb.update(close)
+        if self.para_boll2_tb_len > 0:
+            boll2_tb = self.get_indicator('boll2_tb', IncBoll, 2 * self.para_boll2_tb_len, self.para_boll2_std_sate, 1)
+            boll2_tb.update(close)
+
         if self.para_boll_len > 0:
             if self.bar_len < min(7, self.para_boll_len):
                 self.write_log(u'数据未充分,当前Bar数据数量：{0}，计算Boll需要：{1}'.
                                format(len(self.line_bar), min(14, self.para_boll_len) + 1))
             else:
-                bollLen = min(self.bar_len, self.para_boll_len)
-
-                # 不包含当前最新的Bar
-                upper_list, middle_list, lower_list = ta.BBANDS(self.close_array,
-                                                                timeperiod=bollLen, nbdevup=self.para_boll_std_rate,
-                                                                nbdevdn=self.para_boll_std_rate, matype=0)
                 if len(self.line_boll_upper) > self.max_hold_bars:
                     del self.line_boll_upper[0]
                 if len(self.line_boll_middle) > self.max_hold_bars:
@@ -2015,18 +2073,17 @@ class CtaLineBar(object):
                     del self.line_boll_std[0]
 
                 # 1标准差
-                std = (upper_list[-1] - lower_list[-1]) / (self.para_boll_std_rate * 2)
-                self.line_boll_std.append(std)
+                self.line_boll_std.append(boll.std)
 
-                upper = round(upper_list[-1], self.round_n)
+                upper = round(boll.upper, self.round_n)
                 self.line_boll_upper.append(upper)  # 上轨
                 self.cur_upper = upper - upper % self.price_tick  # 上轨取整
 
-                middle = round(middle_list[-1], self.round_n)
+                middle = round(boll.middle, self.round_n)
                 self.line_boll_middle.append(middle)  # 中轨
                 self.cur_middle = middle - middle % self.price_tick  # 中轨取整
 
-                lower = round(lower_list[-1], self.round_n)
+                lower = round(boll.lower, self.round_n)
                 self.line_boll_lower.append(lower)  # 下轨
                 self.cur_lower = lower - lower % self.price_tick  # 下轨取整
 
@@ -2057,12 +2114,6 @@ class CtaLineBar(object):
                 self.write_log(u'数据未充分,当前Bar数据数量：{0}，计算Boll2需要：{1}'.
                                format(len(self.line_bar), min(14, self.para_boll2_len) + 1))
             else:
-                boll2Len = min(self.bar_len, self.para_boll2_len)
-
-                # 不包含当前最新的Bar
-                upper_list, middle_list, lower_list = ta.BBANDS(self.close_array[-2 * self.para_boll2_len],
-                                                                timeperiod=boll2Len, nbdevup=self.para_boll2_std_sate,
-                                                                nbdevdn=self.para_boll2_std_sate, matype=0)
                 if len(self.line_boll2_upper) > self.max_hold_bars:
                     del self.line_boll2_upper[0]
                 if len(self.line_boll2_middle) > self.max_hold_bars:
@@ -2073,18 +2124,17 @@ class CtaLineBar(object):
                     del self.line_boll2_std[0]
 
                 # 1标准差
-                std = (upper_list[-1] - lower_list[-1]) / (self.para_boll2_std_sate * 2)
-                self.line_boll2_std.append(std)
+                self.line_boll2_std.append(boll2.std)
 
-                upper = round(upper_list[-1], self.round_n)
+                upper = round(boll2.upper, self.round_n)
                 self.line_boll2_upper.append(upper)  # 上轨
                 self.cur_upper2 = upper - upper % self.price_tick  # 上轨取整
 
-                middle = round(middle_list[-1], self.round_n)
+                middle = round(boll2.middle, self.round_n)
                 self.line_boll2_middle.append(middle)  # 中轨
                 self.cur_middle2 = middle - middle % self.price_tick  # 中轨取整
 
-                lower = round(lower_list[-1], self.round_n)
+                lower = round(boll2.lower, self.round_n)
                 self.line_boll2_lower.append(lower)  # 下轨
                 self.cur_lower2 = lower - lower % self.price_tick  # 下轨取整
 
@@ -2116,9 +2166,6 @@ class CtaLineBar(object):
                 self.write_log(u'数据未充分,当前Bar数据数量：{0}，计算Boll需要：{1}'.
                                format(len(self.line_bar), min(14, self.para_boll_tb_len) + 1))
             else:
-                bollLen = min(self.bar_len, self.para_boll_tb_len)
-
-                # 不包含当前最新的Bar
 
                 if len(self.line_boll_upper) > self.max_hold_bars:
                     del self.line_boll_upper[0]
@@ -2130,18 +2177,17 @@ class CtaLineBar(object):
                     del self.line_boll_std[0]
 
                 # 1标准差
-                std = np.std(self.close_array[-2 * bollLen:], ddof=1)
-                self.line_boll_std.append(std)
+                self.line_boll_std.append(boll_tb.std)
 
-                middle = np.mean(self.close_array[-2 * bollLen:])
+                middle = boll_tb.middle
                 self.line_boll_middle.append(middle)  # 中轨
                 self.cur_middle = middle - middle % self.price_tick  # 中轨取整
 
-                upper = middle + self.para_boll_std_rate * std
+                upper = boll_tb.upper
                 self.line_boll_upper.append(upper)  # 上轨
                 self.cur_upper = upper - upper % self.price_tick  # 上轨取整
 
-                lower = middle - self.para_boll_std_rate * std
+                lower = boll_tb.lower
                 self.line_boll_lower.append(lower)  # 下轨
                 self.cur_lower = lower - lower % self.price_tick  # 下轨取整
 
@@ -2172,7 +2218,6 @@ class CtaLineBar(object):
                 self.write_log(u'数据未充分,当前Bar数据数量：{0}，计算Boll2需要：{1}'.
                                format(len(self.line_bar), min(14, self.para_boll2_tb_len) + 1))
             else:
-                boll2Len = min(self.bar_len, self.para_boll2_tb_len)
 
                 if len(self.line_boll2_upper) > self.max_hold_bars:
                     del self.line_boll2_upper[0]
@@ -2184,18 +2229,17 @@ class CtaLineBar(object):
                     del self.line_boll2_std[0]
 
                 # 1标准差
-                std = np.std(self.close_array[-2 * boll2Len:], ddof=1)
-                self.line_boll2_std.append(std)
+                self.line_boll2_std.append(boll2_tb.std)
 
-                middle = np.mean(self.close_array[-2 * boll2Len:])
+                middle = boll2_tb.middle
                 self.line_boll2_middle.append(middle)  # 中轨
                 self.cur_middle2 = middle - middle % self.price_tick  # 中轨取整
 
-                upper = middle + self.para_boll2_std_sate * std
+                upper = boll2_tb.upper
                 self.line_boll2_upper.append(upper)  # 上轨
                 self.cur_upper2 = upper - upper % self.price_tick  # 上轨取整
 
-                lower = middle - self.para_boll2_std_sate * std
+                lower = boll2_tb.lower
                 self.line_boll2_lower.append(lower)  # 下轨
                 self.cur_lower2 = lower - lower % self.price_tick  # 下轨取整
 
@@ -2234,27 +2278,18 @@ class CtaLineBar(object):
             if self.bar_len < min(14, boll_01_len) + 1:
                 return
 
-            bollLen = min(boll_01_len, self.bar_len)
-
             if self.para_boll_tb_len == 0:
-                upper_list, middle_list, lower_list = ta.BBANDS(self.close_array[-bollLen:],
-                                                                timeperiod=bollLen, nbdevup=self.para_boll_std_rate,
-                                                                nbdevdn=self.para_boll_std_rate, matype=0)
-
-                # 1标准差
-                std = (upper_list[-1] - lower_list[-1]) / (self.para_boll_std_rate * 2)
-                self._rt_upper = round(upper_list[-1], self.round_n)
-                self._rt_middle = round(middle_list[-1], self.round_n)
-                self._rt_lower = round(lower_list[-1], self.round_n)
+                boll = self.get_indicator('boll', IncBoll, self.para_boll_len, self.para_boll_std_rate, create=False)
             else:
-                # 1标准差
-                std = np.std(np.append(self.close_array[-boll_01_len:], [self.line_bar[-1].close]), ddof=1)
-                middle = np.mean(np.append(self.close_array[-boll_01_len:], [self.line_bar[-1].close]))
-                self._rt_middle = round(middle, self.round_n)
-                upper = middle + self.para_boll_std_rate * std
-                self._rt_upper = round(upper, self.round_n)
-                lower = middle - self.para_boll_std_rate * std
-                self._rt_lower = round(lower, self.round_n)
+                boll = self.get_indicator('boll_tb', IncBoll, 2 * self.para_boll_tb_len, self.para_boll_std_rate, 1,
+                                          create=False)
+            if boll is None:
+                return
+
+            upper, middle, lower, std = boll.peek(self.line_bar[-1].close_price)
+            self._rt_upper = round(upper, self.round_n)
+            self._rt_middle = round(middle, self.round_n)
+            self._rt_lower = round(lower, self.round_n)
 
             # 计算斜率
             if len(self.line_boll_upper) > 2 and self.line_boll_upper[-1] != 0:
@@ -2273,27 +2308,19 @@ class CtaLineBar(object):
             if self.bar_len < min(14, boll_02_len) + 1:
                 return
 
-            bollLen = min(boll_02_len, self.bar_len)
-
             if self.para_boll2_tb_len == 0:
-                upper_list, middle_list, lower_list = ta.BBANDS(self.close_array[-bollLen:],
-                                                                timeperiod=bollLen, nbdevup=self.para_boll_std_rate,
-                                                                nbdevdn=self.para_boll_std_rate, matype=0)
-
-                # 1标准差
-                std = (upper_list[-1] - lower_list[-1]) / (self.para_boll2_std_sate * 2)
-                self._rt_upper2 = round(upper_list[-1], self.round_n)
-                self._rt_middle2 = round(middle_list[-1], self.round_n)
-                self._rt_lower2 = round(lower_list[-1], self.round_n)
+                boll2 = self.get_indicator('boll2', IncBoll, self.para_boll2_len, self.para_boll2_std_sate,
+                                           create=False)
             else:
-                # 1标准差
-                std = np.std(np.append(self.close_array[-boll_02_len:], [self.line_bar[-1].close]), ddof=1)
-                middle = np.mean(np.append(self.close_array[-boll_02_len:], [self.line_bar[-1].close]))
-                self._rt_middle2 = round(middle, self.round_n)
-                upper = middle + self.para_boll_std_rate * std
-                self._rt_upper2 = round(upper, self.round_n)
-                lower = middle - self.para_boll_std_rate * std
-                self._rt_lower2 = round(lower, self.round_n)
+                boll2 = self.get_indicator('boll2_tb', IncBoll, 2 * self.para_boll2_tb_len, self.para_boll2_std_sate, 1,
+                                           create=False)
+            if boll2 is None:
+                return
+
+            upper, middle, lower, std = boll2.peek(self.line_bar[-1].close_price)
+            self._rt_upper2 = round(upper, self.round_n)
+            self._rt_middle2 = round(middle, self.round_n)
+            self._rt_lower2 = round(lower, self.round_n)
 
             # 计算斜率
             if len(self.line_boll2_upper) > 2 and self.line_boll2_upper[-1] != 0:
@@ -2413,6 +2440,12 @@ class CtaLineBar(object):
         if self.para_kdj_len <= 0:
             return
 
+        # 增量更新周期内最高价、最低价
+        hhv = self.get_indicator('kdj_hhv', RollingMax, self.para_kdj_len, inputs=('high_array',)) \
+            .update(self.high_array[-1])
+        llv = self.get_indicator('kdj_llv', RollingMin, self.para_kdj_len, inputs=('low_array',)) \
+            .update(self.low_array[-1])
+
         if len(self.line_bar) < self.para_kdj_len + 1:
             self.write_log(u'数据未充分,当前Bar数据数量：{0}，计算KDJ需要：{1}'.format(len(self.line_bar), self.para_kdj_len + 1))
             return
@@ -2422,11 +2455,6 @@ class CtaLineBar(object):
         if self.para_kdj_smooth_len == 0:
             self.para_kdj_smooth_len = 3
 
-        inputKdjLen = min(self.para_kdj_len, self.bar_len)
-
-        hhv = max(self.high_array[-inputKdjLen:])
-        llv = min(self.low_array[-inputKdjLen:])
-
         if len(self.line_k) > 0:
             lastK = self.line_k[-1]
         else:
@@ -2656,30 +2684,26 @@ class CtaLineBar(object):
 
         # maxLen = maxLen * 3             # 注：数据长度需要足够，才能准确。测试过，3倍长度才可以与国内的文华等软件一致
 
-        if self.bar_len < maxLen:
+        # 增量更新快慢EMA和DEA，与talib对全部数据计算MACD的结果一致
+        macd = self.get_indicator('macd', IncMACD, self.para_macd_fast_len, self.para_macd_slow_len,
+                                  self.para_macd_signal_len)
+        dif, dea, bar = macd.update(self.close_array[-1])
+
+        if self.bar_len < maxLen or bar is None:
             self.write_log(u'数据未充分,当前Bar数据数量：{0}，计算MACD需要：{1}'.format(len(self.line_bar), maxLen))
             return
 
-        dif_list, dea_list, macd_list = ta.MACD(self.close_array[-2 * maxLen:], fastperiod=self.para_macd_fast_len,
-                                                slowperiod=self.para_macd_slow_len,
-                                                signalperiod=self.para_macd_signal_len)
-
-        # dif, dea, macd = ta.MACDEXT(np.array(listClose, dtype=float),
-        #                            fastperiod=self.inputMacdFastPeriodLen, fastmatype=1,
-        #                            slowperiod=self.inputMacdSlowPeriodLen, slowmatype=1,
-        #                            signalperiod=self.inputMacdSignalPeriodLen, signalmatype=1)
-
         if len(self.line_dif) > self.max_hold_bars:
             del self.line_dif[0]
-        self.line_dif.append(round(dif_list[-1], 2))
+        self.line_dif.append(round(dif, 2))
 
         if len(self.line_dea) > self.max_hold_bars:
             del self.line_dea[0]
-        self.line_dea.append(round(dea_list[-1], 2))
+        self.line_dea.append(round(dea, 2))
 
         if len(self.line_macd) > self.max_hold_bars:
             del self.line_macd[0]
-        self.line_macd.append(round(macd_list[-1] * 2, 2))  # 国内一般是2倍
+        self.line_macd.append(round(bar * 2, 2))  # 国内一般是2倍
 
         # 更新 “段”（金叉-》死叉；或 死叉-》金叉)
         segment = self.macd_segment_list[-1] if len(self.macd_segment_list) > 0 else {}
@@ -2780,16 +2804,19 @@ class CtaLineBar(object):
         if self.bar_len < maxLen:
             return
 
-        dif, dea, macd = ta.MACD(np.append(self.close_array[-maxLen:], [self.line_bar[-1].close]),
-                                 fastperiod=self.para_macd_fast_len,
-                                 slowperiod=self.para_macd_slow_len, signalperiod=self.para_macd_signal_len)
+        indicator = self.get_indicator('macd', IncMACD, self.para_macd_fast_len, self.para_macd_slow_len,
+                                       self.para_macd_signal_len, create=False)
+        if indicator is None:
+            return
+
+        dif, dea, macd = indicator.peek(self.line_bar[-1].close_price)
 
-        self._rt_dif = round(dif[-1], 2) if len(dif) > 0 else None
-        self._rt_dea = round(dea[-1], 2) if len(dea) > 0 else None
-        self._rt_macd = round(macd[-1] * 2, 2) if len(macd) > 0 else None
+        self._rt_dif = round(dif, 2) if dif is not None else None
+        self._rt_dea = round(dea, 2) if dea is not None else None
+        self._rt_macd = round(macd * 2, 2) if macd is not None else None
 
         # 判断是否实时金叉/死叉
-        if self._rt_macd is not None:
+        if self._rt_macd is not None and len(self.line_macd) > 0:
             # 实时金叉
             if self._rt_macd >= 0 and self.line_macd[-1] < 0:
                 self.rt_macd_count = 1
@@ -13,6 +13,7 @@ import gc
 import importlib
 import csv
 import copy
+import hashlib
 import pandas as pd
 import traceback
 import numpy as np
@@ -53,12 +54,12 @@ from vnpy.trader.constant import (
 from vnpy.trader.converter import PositionHolding
 
 from vnpy.trader.utility import (
-    get_trading_date,
     get_underlying_symbol,
     round_to,
     extract_vt_symbol,
     format_number,
-    import_module_by_str
+    import_module_by_str,
+    get_folder_path
 )
 
 from vnpy.trader.util_logger import setup_logger
@@ -109,8 +110,11 @@ class PortfolioTestingEngine(object):
         self.symbol_exchange_dict = {}  # 登记symbol: exchange的对应关系
 
         self.bar_csv_file = {}
+        self.use_bar_cache = True  # csv文件转换为二进制列存储缓存，再次加载时直接内存映射
+        self.bar_cache_path = None  # 二进制缓存目录，缺省为.vntrader/bar_cache
         self.bar_df_dict = {}  # 历史数据的df，回测用
-        self.bar_df = None  # 历史数据的df，时间+symbol作为组合索引
+        self.bar_arrays = []  # 历史数据的列数组，每个合约一个dict，回测用
+        self.bar_order = None  # 合并后的回放顺序，(合约序号数组, 行号数组)
 
         self.data_start_date = None  # 回测数据开始日期，datetime对象 （用于截取数据）
         self.data_end_date = None  # 回测数据结束日期，datetime对象 （用于截取数据）
@@ -391,32 +395,17 @@ class PortfolioTestingEngine(object):
             return False
 
         try:
-            data_types = {
-                "datetime": str,
-                "open": float,
-                "high": float,
-                "low": float,
-                "close": float,
-                "open_interest": float,
-                "volume": float,
-                "instrument_id": str,
-                "symbol": str,
-                "total_turnover": float,
-                "limit_down": float,
-                "limit_up": float,
-                "trading_day": str,
-                "date": str,
-                "time": str
-            }
-            # 加载csv文件 =》 dateframe
-            symbol_df = pd.read_csv(bar_file, dtype=data_types)
-            # 转换时间，str =》 datetime
-            symbol_df["datetime"] = pd.to_datetime(symbol_df["datetime"], format="%Y-%m-%d %H:%M:%S")
-            # 设置时间为索引
-            symbol_df = symbol_df.set_index("datetime")
-
-            # 裁剪数据
-            symbol_df = symbol_df.loc[self.test_start_date:self.test_end_date]
+            symbol_df = None
+            if self.use_bar_cache:
+                symbol_df = self.load_bar_cache(bar_file)
+
+            if symbol_df is None:
+                symbol_df = self.read_bar_csv(bar_file)
+                if self.use_bar_cache:
+                    self.save_bar_cache(bar_file, symbol_df)
+
+                # 裁剪数据
+                symbol_df = symbol_df.loc[self.test_start_date:self.test_end_date]
 
             self.bar_df_dict.update({vt_symbol: symbol_df})
         except Exception as ex:
@@ -426,15 +415,251 @@ class PortfolioTestingEngine(object):
 
         return True
 
-    def comine_df(self):
+    def read_bar_csv(self, bar_file):
+        """
+        读取csv bar文件
+        :param bar_file:
+        :return: 以datetime为索引的df
+        """
+        data_types = {
+            "datetime": str,
+            "open": float,
+            "high": float,
+            "low": float,
+            "close": float,
+            "open_interest": float,
+            "volume": float,
+            "instrument_id": str,
+            "symbol": str,
+            "total_turnover": float,
+            "limit_down": float,
+            "limit_up": float,
+            "trading_day": str,
+            "date": str,
+            "time": str
+        }
+        # 加载csv文件 =》 dateframe
+        symbol_df = pd.read_csv(bar_file, dtype=data_types)
+        # 转换时间，str =》 datetime
+        symbol_df["datetime"] = pd.to_datetime(symbol_df["datetime"], format="%Y-%m-%d %H:%M:%S")
+        # 设置时间为索引
+        symbol_df = symbol_df.set_index("datetime")
+        return symbol_df
+
+    def get_bar_cache_file(self, bar_file):
+        """
+        获取csv文件对应的二进制缓存文件
+        缓存文件名包含csv文件路径、修改时间和大小的哈希，csv文件变更后自动失效
+        :param bar_file:
+        :return:
+        """
+        bar_file = os.path.abspath(bar_file)
+        stat = os.stat(bar_file)
+        key = '{}|{}|{}'.format(bar_file, stat.st_mtime_ns, stat.st_size)
+        cache_name = '{}_{}.npy'.format(os.path.basename(bar_file), hashlib.md5(key.encode('utf-8')).hexdigest())
+
+        cache_path = self.bar_cache_path if self.bar_cache_path else str(get_folder_path('bar_cache'))
+        if not os.path.exists(cache_path):
+            os.makedirs(cache_path)
+        return os.path.join(cache_path, cache_name)
+
+    def save_bar_cache(self, bar_file, symbol_df):
+        """
+        把csv的df保存为二进制列存储(numpy结构数组)
+        时间 =》int64纳秒，数值列 =》float64，其他列 =》定长字符串
+        :param bar_file:
+        :param symbol_df: read_bar_csv返回的df
+        :return:
+        """
+        try:
+            cache_file = self.get_bar_cache_file(bar_file)
+            symbol_df = symbol_df.sort_index(kind='mergesort')
+            columns = {'datetime': symbol_df.index.values.astype('datetime64[ns]').astype(np.int64)}
+            for name in symbol_df.columns:
+                values = symbol_df[name]
+                if pd.api.types.is_numeric_dtype(values):
+                    columns[name] = values.values.astype(np.float64)
+                else:
+                    columns[name] = np.asarray(values.fillna('').astype(str), dtype=object).astype(np.str_)
+            records = np.empty(len(symbol_df), dtype=[(name, values.dtype) for name, values in columns.items()])
+            for name, values in columns.items():
+                records[name] = values
+
+            # 先写入临时文件，避免并发回测读取到不完整的缓存
+            tmp_file = '{}.{}.tmp'.format(cache_file, os.getpid())
+            with open(tmp_file, 'wb') as f:
+                np.save(f, records)
+            os.replace(tmp_file, cache_file)
+            self.write_log(u'保存{}的二进制缓存:{}'.format(bar_file, cache_file))
+        except Exception as ex:
+            self.write_error(u'保存{}的二进制缓存失败:{}'.format(bar_file, ex))
+
+    def load_bar_cache(self, bar_file):
+        """
+        内存映射加载二进制缓存，按时间列二分查找截取回测区间
+        :param bar_file:
+        :return: 以datetime为索引的df，缓存不存在时返回None
+        """
+        cache_file = self.get_bar_cache_file(bar_file)
+        if not os.path.isfile(cache_file):
+            return None
+
+        try:
+            records = np.load(cache_file, mmap_mode='r')
+        except Exception as ex:
+            self.write_error(u'加载{}的二进制缓存{}失败:{}'.format(bar_file, cache_file, ex))
+            return None
+
+        # 截取数据(与df.loc[test_start_date:test_end_date]一致，包含结束日期当天)
+        timestamps = records['datetime']
+        start = 0
+        end = len(records)
+        if self.test_start_date:
+            start = np.searchsorted(timestamps, pd.Timestamp(self.test_start_date).value, side='left')
+        if self.test_end_date:
+            end = np.searchsorted(timestamps, (pd.Timestamp(self.test_end_date) + timedelta(days=1)).value,
+                                  side='left')
+        records = records[start:end]
+
+        index = pd.DatetimeIndex(np.asarray(records['datetime']).view('datetime64[ns]'), name='datetime')
+        data = {}
+        for name in records.dtype.names:
+            if name == 'datetime':
+                continue
+            values = np.asarray(records[name])
+            if values.dtype.kind == 'U':
+                # 空字符串还原为NaN，与read_csv一致
+                values = values.astype(object)
+                values[values == ''] = np.nan
+            data[name] = values
+        self.write_log(u'从二进制缓存{}加载{}条数据'.format(cache_file, len(index)))
+        return pd.DataFrame(data, index=index)
+
+    def load_bar_arrays(self, vt_symbol, symbol_df):
+        """
+        把合约的df =》列数组，回放时无需逐行访问dataframe
+        :param vt_symbol:
+        :param symbol_df: 以datetime为索引的df
+        :return: dict
+        """
+        symbol, exchange = extract_vt_symbol(vt_symbol)
+        index = pd.DatetimeIndex(symbol_df.index)
+
+        # 交易日：csv提供8位交易日的，直接转换；否则按时间推算(与get_trading_date一致)
+        weekday = index.dayofweek.values
+        shift_days = np.where(weekday == 5, 2, np.where(weekday == 6, 1, 0))
+        shift_days = np.where((weekday < 5) & (index.hour.values >= 20), np.where(weekday == 4, 3, 1), shift_days)
+        trading_days = (index.normalize() + pd.to_timedelta(shift_days, unit='D')).strftime('%Y-%m-%d')
+        trading_days = pd.Series(trading_days, index=symbol_df.index)
+        if 'trading_day' in symbol_df.columns:
+            str_td = symbol_df['trading_day'].astype(str)
+            valid = str_td.str.len() == 8
+            trading_days[valid] = str_td[valid].str[0:4] + '-' + str_td[valid].str[4:6] + '-' + str_td[valid].str[6:8]
+        # 交易日编码，回放时直接按编码取字符串
+        trading_day_codes, trading_day_list = pd.factorize(trading_days)
+
+        arrays = {
+            'symbol': symbol,
+            'exchange': exchange,
+            'is_renko': symbol.startswith('future_renko'),
+            'timestamp': index.values.astype('datetime64[ns]').astype(np.int64),
+            'dt': index.to_pydatetime(),
+            'bar_datetime': (index - timedelta(seconds=self.bar_interval_seconds)).to_pydatetime(),
+            'date': list(index.strftime('%Y-%m-%d')),
+            'time': list(index.strftime('%H:%M:%S')),
+            'trading_day_code': trading_day_codes.tolist(),
+            'trading_day_list': list(trading_day_list),
+            'open': symbol_df['open'].values.astype(float).tolist(),
+            'high': symbol_df['high'].values.astype(float).tolist(),
+            'low': symbol_df['low'].values.astype(float).tolist(),
+            'close': symbol_df['close'].values.astype(float).tolist(),
+            'volume': symbol_df['volume'].values.astype(float).astype(np.int64).tolist()
+        }
+
+        if arrays['is_renko']:
+            for name in ['seconds', 'high_seconds', 'low_seconds', 'height', 'up_band', 'down_band']:
+                values = symbol_df[name].values.astype(float) if name in symbol_df.columns else np.zeros(len(index))
+                arrays[name] = values.tolist()
+            for name in ['low_time', 'high_time']:
+                arrays[name] = symbol_df[name].tolist() if name in symbol_df.columns else [None] * len(index)
+
+        return arrays
+
+    def comine_arrays(self):
         """
-        把bar_df_dict =》bar_df
+        把bar_df_dict =》每个合约的列数组 + 合并后的回放顺序
+        各合约数据已按时间排序，对拼接后的时间戳做稳定排序，即对各段有序数据做多路归并；
+        同一时间的bar，按vt_symbol排序(与按时间+vt_symbol组合索引排序的顺序一致)
         :return:
         """
-        self.output('comine_df')
-        self.bar_df = pd.concat(self.bar_df_dict, axis=0).swaplevel(0, 1).sort_index()
+        self.output('comine_arrays')
+        self.bar_arrays = []
+        symbol_indexes = []
+        row_indexes = []
+        timestamps = []
+        for n, vt_symbol in enumerate(sorted(self.bar_df_dict.keys())):
+            symbol_df = self.bar_df_dict[vt_symbol].sort_index(kind='mergesort')
+            arrays = self.load_bar_arrays(vt_symbol, symbol_df)
+            count = len(arrays['timestamp'])
+            self.bar_arrays.append(arrays)
+            symbol_indexes.append(np.full(count, n, dtype=np.int64))
+            row_indexes.append(np.arange(count, dtype=np.int64))
+            timestamps.append(arrays['timestamp'])
         self.bar_df_dict.clear()
 
+        if len(timestamps) == 0:
+            self.bar_order = (np.array([], dtype=np.int64), np.array([], dtype=np.int64))
+            return
+
+        symbol_indexes = np.concatenate(symbol_indexes)
+        row_indexes = np.concatenate(row_indexes)
+        order = np.lexsort((symbol_indexes, np.concatenate(timestamps)))
+        self.bar_order = (symbol_indexes[order], row_indexes[order])
+
+    def iter_bars(self):
+        """
+        按合并后的顺序，从列数组生成bar
+        :return: (dt, bar)
+        """
+        bar_arrays = self.bar_arrays
+        symbol_indexes, row_indexes = self.bar_order
+        for n, i in zip(symbol_indexes.tolist(), row_indexes.tolist()):
+            arrays = bar_arrays[n]
+            dt = arrays['dt'][i]
+            if arrays['is_renko']:
+                bar = RenkoBarData(
+                    gateway_name='backtesting',
+                    symbol=arrays['symbol'],
+                    exchange=arrays['exchange'],
+                    datetime=dt
+                )
+                bar.seconds = arrays['seconds'][i]
+                bar.high_seconds = arrays['high_seconds'][i]  # 当前Bar的上限秒数
+                bar.low_seconds = arrays['low_seconds'][i]  # 当前bar的下限秒数
+                bar.height = arrays['height'][i]  # 当前Bar的高度限制
+                bar.up_band = arrays['up_band'][i]  # 高位区域的基线
+                bar.down_band = arrays['down_band'][i]  # 低位区域的基线
+                bar.low_time = arrays['low_time'][i]  # 最后一次进入低位区域的时间
+                bar.high_time = arrays['high_time'][i]  # 最后一次进入高位区域的时间
+            else:
+                bar = BarData(
+                    gateway_name='backtesting',
+                    symbol=arrays['symbol'],
+                    exchange=arrays['exchange'],
+                    datetime=arrays['bar_datetime'][i]
+                )
+
+            bar.open_price = arrays['open'][i]
+            bar.close_price = arrays['close'][i]
+            bar.high_price = arrays['high'][i]
+            bar.low_price = arrays['low'][i]
+            bar.volume = arrays['volume'][i]
+            bar.date = arrays['date'][i]
+            bar.time = arrays['time'][i]
+            bar.trading_day = arrays['trading_day_list'][arrays['trading_day_code'][i]]
+
+            yield dt, bar
+
     def prepare_env(self, test_settings):
         self.output('prepare_env')
         if 'name' in test_settings:
@@ -490,6 +715,11 @@ class PortfolioTestingEngine(object):
             self.write_log(u'设置回测结束日期:{}'.format(test_settings.get('end_date')))
             self.set_test_end_date(test_settings.get('end_date'))
 
+        # 设置bar文件的二进制缓存
+        self.use_bar_cache = test_settings.get('use_bar_cache', True)
+        if 'bar_cache_path' in test_settings:
+            self.bar_cache_path = test_settings.get('bar_cache_path')
+
         # 设置bar文件的时间间隔秒数
         if 'bar_interval_seconds' in test_settings:
             self.write_log(u'设置bar文件的时间间隔秒数：{}'.format(test_settings.get('bar_interval_seconds')))
@@ -605,7 +835,7 @@ class PortfolioTestingEngine(object):
                     self.write_error(u'为套利合约提取主动/被动合约出现异常:{}'.format(str(ex)))
 
         # 合并数据
-        self.comine_df()
+        self.comine_arrays()
 
         last_trading_day = None
         bars_dt = None
@@ -614,47 +844,7 @@ class PortfolioTestingEngine(object):
         gc_collect_days = 0
 
         try:
-            for (dt, vt_symbol), bar_data in self.bar_df.iterrows():
-                symbol, exchange = extract_vt_symbol(vt_symbol)
-                if symbol.startswith('future_renko'):
-                    bar_datetime = dt
-                    bar = RenkoBarData(
-                        gateway_name='backtesting',
-                        symbol=symbol,
-                        exchange=exchange,
-                        datetime=bar_datetime
-                    )
-                    bar.seconds = float(bar_data.get('seconds', 0))
-                    bar.high_seconds = float(bar_data.get('high_seconds', 0))  # 当前Bar的上限秒数
-                    bar.low_seconds = float(bar_data.get('low_seconds', 0))  # 当前bar的下限秒数
-                    bar.height = float(bar_data.get('height', 0))  # 当前Bar的高度限制
-                    bar.up_band = float(bar_data.get('up_band', 0))  # 高位区域的基线
-                    bar.down_band = float(bar_data.get('down_band', 0))  # 低位区域的基线
-                    bar.low_time = bar_data.get('low_time', None)  # 最后一次进入低位区域的时间
-                    bar.high_time = bar_data.get('high_time', None)  # 最后一次进入高位区域的时间
-                else:
-                    bar_datetime = dt - timedelta(seconds=self.bar_interval_seconds)
-
-                    bar = BarData(
-                        gateway_name='backtesting',
-                        symbol=symbol,
-                        exchange=exchange,
-                        datetime=bar_datetime
-                    )
-
-                bar.open_price = float(bar_data['open'])
-                bar.close_price = float(bar_data['close'])
-                bar.high_price = float(bar_data['high'])
-                bar.low_price = float(bar_data['low'])
-                bar.volume = int(bar_data['volume'])
-                bar.date = dt.strftime('%Y-%m-%d')
-                bar.time = dt.strftime('%H:%M:%S')
-                str_td = str(bar_data.get('trading_day', ''))
-                if len(str_td) == 8:
-                    bar.trading_day = str_td[0:4] + '-' + str_td[4:6] + '-' + str_td[6:8]
-                else:
-                    bar.trading_day = get_trading_date(dt)
-
+            for dt, bar in self.iter_bars():
                 if last_trading_day != bar.trading_day:
                     self.output(u'回测数据日期:{},资金:{}'.format(bar.trading_day, self.net_capital))
                     if self.strategy_start_date > bar.datetime:
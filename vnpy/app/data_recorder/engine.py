@@ -3,6 +3,7 @@
 from threading import Thread
 from queue import Queue, Empty
 from copy import copy
+from time import perf_counter, sleep
 
 from vnpy.event import Event, EventEngine
 from vnpy.trader.engine import BaseEngine, MainEngine
@@ -41,6 +42,26 @@ class RecorderEngine(BaseEngine):
         self.bar_recordings = {}
         self.bar_generators = {}
 
+        # Group commit: data is buffered per table and saved in one
+        # transaction when flush_size is reached or flush_interval passed.
+        self.flush_size = 1000
+        self.flush_interval = 1.0
+        self.buffers = {"tick": [], "bar": []}
+
+        # Failed group commit is retried with increasing backoff before
+        # the data is dropped.
+        self.retry_count = 1
+        self.retry_interval = 0.5
+
+        self.metrics = {
+            "flush_count": 0,
+            "saved_count": 0,
+            "failed_count": 0,
+            "last_flush_latency": 0,
+            "max_flush_latency": 0,
+            "total_flush_latency": 0
+        }
+
         self.load_setting()
         self.register_event()
         self.start()
@@ -51,35 +72,142 @@ class RecorderEngine(BaseEngine):
         setting = load_json(self.setting_filename)
         self.tick_recordings = setting.get("tick", {})
         self.bar_recordings = setting.get("bar", {})
+        self.flush_size = setting.get("flush_size", self.flush_size)
+        self.flush_interval = setting.get("flush_interval", self.flush_interval)
 
     def save_setting(self):
         """"""
         setting = {
             "tick": self.tick_recordings,
-            "bar": self.bar_recordings
+            "bar": self.bar_recordings,
+            "flush_size": self.flush_size,
+            "flush_interval": self.flush_interval
         }
         save_json(self.setting_filename, setting)
 
     def run(self):
         """"""
+        last_flush = perf_counter()
+
         while self.active:
+            timeout = max(last_flush + self.flush_interval - perf_counter(), 0.01)
             try:
-                task = self.queue.get(timeout=1)
-                task_type, data = task
+                task = self.queue.get(timeout=timeout)
+                self.buffer_task(task)
+
+                # Drain queued tasks without blocking, bounded by count and
+                # flush deadline so that time flush and close are not delayed
+                # under sustained data flow
+                deadline = last_flush + self.flush_interval
+                for _ in range(self.flush_size):
+                    if perf_counter() >= deadline:
+                        break
+
+                    task = self.queue.get_nowait()
+                    self.buffer_task(task)
+            except Empty:
+                pass
 
-                if task_type == "tick":
-                    database_manager.save_tick_data([data])
-                elif task_type == "bar":
-                    database_manager.save_bar_data([data])
+            if perf_counter() - last_flush >= self.flush_interval:
+                self.flush()
+                last_flush = perf_counter()
 
+        # Final flush of everything queued before close and buffers
+        for _ in range(self.queue.qsize()):
+            try:
+                task = self.queue.get_nowait()
+                self.buffer_task(task)
             except Empty:
+                break
+        self.flush()
+
+    def buffer_task(self, task: tuple):
+        """
+        Add data into buffer of its table, flush if buffer is full.
+        """
+        # None is put by close to wake up the writer thread
+        if not task:
+            return
+
+        task_type, data = task
+        buf = self.buffers[task_type]
+        buf.append(data)
+
+        if len(buf) >= self.flush_size:
+            self.flush(task_type)
+
+    def flush(self, task_type: str = ""):
+        """
+        Save buffered data into database, one transaction per table.
+        """
+        task_types = [task_type] if task_type else list(self.buffers.keys())
+
+        for task_type in task_types:
+            buf = self.buffers[task_type]
+            if not buf:
                 continue
+            self.buffers[task_type] = []
+
+            start = perf_counter()
+            if not self.save_buffer(task_type, buf):
+                self.metrics["failed_count"] += len(buf)
+                continue
+
+            latency = perf_counter() - start
+            metrics = self.metrics
+            metrics["flush_count"] += 1
+            metrics["saved_count"] += len(buf)
+            metrics["last_flush_latency"] = latency
+            metrics["max_flush_latency"] = max(metrics["max_flush_latency"], latency)
+            metrics["total_flush_latency"] += latency
+
+    def save_buffer(self, task_type: str, buf: list):
+        """
+        Save one buffer into database, retry with backoff if failed.
+        """
+        for n in range(self.retry_count + 1):
+            try:
+                if task_type == "tick":
+                    database_manager.save_tick_data(buf)
+                elif task_type == "bar":
+                    database_manager.save_bar_data(buf)
+                return True
+            except Exception as ex:
+                if n < self.retry_count:
+                    interval = self.retry_interval * (n + 1)
+                    self.write_log(f"保存{task_type}数据失败，{interval}秒后重试，错误：{ex}")
+                    sleep(interval)
+                else:
+                    self.write_log(f"保存{task_type}数据失败，数量：{len(buf)}，错误：{ex}")
+
+        return False
+
+    def get_metrics(self):
+        """
+        Get backlog and flush latency (in milliseconds) of the writer.
+        """
+        metrics = self.metrics
+        flush_count = metrics["flush_count"]
+
+        return {
+            "queue_size": self.queue.qsize(),
+            "buffered": {k: len(v) for k, v in self.buffers.items()},
+            "flush_count": flush_count,
+            "saved_count": metrics["saved_count"],
+            "failed_count": metrics["failed_count"],
+            "last_flush_ms": metrics["last_flush_latency"] * 1000,
+            "max_flush_ms": metrics["max_flush_latency"] * 1000,
+            "avg_flush_ms": metrics["total_flush_latency"] * 1000 / flush_count if flush_count else 0
+        }
 
     def close(self):
-        """"""
+        """
+        Stop the writer thread, remaining data is flushed before exit.
+        """
         self.active = False
+        self.queue.put(None)
 
-        if self.thread.isAlive():
+        if self.thread.is_alive():
             self.thread.join()
 
     def start(self):
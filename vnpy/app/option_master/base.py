@@ -2,6 +2,8 @@ from datetime import datetime
 from typing import Dict, List, Callable
 from types import ModuleType
 
+import numpy as np
+
 from vnpy.trader.object import ContractData, TickData, TradeData
 from vnpy.trader.constant import Exchange, OptionType, Direction, Offset
 from vnpy.trader.converter import PositionHolding
@@ -13,6 +15,7 @@ APP_NAME = "OptionMaster"
 
 EVENT_OPTION_LOG = "eOptionLog"
 EVENT_OPTION_NEW_PORTFOLIO = "eOptionNewPortfolio"
+EVENT_OPTION_GREEKS = "eOptionGreeks"
 
 
 CHAIN_UNDERLYING_MAP = {
@@ -49,6 +52,10 @@ class InstrumentData:
 
     def update_tick(self, tick: TickData):
         """"""
+        self.update_price(tick)
+
+    def update_price(self, tick: TickData):
+        """Update market price only, without recalculating greeks"""
         self.tick = tick
         self.mid_price = (tick.bid_price_1 + tick.ask_price_1) / 2
 
@@ -246,12 +253,16 @@ class UnderlyingData(InstrumentData):
 
     def update_tick(self, tick: TickData):
         """"""
-        super().update_tick(tick)
+        self.update_price(tick)
 
-        self.theo_delta = self.size * self.mid_price / 100
         for chain in self.chains.values():
             chain.update_underlying_tick()
 
+    def update_price(self, tick: TickData):
+        """"""
+        super().update_price(tick)
+
+        self.theo_delta = self.size * self.mid_price / 100
         self.calculate_pos_greeks()
 
     def update_trade(self, trade: TradeData):
@@ -296,9 +307,18 @@ class ChainData:
         self.underlying_adjustment: float = 0
         self.days_to_expiry: int = 0
 
+        # Batch pricing of whole chain, available if pricing model supports
+        self.calculate_impv_array: Callable = None
+        self.calculate_greeks_array: Callable = None
+
+        # Static option data as arrays, rebuilt after contract change
+        self.option_list: List[OptionData] = []
+        self.static_arrays: Dict[str, np.ndarray] = {}
+
     def add_option(self, option: OptionData):
         """"""
         self.options[option.vt_symbol] = option
+        self.static_arrays = {}
 
         if option.option_type > 0:
             self.calls[option.chain_index] = option
@@ -345,11 +365,99 @@ class ChainData:
 
     def update_underlying_tick(self):
         """"""
-        for option in self.options.values():
-            option.update_underlying_tick(self.underlying_adjustment)
+        if not self.calculate_greeks_array:
+            for option in self.options.values():
+                option.update_underlying_tick(self.underlying_adjustment)
+        else:
+            self.calculate_chain_greeks()
 
         self.calculate_pos_greeks()
 
+    def get_static_arrays(self) -> Dict[str, np.ndarray]:
+        """"""
+        if not self.static_arrays:
+            self.option_list = list(self.options.values())
+            self.static_arrays = {
+                "strike": np.array([o.strike_price for o in self.option_list], dtype=float),
+                "cp": np.array([o.option_type for o in self.option_list], dtype=float),
+                "size": np.array([o.size for o in self.option_list], dtype=float),
+                "t": np.array([o.time_to_expiry for o in self.option_list], dtype=float),
+                "r": np.array([o.interest_rate for o in self.option_list], dtype=float),
+            }
+        return self.static_arrays
+
+    def calculate_chain_greeks(self):
+        """
+        Same result as calling update_underlying_tick of every option,
+        but implied volatility and greeks of the whole chain are
+        calculated with one call of the array functions.
+        """
+        arrays = self.get_static_arrays()
+        options = self.option_list
+
+        for option in options:
+            option.underlying_adjustment = self.underlying_adjustment
+
+        underlying_price = self.underlying.mid_price
+        if underlying_price:
+            f = underlying_price + self.underlying_adjustment
+
+            # Implied volatility of options with tick
+            ix = np.array([i for i, o in enumerate(options) if o.tick], dtype=int)
+            if len(ix):
+                ask_prices = np.array([options[i].tick.ask_price_1 for i in ix], dtype=float)
+                bid_prices = np.array([options[i].tick.bid_price_1 for i in ix], dtype=float)
+
+                # Ask and bid prices solved in one batch
+                impv = self.calculate_impv_array(
+                    np.concatenate([ask_prices, bid_prices]),
+                    f,
+                    np.tile(arrays["strike"][ix], 2),
+                    np.tile(arrays["r"][ix], 2),
+                    np.tile(arrays["t"][ix], 2),
+                    np.tile(arrays["cp"][ix], 2)
+                ).tolist()
+
+                for i, ask, bid in zip(ix.tolist(), impv[:len(ix)], impv[len(ix):]):
+                    option = options[i]
+                    option.ask_impv = ask
+                    option.bid_impv = bid
+                    option.mid_impv = (ask + bid) / 2
+                    option.pricing_impv = option.mid_impv
+
+            # Theo greeks of options with pricing impv
+            ix = np.array([i for i, o in enumerate(options) if o.pricing_impv], dtype=int)
+            if len(ix):
+                impv = np.array([options[i].pricing_impv for i in ix], dtype=float)
+                size = arrays["size"][ix]
+
+                price, delta, gamma, theta, vega = self.calculate_greeks_array(
+                    f,
+                    arrays["strike"][ix],
+                    arrays["r"][ix],
+                    arrays["t"][ix],
+                    impv,
+                    arrays["cp"][ix]
+                )
+
+                for i, p, d, g, t, v in zip(
+                    ix.tolist(),
+                    price.tolist(),
+                    (delta * size).tolist(),
+                    (gamma * size).tolist(),
+                    (theta * size).tolist(),
+                    (vega * size).tolist()
+                ):
+                    option = options[i]
+                    option.theo_price = p
+                    option.theo_delta = d
+                    option.theo_gamma = g
+                    option.theo_theta = t
+                    option.theo_vega = v
+
+        for option in options:
+            option.calculate_pos_greeks()
+
     def update_trade(self, trade: TradeData):
         """"""
         option = self.options[trade.vt_symbol]
@@ -390,11 +498,16 @@ class ChainData:
         for option in self.options.values():
             option.set_interest_rate(interest_rate)
 
+        self.static_arrays = {}
+
     def set_pricing_model(self, pricing_model: ModuleType):
         """"""
         for option in self.options.values():
             option.set_pricing_model(pricing_model)
 
+        self.calculate_impv_array = getattr(pricing_model, "calculate_impv_array", None)
+        self.calculate_greeks_array = getattr(pricing_model, "calculate_greeks_array", None)
+
     def set_portfolio(self, portfolio: "PortfolioData"):
         """"""
         for option in self.options:
@@ -453,6 +566,9 @@ class PortfolioData:
         self.chains: Dict[str, ChainData] = {}
         self.underlyings: Dict[str, UnderlyingData] = {}
 
+        # Chains with new tick, but greeks not recalculated yet
+        self.dirty_chains: Dict[str, ChainData] = {}
+
     def calculate_pos_greeks(self):
         """"""
         self.long_pos = 0
@@ -491,6 +607,73 @@ class PortfolioData:
             underlying.update_tick(tick)
             self.calculate_pos_greeks()
 
+    def mark_tick_dirty(self, tick: TickData) -> bool:
+        """
+        Update price of instrument only, and mark related chains dirty.
+        Greeks of dirty chains are recalculated by calculate_dirty_greeks.
+        """
+        if tick.vt_symbol in self.options:
+            option = self.options[tick.vt_symbol]
+            option.update_price(tick)
+
+            chain = option.chain
+            self.dirty_chains[chain.chain_symbol] = chain
+        elif tick.vt_symbol in self.underlyings:
+            underlying = self.underlyings[tick.vt_symbol]
+            underlying.update_price(tick)
+
+            for chain in underlying.chains.values():
+                self.dirty_chains[chain.chain_symbol] = chain
+        else:
+            return False
+
+        return True
+
+    def calculate_dirty_greeks(self) -> List[str]:
+        """
+        Recalculate impv and greeks of all dirty chains once.
+
+        Return symbols of chains recalculated.
+        """
+        if not self.dirty_chains:
+            return []
+
+        chains = list(self.dirty_chains.values())
+        self.dirty_chains.clear()
+
+        for chain in chains:
+            chain.update_underlying_tick()
+
+        self.calculate_pos_greeks()
+
+        return [chain.chain_symbol for chain in chains]
+
+    def get_greeks_snapshot(self, chain_symbols: List[str]) -> dict:
+        """"""
+        def get_pos_greeks(data) -> dict:
+            return {
+                "net_pos": data.net_pos,
+                "pos_value": data.pos_value,
+                "pos_delta": data.pos_delta,
+                "pos_gamma": data.pos_gamma,
+                "pos_theta": data.pos_theta,
+                "pos_vega": data.pos_vega,
+            }
+
+        snapshot = get_pos_greeks(self)
+        snapshot["portfolio_name"] = self.name
+        snapshot["datetime"] = datetime.now()
+        snapshot["chain_symbols"] = chain_symbols
+        snapshot["chains"] = {
+            chain_symbol: get_pos_greeks(chain)
+            for chain_symbol, chain in self.chains.items()
+        }
+        snapshot["underlying_delta"] = {
+            vt_symbol: underlying.pos_delta
+            for vt_symbol, underlying in self.underlyings.items()
+        }
+        return snapshot
+
     def update_trade(self, trade: TradeData):
         """"""
         if trade.vt_symbol in self.options:
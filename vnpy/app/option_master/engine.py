@@ -1,5 +1,7 @@
 """"""
 
+from threading import Lock, Thread
+from time import sleep, time
 from typing import Dict, List
 
 from vnpy.trader.object import (
@@ -19,7 +21,7 @@ from vnpy.trader.utility import save_json, load_json
 
 from .base import (
     APP_NAME, CHAIN_UNDERLYING_MAP,
-    EVENT_OPTION_LOG, EVENT_OPTION_NEW_PORTFOLIO,
+    EVENT_OPTION_LOG, EVENT_OPTION_NEW_PORTFOLIO, EVENT_OPTION_GREEKS,
     InstrumentData, PortfolioData
 )
 from .pricing import (
@@ -55,17 +57,31 @@ class OptionEngine(BaseEngine):
 
         self.setting: Dict = {}
 
+        # Greeks are recalculated at most once every greeks_interval seconds,
+        # on event thread or on a separate worker thread
+        self.greeks_interval: float = 0.5
+        self.greeks_thread: bool = False
+        self.last_greeks_time: float = 0
+        self.greeks_lock: Lock = Lock()
+        self.greeks_active: bool = False
+        self.greeks_worker: Thread = None
+
         self.load_setting()
         self.register_event()
+        self.start_greeks_worker()
 
     def close(self):
         """"""
+        self.stop_greeks_worker()
         self.save_setting()
 
     def load_setting(self):
         """"""
         self.setting = load_json(self.setting_filename)
 
+        self.greeks_interval = self.setting.get("greeks_interval", self.greeks_interval)
+        self.greeks_thread = self.setting.get("greeks_thread", self.greeks_thread)
+
     def save_setting(self):
         """"""
         # Save underlying adjustment
@@ -103,7 +119,11 @@ class OptionEngine(BaseEngine):
         if not portfolio:
             return
 
-        portfolio.update_tick(tick)
+        with self.greeks_lock:
+            portfolio.mark_tick_dirty(tick)
+
+        if not self.greeks_active:
+            self.check_greeks()
 
     def process_order_event(self, event: Event) -> None:
         """"""
@@ -123,7 +143,8 @@ class OptionEngine(BaseEngine):
         if not portfolio:
             return
 
-        portfolio.update_trade(trade)
+        with self.greeks_lock:
+            portfolio.update_trade(trade)
 
     def process_contract_event(self, event: Event) -> None:
         """"""
@@ -136,7 +157,8 @@ class OptionEngine(BaseEngine):
                 return
 
             portfolio = self.get_portfolio(portfolio_name)
-            portfolio.add_option(contract)
+            with self.greeks_lock:
+                portfolio.add_option(contract)
 
     def process_position_event(self, event: Event) -> None:
         """"""
@@ -145,13 +167,72 @@ class OptionEngine(BaseEngine):
 
     def process_timer_event(self, event: Event) -> None:
         """"""
+        # Make sure greeks of the last ticks are not left dirty
+        if not self.greeks_active:
+            self.calculate_greeks()
+
         self.timer_count += 1
         if self.timer_count < self.timer_trigger:
             return
         self.timer_count = 0
 
-        for portfolio in self.active_portfolios.values():
-            portfolio.calculate_atm_price()
+        with self.greeks_lock:
+            for portfolio in self.active_portfolios.values():
+                portfolio.calculate_atm_price()
+
+    def check_greeks(self) -> None:
+        """Recalculate greeks if greeks_interval passed since last time."""
+        now = time()
+        if now - self.last_greeks_time < self.greeks_interval:
+            return
+        self.last_greeks_time = now
+
+        self.calculate_greeks()
+
+    def calculate_greeks(self) -> None:
+        """
+        Recalculate greeks of dirty chains, and publish one snapshot event
+        for each portfolio updated.
+        """
+        snapshots = []
+
+        with self.greeks_lock:
+            for portfolio in self.active_portfolios.values():
+                chain_symbols = portfolio.calculate_dirty_greeks()
+                if chain_symbols:
+                    snapshots.append(portfolio.get_greeks_snapshot(chain_symbols))
+
+        for snapshot in snapshots:
+            event = Event(EVENT_OPTION_GREEKS, snapshot)
+            self.event_engine.put(event)
+
+    def start_greeks_worker(self) -> None:
+        """"""
+        if not self.greeks_thread or self.greeks_interval <= 0:
+            return
+
+        self.greeks_active = True
+        self.greeks_worker = Thread(target=self.run_greeks_worker, daemon=True)
+        self.greeks_worker.start()
+
+    def stop_greeks_worker(self) -> None:
+        """"""
+        if not self.greeks_active:
+            return
+
+        self.greeks_active = False
+        self.greeks_worker.join()
+
+    def run_greeks_worker(self) -> None:
+        """"""
+        while self.greeks_active:
+            sleep(self.greeks_interval)
+
+            # Keep worker running, otherwise greeks are never updated again
+            try:
+                self.calculate_greeks()
+            except Exception as ex:
+                self.write_log(f"希腊值计算异常：{ex}")
 
     def get_portfolio(self, portfolio_name: str) -> PortfolioData:
         """"""
@@ -187,14 +268,15 @@ class OptionEngine(BaseEngine):
         """"""
         portfolio = self.get_portfolio(portfolio_name)
 
-        for chain_symbol, underlying_symbol in chain_underlying_map.items():
-            contract = self.main_engine.get_contract(underlying_symbol)
-            portfolio.set_chain_underlying(chain_symbol, contract)
+        with self.greeks_lock:
+            for chain_symbol, underlying_symbol in chain_underlying_map.items():
+                contract = self.main_engine.get_contract(underlying_symbol)
+                portfolio.set_chain_underlying(chain_symbol, contract)
 
-        portfolio.set_interest_rate(interest_rate)
+            portfolio.set_interest_rate(interest_rate)
 
-        pricing_model = PRICING_MODELS[model_name]
-        portfolio.set_pricing_model(pricing_model)
+            pricing_model = PRICING_MODELS[model_name]
+            portfolio.set_pricing_model(pricing_model)
 
         portfolio_settings = self.setting.setdefault("portfolio_settings", {})
         portfolio_settings[portfolio_name] = {
@@ -211,46 +293,48 @@ class OptionEngine(BaseEngine):
 
     def init_portfolio(self, portfolio_name: str) -> bool:
         """"""
-        # Add to active dict
-        if portfolio_name in self.active_portfolios:
-            return False
-        portfolio = self.get_portfolio(portfolio_name)
-        self.active_portfolios[portfolio_name] = portfolio
+        # Greeks worker iterates active portfolios and their instruments
+        with self.greeks_lock:
+            # Add to active dict
+            if portfolio_name in self.active_portfolios:
+                return False
+            portfolio = self.get_portfolio(portfolio_name)
+            self.active_portfolios[portfolio_name] = portfolio
 
-        # Subscribe market data
-        for underlying in portfolio.underlyings.values():
-            self.instruments[underlying.vt_symbol] = underlying
-            self.subscribe_data(underlying.vt_symbol)
+            # Subscribe market data
+            for underlying in portfolio.underlyings.values():
+                self.instruments[underlying.vt_symbol] = underlying
+                self.subscribe_data(underlying.vt_symbol)
 
-        for option in portfolio.options.values():
-            # Ignore options with no underlying set
-            if not option.underlying:
-                continue
+            for option in portfolio.options.values():
+                # Ignore options with no underlying set
+                if not option.underlying:
+                    continue
 
-            self.instruments[option.vt_symbol] = option
-            self.subscribe_data(option.vt_symbol)
+                self.instruments[option.vt_symbol] = option
+                self.subscribe_data(option.vt_symbol)
 
-        # Update position volume
-        for instrument in self.instruments.values():
-            holding = self.offset_converter.get_position_holding(
-                instrument.vt_symbol
-            )
-            if holding:
-                instrument.update_holding(holding)
+            # Update position volume
+            for instrument in self.instruments.values():
+                holding = self.offset_converter.get_position_holding(
+                    instrument.vt_symbol
+                )
+                if holding:
+                    instrument.update_holding(holding)
 
-        portfolio.calculate_pos_greeks()
+            portfolio.calculate_pos_greeks()
 
-        # Load underlying adjustment from setting
-        adjustment_settings = self.setting.get("underlying_adjustments", {})
-        adjustment_setting = adjustment_settings.get(portfolio_name)
+            # Load underlying adjustment from setting
+            adjustment_settings = self.setting.get("underlying_adjustments", {})
+            adjustment_setting = adjustment_settings.get(portfolio_name)
 
-        if adjustment_setting:
-            for chain in portfolio.chains.values():
-                chain.underlying_adjustment = adjustment_setting.get(
-                    chain.chain_symbol, 0
-                )
+            if adjustment_setting:
+                for chain in portfolio.chains.values():
+                    chain.underlying_adjustment = adjustment_setting.get(
+                        chain.chain_symbol, 0
+                    )
 
-        return True
+            return True
 
     def get_portfolio_names(self) -> List[str]:
         """"""
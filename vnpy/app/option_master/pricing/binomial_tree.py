@@ -1,55 +1,233 @@
-from numpy import zeros, ndarray
+from functools import lru_cache
 from math import exp, sqrt
 from typing import Tuple
 
+from numpy import (
+    ndarray, arange, asarray, broadcast_arrays, full, where, errstate,
+    isfinite, maximum, concatenate, stack, round as np_round
+)
 
-DEFAULT_STEP = 15
 
+DEFAULT_STEP = 100
 
-def generate_tree(
-    f: float,
-    k: float,
-    r: float,
-    t: float,
-    v: float,
-    cp: int,
-    n: int
-) -> Tuple[ndarray, ndarray]:
-    """Generate binomial tree for pricing American option."""
+# Relative change of volatility for calculating vega
+VEGA_BUMP = 0.001
+
+# Implied volatility solving stops if diverged beyond this
+MAX_IMPV = 10
+
+
+@lru_cache(maxsize=4096)
+def get_lattice(t: float, v: float, n: int) -> Tuple[float, float, float, ndarray]:
+    """
+    Get time step, up factor, risk neutral probability and price factor
+    table of lattice, cached by (t, v, n).
+
+    Since d = 1 / u, underlying price of node j at step i is
+    f * u ** (i - 2 * j), factor table holds u ** (n - m) at index m,
+    so nodes of step i are the slice [n - i: n + i + 1: 2].
+
+    Negative volatility gives the same lattice upside down, and so the
+    same option price, as the lattice of abs(v).
+    """
+    v = abs(v)
     dt = t / n
     u = exp(v * sqrt(dt))
     d = 1 / u
     a = 1
-    tree_size = n + 1
-    underlying_tree = zeros((tree_size, tree_size))
-    option_tree = zeros((tree_size, tree_size))
 
     # Calculate risk neutral probability
     p = (a - d) / (u - d)
-    p1 = p / a
-    p2 = (1 - p) / a
 
-    # Calculate underlying price tree
-    underlying_tree[0, 0] = f
+    factors = u ** arange(n, -n - 1, -1, dtype=float)
+    factors.flags.writeable = False
+
+    return dt, u, p, factors
+
+
+def roll_back(
+    f: ndarray,
+    k: ndarray,
+    t: ndarray,
+    v: ndarray,
+    cp: ndarray,
+    n: int
+) -> Tuple[ndarray, ndarray, ndarray, ndarray, ndarray]:
+    """
+    Backward induction of American option lattice for a batch of options.
+
+    Only one row of option values is kept for every option, and each step
+    is done with vector operations over all nodes and options together.
+
+    Return time step, up factor, and option values at step 0, 1, 2.
+    """
+    lattices = [get_lattice(t_, v_, n) for t_, v_ in zip(t.tolist(), v.tolist())]
+    dt = asarray([lattice[0] for lattice in lattices])
+    u = asarray([lattice[1] for lattice in lattices])
+    p = asarray([lattice[2] for lattice in lattices])
+    factors = stack([lattice[3] for lattice in lattices])
+
+    p1 = p[:, None]
+    p2 = 1 - p1
 
-    for i in range(1, n + 1):
-        underlying_tree[0, i] = underlying_tree[0, i - 1] * u
-        for j in range(1, n + 1):
-            underlying_tree[j, i] = underlying_tree[j - 1, i - 1] * d
+    # Exercise value of all nodes, each step uses a strided view of it
+    exercise = cp[:, None] * (f[:, None] * factors - k[:, None])
 
-    # Calculate option price tree
-    for j in range(n + 1):
-        option_tree[j, n] = max(0, cp * (underlying_tree[j, n] - k))
+    # Option value at expiry
+    values = maximum(exercise[:, ::2], 0)
+    step_1 = step_2 = values
 
     for i in range(n - 1, -1, -1):
-        for j in range(i + 1):
-            option_tree[j, i] = max(
-                (p1 * option_tree[j, i + 1] + p2 * option_tree[j + 1, i + 1]),
-                cp * (underlying_tree[j, i] - k)
+        values = maximum(
+            p1 * values[:, :-1] + p2 * values[:, 1:],
+            exercise[:, n - i: n + i + 1: 2]
+        )
+
+        if i == 2:
+            step_2 = values
+        elif i == 1:
+            step_1 = values
+
+    return dt, u, values[:, 0], step_1, step_2
+
+
+def prepare_arrays(*args) -> Tuple[ndarray, ...]:
+    """Convert arguments into 1-D float arrays of same shape."""
+    return broadcast_arrays(*[asarray(x, dtype=float).ravel() for x in args])
+
+
+def calculate_price_vega_array(
+    f: ndarray,
+    k: ndarray,
+    r: ndarray,
+    t: ndarray,
+    v: ndarray,
+    cp: ndarray,
+    n: int = DEFAULT_STEP
+) -> Tuple[ndarray, ndarray]:
+    """Calculate option price and original vega, with lattices rolled back together"""
+    size = len(f)
+
+    _, _, price, _, _ = roll_back(
+        concatenate([f, f]),
+        concatenate([k, k]),
+        concatenate([t, t]),
+        concatenate([v, v * (1 + VEGA_BUMP)]),
+        concatenate([cp, cp]),
+        n
+    )
+
+    vega = (price[size:] - price[:size]) / (v * VEGA_BUMP)
+    return price[:size], vega
+
+
+def calculate_greeks_array(
+    f: ndarray,
+    k: ndarray,
+    r: ndarray,
+    t: ndarray,
+    v: ndarray,
+    cp: ndarray,
+    n: int = DEFAULT_STEP,
+    annual_days: int = 240
+) -> Tuple[ndarray, ndarray, ndarray, ndarray, ndarray]:
+    """
+    Calculate price and greeks of a batch of options in single pass.
+
+    Price, delta, gamma and theta are read from the first steps of the
+    lattice, vega from the lattice of bumped volatility rolled back in
+    the same batch.
+    """
+    shape = broadcast_arrays(*[asarray(x) for x in (f, k, r, t, v, cp)])[0].shape
+    f, k, r, t, v, cp = prepare_arrays(f, k, r, t, v, cp)
+    size = len(f)
+
+    dt, u, price, step_1, step_2 = roll_back(
+        concatenate([f, f]),
+        concatenate([k, k]),
+        concatenate([t, t]),
+        concatenate([v, v * (1 + VEGA_BUMP)]),
+        concatenate([cp, cp]),
+        n
+    )
+
+    price_vega = price[size:]
+    dt = dt[:size]
+    u = u[:size]
+    price = price[:size]
+    step_1 = step_1[:size]
+    step_2 = step_2[:size]
+
+    # Underlying price of nodes at step 1 and 2
+    f_up = f * u
+    f_down = f / u
+    f_up_2 = f_up * u
+    f_down_2 = f_down / u
+
+    # Delta
+    delta = (step_1[:, 0] - step_1[:, 1]) / (f_up - f_down)
+
+    # Gamma
+    gamma_delta_1 = (step_2[:, 0] - step_2[:, 1]) / (f_up_2 - f)
+    gamma_delta_2 = (step_2[:, 1] - step_2[:, 2]) / (f - f_down_2)
+    gamma = (gamma_delta_1 - gamma_delta_2) / (0.5 * (f_up_2 - f_down_2))
+
+    # Theta
+    theta = (step_2[:, 1] - price) / (2 * dt * annual_days)
+
+    # Vega
+    vega = (price_vega - price) / (VEGA_BUMP * v * 100)
+
+    return tuple(x.reshape(shape) for x in (price, delta, gamma, theta, vega))
+
+
+def calculate_impv_array(
+    price: ndarray,
+    f: ndarray,
+    k: ndarray,
+    r: ndarray,
+    t: ndarray,
+    cp: ndarray,
+    n: int = DEFAULT_STEP
+) -> ndarray:
+    """
+    Calculate implied volatility of a batch of options,
+    with the same rules as calculate_impv.
+    """
+    shape = broadcast_arrays(*[asarray(x) for x in (price, f, k, r, t, cp)])[0].shape
+    price, f, k, r, t, cp = prepare_arrays(price, f, k, r, t, cp)
+
+    # Check option price must be positive and meets minimum value
+    meet = (price > 0) & (
+        ((cp == 1) & (price > f - k))
+        | ((cp == -1) & (price > k - f))
+    )
+
+    # Calculate implied volatility with Newton's method
+    v = full(price.shape, 0.3)
+    active = meet.copy()
+
+    with errstate(divide="ignore", invalid="ignore", over="ignore"):
+        for i in range(50):
+            # Lattice can not be built with zero or diverged volatility
+            active &= (v != 0) & (abs(v) < MAX_IMPV)
+            if not active.any():
+                break
+
+            ix = active.nonzero()
+            p, vega = calculate_price_vega_array(
+                f[ix], k[ix], r[ix], t[ix], v[ix], cp[ix], n
             )
 
-    # Return both trees
-    return option_tree, underlying_tree
+            dx = (price[ix] - p) / vega
+            done = (vega == 0) | (abs(dx) < 0.00001) | ~isfinite(dx)
+
+            v[ix] = where(done, v[ix], v[ix] + dx)
+            active[ix] = ~done
+
+    # Check end result to be non-negative
+    v = where(meet & (v > 0) & (v < MAX_IMPV), np_round(v, 4), 0)
+    return v.reshape(shape)
 
 
 def calculate_price(
@@ -62,8 +240,8 @@ def calculate_price(
     n: int = DEFAULT_STEP
 ) -> float:
     """Calculate option price"""
-    option_tree, underlying_tree = generate_tree(f, k, r, t, v, cp, n)
-    return option_tree[0, 0]
+    _, _, price, _, _ = roll_back(*prepare_arrays(f, k, t, v, cp), n)
+    return float(price[0])
 
 
 def calculate_delta(
@@ -76,10 +254,7 @@ def calculate_delta(
     n: int = DEFAULT_STEP
 ) -> float:
     """Calculate option delta"""
-    option_tree, underlying_tree = generate_tree(f, k, r, t, v, cp, n)
-    option_price_change = option_tree[0, 1] - option_tree[1, 1]
-    underlying_price_change = underlying_tree[0, 1] - underlying_tree[1, 1]
-    return option_price_change / underlying_price_change
+    return calculate_greeks(f, k, r, t, v, cp, n)[1]
 
 
 def calculate_gamma(
@@ -92,16 +267,7 @@ def calculate_gamma(
     n: int = DEFAULT_STEP
 ) -> float:
     """Calculate option gamma"""
-    option_tree, underlying_tree = generate_tree(f, k, r, t, v, cp, n)
-
-    gamma_delta_1 = (option_tree[0, 2] - option_tree[1, 2]) / \
-        (underlying_tree[0, 2] - underlying_tree[1, 2])
-    gamma_delta_2 = (option_tree[1, 2] - option_tree[2, 2]) / \
-        (underlying_tree[1, 2] - underlying_tree[2, 2])
-    gamma = (gamma_delta_1 - gamma_delta_2) / \
-        (0.5 * (underlying_tree[0, 2] - underlying_tree[2, 2]))
-
-    return gamma
+    return calculate_greeks(f, k, r, t, v, cp, n)[2]
 
 
 def calculate_theta(
@@ -115,12 +281,7 @@ def calculate_theta(
     annual_days: int = 240
 ) -> float:
     """Calcualte option theta"""
-    option_tree, underlying_tree = generate_tree(f, k, r, t, v, cp, n)
-
-    dt = t / n
-    theta = (option_tree[1, 2] - option_tree[0, 0]) / (2 * dt * annual_days)
-
-    return theta
+    return calculate_greeks(f, k, r, t, v, cp, n, annual_days)[3]
 
 
 def calculate_vega(
@@ -147,10 +308,8 @@ def calculate_original_vega(
     n: int = DEFAULT_STEP
 ) -> float:
     """Calculate option vega"""
-    price_1 = calculate_price(f, k, r, t, v, cp, n)
-    price_2 = calculate_price(f, k, r, t, v * 1.001, cp, n)
-    vega = (price_2 - price_1) / (v * 0.001)
-    return vega
+    _, vega = calculate_price_vega_array(*prepare_arrays(f, k, r, t, v, cp), n)
+    return float(vega[0])
 
 
 def calculate_greeks(
@@ -164,33 +323,8 @@ def calculate_greeks(
     annual_days: int = 240
 ) -> Tuple[float, float, float, float, float]:
     """Calculate option price and greeks"""
-    dt = t / n
-    option_tree, underlying_tree = generate_tree(f, k, r, t, v, cp, n)
-    option_tree_vega, underlying_tree_vega = generate_tree(f, k, r, t, v * 1.001, cp, n)
-
-    # Price
-    price = option_tree[0, 0]
-
-    # Delta
-    option_price_change = option_tree[0, 1] - option_tree[1, 1]
-    underlying_price_change = underlying_tree[0, 1] - underlying_tree[1, 1]
-    delta = option_price_change / underlying_price_change
-
-    # Gamma
-    gamma_delta_1 = (option_tree[0, 2] - option_tree[1, 2]) / \
-        (underlying_tree[0, 2] - underlying_tree[1, 2])
-    gamma_delta_2 = (option_tree[1, 2] - option_tree[2, 2]) / \
-        (underlying_tree[1, 2] - underlying_tree[2, 2])
-    gamma = (gamma_delta_1 - gamma_delta_2) / \
-        (0.5 * (underlying_tree[0, 2] - underlying_tree[2, 2]))
-
-    # Theta
-    theta = (option_tree[1, 2] - option_tree[0, 0]) / (2 * dt * annual_days)
-
-    # Vega
-    vega = (option_tree_vega[0, 0] - option_tree[0, 0]) / (0.001 * v * 100)
-
-    return price, delta, gamma, theta, vega
+    results = calculate_greeks_array(f, k, r, t, v, cp, n, annual_days)
+    return tuple(float(x) for x in results)
 
 
 def calculate_impv(
@@ -203,49 +337,4 @@ def calculate_impv(
     n: int = DEFAULT_STEP
 ) -> float:
     """Calculate option implied volatility"""
-    # Check option price must be position
-    if price <= 0:
-        return 0
-
-    # Check if option price meets minimum value (exercise value)
-    meet = False
-
-    if cp == 1 and price > (f - k):
-        meet = True
-    elif cp == -1 and price > (k - f):
-        meet = True
-
-    # If minimum value not met, return 0
-    if not meet:
-        return 0
-
-    # Calculate implied volatility with Newton's method
-    v = 0.3     # Initial guess of volatility
-
-    for i in range(50):
-        # Caculate option price and vega with current guess
-        p: float = calculate_price(f, k, r, t, v, cp, n)
-        vega: float = calculate_original_vega(f, k, r, t, v, cp, n)
-
-        # Break loop if vega too close to 0
-        if not vega:
-            break
-
-        # Calculate error value
-        dx = (price - p) / vega
-
-        # Check if error value meets requirement
-        if abs(dx) < 0.00001:
-            break
-
-        # Calculate guessed implied volatility of next round
-        v += dx
-
-    # Check end result to be non-negative
-    if v <= 0:
-        return 0
-
-    # Round to 4 decimal places
-    v = round(v, 4)
-
-    return v
+    return float(calculate_impv_array(price, f, k, r, t, cp, n))
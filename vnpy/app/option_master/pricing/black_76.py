@@ -1,10 +1,23 @@
 from scipy import stats
+from scipy.special import ndtr
 from math import log, pow, sqrt, exp
 from typing import Tuple
 
+from numpy import (
+    ndarray, asarray, atleast_1d, broadcast_arrays, full, where, errstate, isfinite,
+    log as np_log, sqrt as np_sqrt, exp as np_exp, round as np_round, pi
+)
+
 cdf = stats.norm.cdf
 pdf = stats.norm.pdf
 
+cdf_array = ndtr
+
+
+def pdf_array(x: ndarray) -> ndarray:
+    """Standard normal pdf of array"""
+    return np_exp(-0.5 * x * x) / np_sqrt(2 * pi)
+
 
 def calculate_d1(
     s: float,
@@ -33,7 +46,7 @@ def calculate_price(
         return max(0, cp * (s - k))
 
     if not d1:
-        d1: float = calculate_d1(s, k, r, r, v)
+        d1: float = calculate_d1(s, k, r, t, v)
     d2: float = d1 - v * sqrt(t)
 
     price: float = cp * (s * cdf(cp * d1) - k * cdf(cp * d2)) * exp(-r * t)
@@ -191,7 +204,7 @@ def calculate_impv(
     for i in range(50):
         # Caculate option price and vega with current guess
         p: float = calculate_price(s, k, r, t, v, cp)
-        vega: float = calculate_original_vega(s, k, r, t, v, cp)
+        vega: float = calculate_original_vega(s, k, r, t, v)
 
         # Break loop if vega too close to 0
         if not vega:
@@ -215,3 +228,132 @@ def calculate_impv(
     v = round(v, 4)
 
     return v
+
+
+def calculate_d1_array(
+    s: ndarray,
+    k: ndarray,
+    r: ndarray,
+    t: ndarray,
+    v: ndarray
+) -> ndarray:
+    """Calculate option D1 value of arrays"""
+    return (np_log(s / k) + (0.5 * v * v) * t) / (v * np_sqrt(t))
+
+
+def calculate_price_vega_array(
+    s: ndarray,
+    k: ndarray,
+    r: ndarray,
+    t: ndarray,
+    v: ndarray,
+    cp: ndarray
+) -> Tuple[ndarray, ndarray]:
+    """Calculate option price and original vega of arrays, used by Newton's method"""
+    positive = v > 0
+    v = where(positive, v, 1)
+
+    sqrt_t = np_sqrt(t)
+    discount = np_exp(-r * t)
+    d1 = calculate_d1_array(s, k, r, t, v)
+    d2 = d1 - v * sqrt_t
+    pdf_d1 = pdf_array(d1)
+
+    price = cp * (s * cdf_array(cp * d1) - k * cdf_array(cp * d2)) * discount
+    vega = s * discount * pdf_d1 * sqrt_t
+
+    # Option space value if volatility not positive
+    price = where(positive, price, (cp * (s - k)).clip(0))
+    vega = where(positive, vega, 0)
+    return price, vega
+
+
+def calculate_greeks_array(
+    s: ndarray,
+    k: ndarray,
+    r: ndarray,
+    t: ndarray,
+    v: ndarray,
+    cp: ndarray,
+    annual_days: int = 240
+) -> Tuple[ndarray, ndarray, ndarray, ndarray, ndarray]:
+    """
+    Calculate price and greeks of a batch of options in one call,
+    with the same formulas as calculate_greeks.
+    """
+    s, k, r, t, v, cp = broadcast_arrays(
+        *[asarray(x, dtype=float) for x in (s, k, r, t, v, cp)]
+    )
+
+    positive = v > 0
+    v = where(positive, v, 1)
+
+    sqrt_t = np_sqrt(t)
+    discount = np_exp(-r * t)
+    d1 = calculate_d1_array(s, k, r, t, v)
+    d2 = d1 - v * sqrt_t
+    pdf_d1 = pdf_array(d1)
+
+    price = cp * (s * cdf_array(cp * d1) - k * cdf_array(cp * d2)) * discount
+    delta = cp * discount * cdf_array(cp * d1) * s * 0.01
+    gamma = discount * pdf_d1 / (s * v * sqrt_t) * s * s * 0.0001
+    theta = (-s * discount * pdf_d1 * v / (2 * sqrt_t)
+             + cp * r * s * discount * cdf_array(cp * d1)
+             - cp * r * k * discount * cdf_array(cp * d2)) / annual_days
+    vega = s * discount * pdf_d1 * sqrt_t / 100
+
+    price = where(positive, price, (cp * (s - k)).clip(0))
+    delta = where(positive, delta, 0)
+    gamma = where(positive, gamma, 0)
+    theta = where(positive, theta, 0)
+    vega = where(positive, vega, 0)
+
+    return price, delta, gamma, theta, vega
+
+
+def calculate_impv_array(
+    price: ndarray,
+    s: ndarray,
+    k: ndarray,
+    r: ndarray,
+    t: ndarray,
+    cp: ndarray
+) -> ndarray:
+    """
+    Calculate implied volatility of a batch of options,
+    with the same rules as calculate_impv.
+    """
+    shape = broadcast_arrays(*[asarray(x) for x in (price, s, k, r, t, cp)])[0].shape
+    price, s, k, r, t, cp = broadcast_arrays(
+        *[atleast_1d(asarray(x, dtype=float)) for x in (price, s, k, r, t, cp)]
+    )
+
+    # Check option price must be positive and meets minimum value
+    meet = (price > 0) & (
+        ((cp == 1) & (price > (s - k) * np_exp(-r * t)))
+        | ((cp == -1) & (price > k * np_exp(-r * t) - s))
+    )
+
+    # Calculate implied volatility with Newton's method
+    v = full(price.shape, 0.3)
+    active = meet.copy()
+
+    with errstate(divide="ignore", invalid="ignore", over="ignore"):
+        for i in range(50):
+            if not active.any():
+                break
+
+            ix = active.nonzero()
+            p, vega = calculate_price_vega_array(s[ix], k[ix], r[ix], t[ix], v[ix], cp[ix])
+
+            dx = (price[ix] - p) / vega
+            done = (vega == 0) | (abs(dx) < 0.00001) | ~isfinite(dx)
+
+            # Non-finite step diverges to inf/nan in calculate_impv, result is 0
+            v[ix] = where(done, v[ix], v[ix] + dx)
+            v[ix] = where((vega != 0) & ~isfinite(dx), 0, v[ix])
+            active[ix] = ~done
+
+    # Check end result to be non-negative
+    v = where(meet & (v > 0) & isfinite(v), np_round(v, 4), 0)
+    return v.reshape(shape)
@@ -9,7 +9,10 @@ from vnpy.trader.event import (
     EVENT_TICK, EVENT_TRADE, EVENT_POSITION
 )
 from ..engine import OptionEngine
-from ..base import UnderlyingData, OptionData, ChainData, PortfolioData
+from ..base import (
+    EVENT_OPTION_GREEKS,
+    UnderlyingData, OptionData, ChainData, PortfolioData
+)
 
 
 COLOR_WHITE = QtGui.QColor("white")
@@ -111,6 +114,7 @@ class OptionMarketMonitor(MonitorTable):
     signal_tick = QtCore.pyqtSignal(Event)
     signal_trade = QtCore.pyqtSignal(Event)
     signal_position = QtCore.pyqtSignal(Event)
+    signal_greeks = QtCore.pyqtSignal(Event)
 
     headers: List[Dict] = [
         {"name": "symbol", "display": "代码", "cell": MonitorCell},
@@ -237,10 +241,12 @@ class OptionMarketMonitor(MonitorTable):
         self.signal_tick.connect(self.process_tick_event)
         self.signal_trade.connect(self.process_trade_event)
         self.signal_position.connect(self.process_position_event)
+        self.signal_greeks.connect(self.process_greeks_event)
 
         self.event_engine.register(EVENT_TICK, self.signal_tick.emit)
         self.event_engine.register(EVENT_TRADE, self.signal_trade.emit)
         self.event_engine.register(EVENT_POSITION, self.signal_position.emit)
+        self.event_engine.register(EVENT_OPTION_GREEKS, self.signal_greeks.emit)
 
     def process_tick_event(self, event: Event):
         """"""
@@ -248,11 +254,19 @@ class OptionMarketMonitor(MonitorTable):
 
         if tick.vt_symbol in self.option_symbols:
             self.update_price(tick.vt_symbol)
-            self.update_impv(tick.vt_symbol)
-        elif tick.vt_symbol in self.underlying_option_map:
-            option_symbols = self.underlying_option_map[tick.vt_symbol]
 
-            for vt_symbol in option_symbols:
+    def process_greeks_event(self, event: Event):
+        """"""
+        snapshot = event.data
+        if snapshot["portfolio_name"] != self.portfolio_name:
+            return
+
+        portfolio = self.option_engine.get_portfolio(self.portfolio_name)
+
+        for chain_symbol in snapshot["chain_symbols"]:
+            chain = portfolio.chains[chain_symbol]
+
+            for vt_symbol in chain.options.keys():
                 self.update_impv(vt_symbol)
                 self.update_greeks(vt_symbol)
 
@@ -335,6 +349,7 @@ class OptionGreeksMonitor(MonitorTable):
     signal_tick = QtCore.pyqtSignal(Event)
     signal_trade = QtCore.pyqtSignal(Event)
     signal_position = QtCore.pyqtSignal(Event)
+    signal_greeks = QtCore.pyqtSignal(Event)
 
     headers: List[Dict] = [
         {"name": "long_pos", "display": "多仓", "cell": PosCell},
@@ -447,10 +462,12 @@ class OptionGreeksMonitor(MonitorTable):
         self.signal_tick.connect(self.process_tick_event)
         self.signal_trade.connect(self.process_trade_event)
         self.signal_position.connect(self.process_position_event)
+        self.signal_greeks.connect(self.process_greeks_event)
 
         self.event_engine.register(EVENT_TICK, self.signal_tick.emit)
         self.event_engine.register(EVENT_TRADE, self.signal_trade.emit)
         self.event_engine.register(EVENT_POSITION, self.signal_position.emit)
+        self.event_engine.register(EVENT_OPTION_GREEKS, self.signal_greeks.emit)
 
     def process_tick_event(self, event: Event):
         """"""
@@ -459,7 +476,26 @@ class OptionGreeksMonitor(MonitorTable):
         if tick.vt_symbol not in self.underlying_option_map:
             return
 
-        self.update_underlying_tick(tick.vt_symbol)
+        # Delta of underlying changes with price immediately
+        underlying = self.option_engine.get_instrument(tick.vt_symbol)
+        self.update_row(tick.vt_symbol, underlying)
+
+    def process_greeks_event(self, event: Event):
+        """"""
+        snapshot = event.data
+        if snapshot["portfolio_name"] != self.portfolio_name:
+            return
+
+        portfolio = self.option_engine.get_portfolio(self.portfolio_name)
+
+        for chain_symbol in snapshot["chain_symbols"]:
+            chain = portfolio.chains[chain_symbol]
+            self.update_row(chain_symbol, chain)
+
+            for option in chain.options.values():
+                self.update_row(option.vt_symbol, option)
+
+        self.update_row(portfolio.name, portfolio)
 
     def process_trade_event(self, event: Event):
         """"""
@@ -477,20 +513,6 @@ class OptionGreeksMonitor(MonitorTable):
 
         self.update_pos(position.vt_symbol)
 
-    def update_underlying_tick(self, vt_symbol: str):
-        """"""
-        underlying = self.option_engine.get_instrument(vt_symbol)
-        self.update_row(vt_symbol, underlying)
-
-        for chain in underlying.chains.values():
-            self.update_row(chain.chain_symbol, chain)
-
-            for option in chain.options.values():
-                self.update_row(option.vt_symbol, option)
-
-        portfolio = underlying.portfolio
-        self.update_row(portfolio.name, portfolio)
-
     def update_pos(self, vt_symbol: str):
         """"""
         instrument = self.option_engine.get_instrument(vt_symbol)
@@ -4,7 +4,7 @@ import traceback
 from typing import Optional, Callable
 
 from vnpy.event import Event, EventEngine
-from vnpy.rpc import RpcServer
+from vnpy.rpc import RpcServer, CODECS
 from vnpy.trader.engine import BaseEngine, MainEngine
 from vnpy.trader.utility import load_json, save_json
 from vnpy.trader.object import LogData
@@ -25,15 +25,19 @@ class RpcEngine(BaseEngine):
         self.rep_address = "tcp://*:2014"
         self.pub_address = "tcp://*:4102"
 
+        # Codec and multipart publish must be the same as RpcGateway
+        self.codec = "pickle"
+        self.multipart = False
+
         self.server: Optional[RpcServer] = None
 
-        self.init_server()
         self.load_setting()
+        self.init_server()
         self.register_event()
 
     def init_server(self):
         """"""
-        self.server = RpcServer()
+        self.server = RpcServer(CODECS[self.codec](), self.multipart)
 
         self.server.register(self.main_engine.subscribe)
         self.server.register(self.main_engine.send_order)
@@ -66,12 +70,16 @@ class RpcEngine(BaseEngine):
         setting = load_json(self.setting_filename)
         self.rep_address = setting.get("rep_address", self.rep_address)
         self.pub_address = setting.get("pub_address", self.pub_address)
+        self.codec = setting.get("codec", self.codec)
+        self.multipart = setting.get("multipart", self.multipart)
 
     def save_setting(self):
         """"""
         setting = {
             "rep_address": self.rep_address,
-            "pub_address": self.pub_address
+            "pub_address": self.pub_address,
+            "codec": self.codec,
+            "multipart": self.multipart
         }
         save_json(self.setting_filename, setting)
 
@@ -117,7 +125,7 @@ class RpcEngine(BaseEngine):
     def process_event(self, event: Event):
         """"""
         if self.server.is_active():
-            self.server.publish("", event)
+            self.server.publish(event.type, event)
 
     def write_log(self, msg: str) -> None:
         """"""
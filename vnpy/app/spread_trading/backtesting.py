@@ -12,7 +12,10 @@ from vnpy.trader.constant import (Direction, Offset, Exchange,
 from vnpy.trader.object import TradeData, BarData, TickData
 
 from .template import SpreadStrategyTemplate, SpreadAlgoTemplate
-from .base import SpreadData, BacktestingMode, load_bar_data, load_tick_data
+from .base import (
+    SpreadData, BacktestingMode,
+    load_bar_data, load_bar_array, load_tick_data
+)
 
 sns.set_style("whitegrid")
 
@@ -45,6 +48,7 @@ class BacktestingEngine:
         self.days = 0
         self.callback = None
         self.history_data = []
+        self.history_array = {}
 
         self.algo_count = 0
         self.algos = {}
@@ -147,6 +151,29 @@ class BacktestingEngine:
 
         self.output(f"历史数据加载完成，数据量：{len(self.history_data)}")
 
+    def load_array_data(self):
+        """
+        Load spread bar arrays for run_fast_backtesting, without creating BarData.
+        """
+        self.output("开始加载历史数据")
+
+        if not self.end:
+            self.end = datetime.now()
+
+        if self.start >= self.end:
+            self.output("起始日期必须小于结束日期")
+            return
+
+        self.history_array = load_bar_array(
+            self.spread,
+            self.interval,
+            self.start,
+            self.end,
+            self.pricetick
+        )
+
+        self.output(f"历史数据加载完成，数据量：{len(self.history_array['datetime'])}")
+
     def run_backtesting(self):
         """"""
         if self.mode == BacktestingMode.BAR:
@@ -182,6 +209,64 @@ class BacktestingEngine:
 
         self.output("历史数据回放结束")
 
+    def run_fast_backtesting(self):
+        """
+        Replay spread bars by index of arrays loaded by load_array_data.
+
+        Strategy receives all arrays in on_spread_array before replay, and
+        index of each bar in on_spread_array_bar. Algos are crossed with
+        close price as run_backtesting in bar mode.
+        """
+        data = self.history_array
+        datetimes = data["datetime"]
+        close_prices = data["close_price"]
+        count = len(datetimes)
+
+        self.strategy.on_init()
+        self.strategy.on_spread_array(data)
+
+        # Use the first [days] of history data for initializing strategy,
+        # counted by change of day in month same as run_backtesting
+        days = (datetimes.astype("datetime64[D]") - datetimes.astype("datetime64[M]")).astype(int)
+        day_changes = np.flatnonzero(days[1:] != days[:-1]) + 1
+
+        if len(day_changes) >= max(self.days, 1):
+            ix = day_changes[max(self.days, 1) - 1]
+        else:
+            ix = max(count - 1, 0)
+
+        self.strategy.inited = True
+        self.output("策略初始化完成")
+
+        self.strategy.on_start()
+        self.strategy.trading = True
+        self.output("开始回放历史数据")
+
+        # Use the rest of history data for running backtesting
+        for i, dt, close_price in zip(
+            range(ix, count),
+            datetimes[ix:].tolist(),
+            close_prices[ix:].tolist()
+        ):
+            self.datetime = dt
+
+            if self.active_algos:
+                self.cross_algo_price(close_price, close_price)
+
+            self.strategy.on_spread_array_bar(i)
+
+        # Close price of each day is the last bar of the day
+        dates = datetimes[ix:].astype("datetime64[D]")
+        last_ix = np.flatnonzero(np.append(dates[1:] != dates[:-1], True))
+
+        for d, close_price in zip(
+            dates[last_ix].tolist(),
+            close_prices[ix:][last_ix].tolist()
+        ):
+            self.daily_results[d] = DailyResult(d, close_price)
+
+        self.output("历史数据回放结束")
+
     def calculate_result(self):
         """"""
         self.output("开始计算逐日盯市盈亏")
@@ -456,6 +541,10 @@ class BacktestingEngine:
             long_cross_price = self.tick.ask_price_1
             short_cross_price = self.tick.bid_price_1
 
+        self.cross_algo_price(long_cross_price, short_cross_price)
+
+    def cross_algo_price(self, long_cross_price: float, short_cross_price: float):
+        """"""
         for algo in list(self.active_algos.values()):
             # Check whether limit orders can be filled.
             long_cross = (
@@ -1,8 +1,11 @@
 from typing import Dict, List
 from datetime import datetime
+from decimal import Decimal
 from enum import Enum
 from functools import lru_cache
 
+import numpy as np
+
 from vnpy.trader.object import (
     TickData, PositionData, TradeData, ContractData, BarData
 )
@@ -52,8 +55,17 @@ class LegData:
         self.net_position = contract.net_position
         self.min_volume = contract.min_volume
 
-    def update_tick(self, tick: TickData):
-        """"""
+    def update_tick(self, tick: TickData) -> bool:
+        """
+        Return False if top of order book is not changed.
+        """
+        changed = (
+            tick.bid_price_1 != self.bid_price
+            or tick.ask_price_1 != self.ask_price
+            or tick.bid_volume_1 != self.bid_volume
+            or tick.ask_volume_1 != self.ask_volume
+        )
+
         self.bid_price = tick.bid_price_1
         self.ask_price = tick.ask_price_1
         self.bid_volume = tick.bid_volume_1
@@ -62,6 +74,8 @@ class LegData:
 
         self.tick = tick
 
+        return changed
+
     def update_position(self, position: PositionData):
         """"""
         if position.direction == Direction.NET:
@@ -177,6 +191,29 @@ class SpreadData:
             else:
                 self.trading_formula += f"{trading_multiplier}*{leg.vt_symbol}"
 
+        # Multipliers of each leg, in the same order as legs
+        self.leg_list: List[LegData] = list(self.legs.values())
+        self.leg_index: Dict[str, int] = {
+            leg.vt_symbol: n for n, leg in enumerate(self.leg_list)
+        }
+        self.leg_price_multipliers: List[int] = [
+            self.price_multipliers[leg.vt_symbol] for leg in self.leg_list
+        ]
+        self.leg_volume_divisors: List[int] = [
+            abs(self.trading_multipliers[leg.vt_symbol]) for leg in self.leg_list
+        ]
+        self.leg_inverses: List[bool] = [
+            self.inverse_contracts[leg.vt_symbol] for leg in self.leg_list
+        ]
+
+        # Price and volume contribution of each leg
+        leg_count = len(self.leg_list)
+        self.leg_bid_prices: List[float] = [0] * leg_count
+        self.leg_ask_prices: List[float] = [0] * leg_count
+        self.leg_bid_volumes: List[float] = [0] * leg_count
+        self.leg_ask_volumes: List[float] = [0] * leg_count
+        self.leg_ready: List[bool] = [False] * leg_count
+
         # Spread data
         self.bid_price: float = 0
         self.ask_price: float = 0
@@ -187,68 +224,78 @@ class SpreadData:
         self.datetime: datetime = None
 
     def calculate_price(self):
+        """
+        Recalculate contribution of all legs, and then spread price.
+        """
+        for n in range(len(self.leg_list)):
+            self.calculate_leg_price(n)
+
+        self.sum_leg_price()
+
+    def update_leg_price(self, vt_symbol: str):
+        """
+        Recalculate contribution of the leg with new tick only,
+        and then spread price.
+        """
+        self.calculate_leg_price(self.leg_index[vt_symbol])
+        self.sum_leg_price()
+
+    def calculate_leg_price(self, n: int):
         """"""
-        self.clear_price()
+        leg = self.leg_list[n]
+
+        # Filter leg price data not received
+        if not leg.bid_volume or not leg.ask_volume:
+            self.leg_ready[n] = False
+            return
+
+        # Calculate price
+        price_multiplier = self.leg_price_multipliers[n]
+        if price_multiplier > 0:
+            self.leg_bid_prices[n] = leg.bid_price * price_multiplier
+            self.leg_ask_prices[n] = leg.ask_price * price_multiplier
+        else:
+            self.leg_bid_prices[n] = leg.ask_price * price_multiplier
+            self.leg_ask_prices[n] = leg.bid_price * price_multiplier
 
-        # Go through all legs to calculate price
-        for n, leg in enumerate(self.legs.values()):
-            # Filter not all leg price data has been received
-            if not leg.bid_volume or not leg.ask_volume:
-                self.clear_price()
-                return
+        # Calculate volume
+        if not self.leg_inverses[n]:
+            leg_bid_volume = leg.bid_volume
+            leg_ask_volume = leg.ask_volume
+        else:
+            leg_bid_volume = calculate_inverse_volume(
+                leg.bid_volume, leg.bid_price, leg.size)
+            leg_ask_volume = calculate_inverse_volume(
+                leg.ask_volume, leg.ask_price, leg.size)
+
+        volume_divisor = self.leg_volume_divisors[n]
+        self.leg_bid_volumes[n] = floor_volume(
+            leg_bid_volume / volume_divisor,
+            self.min_volume
+        )
+        self.leg_ask_volumes[n] = floor_volume(
+            leg_ask_volume / volume_divisor,
+            self.min_volume
+        )
 
-            # Calculate price
-            price_multiplier = self.price_multipliers[leg.vt_symbol]
-            if price_multiplier > 0:
-                self.bid_price += leg.bid_price * price_multiplier
-                self.ask_price += leg.ask_price * price_multiplier
-            else:
-                self.bid_price += leg.ask_price * price_multiplier
-                self.ask_price += leg.bid_price * price_multiplier
+        self.leg_ready[n] = True
 
-            # Calculate volume
-            trading_multiplier = self.trading_multipliers[leg.vt_symbol]
-            inverse_contract = self.inverse_contracts[leg.vt_symbol]
+    def sum_leg_price(self):
+        """"""
+        # Filter not all leg price data has been received
+        if not all(self.leg_ready):
+            self.clear_price()
+            return
 
-            if not inverse_contract:
-                leg_bid_volume = leg.bid_volume
-                leg_ask_volume = leg.ask_volume
-            else:
-                leg_bid_volume = calculate_inverse_volume(
-                    leg.bid_volume, leg.bid_price, leg.size)
-                leg_ask_volume = calculate_inverse_volume(
-                    leg.ask_volume, leg.ask_price, leg.size)
+        self.bid_price = sum(self.leg_bid_prices)
+        self.ask_price = sum(self.leg_ask_prices)
 
-            if trading_multiplier > 0:
-                adjusted_bid_volume = floor_to(
-                    leg_bid_volume / trading_multiplier,
-                    self.min_volume
-                )
-                adjusted_ask_volume = floor_to(
-                    leg_ask_volume / trading_multiplier,
-                    self.min_volume
-                )
-            else:
-                adjusted_bid_volume = floor_to(
-                    leg_bid_volume / abs(trading_multiplier),
-                    self.min_volume
-                )
-                adjusted_ask_volume = floor_to(
-                    leg_ask_volume / abs(trading_multiplier),
-                    self.min_volume
-                )
-
-            # For the first leg, just initialize
-            if not n:
-                self.bid_volume = adjusted_bid_volume
-                self.ask_volume = adjusted_ask_volume
-            # For following legs, use min value of each leg quoting volume
-            else:
-                self.bid_volume = min(self.bid_volume, adjusted_bid_volume)
-                self.ask_volume = min(self.ask_volume, adjusted_ask_volume)
+        # Use min value of each leg quoting volume
+        self.bid_volume = min(self.leg_bid_volumes)
+        self.ask_volume = min(self.leg_ask_volumes)
 
-            # Update calculate time
-            self.datetime = datetime.now()
+        # Update calculate time
+        self.datetime = datetime.now()
 
     def calculate_pos(self):
         """"""
@@ -343,6 +390,14 @@ class SpreadData:
         return leg.size
 
 
+@lru_cache(maxsize=10000)
+def floor_volume(volume: float, min_volume: float) -> float:
+    """
+    Cached floor_to for quoting volume, which repeats frequently.
+    """
+    return floor_to(volume, min_volume)
+
+
 def calculate_inverse_volume(
     original_volume: float,
     price: float,
@@ -359,60 +414,122 @@ class BacktestingMode(Enum):
     TICK = 2
 
 
+def round_to_array(values: np.ndarray, target: float) -> np.ndarray:
+    """
+    Vectorized round_to.
+    """
+    ticks = values / target
+    decimals = max(0, -Decimal(str(target)).as_tuple().exponent)
+    result = np.round(np.round(ticks) * target, decimals)
+
+    # Float division can not tell ties, use round_to for values near them
+    near = np.flatnonzero(np.abs(np.abs(ticks - np.trunc(ticks)) - 0.5) < 1e-6)
+    for ix in near.tolist():
+        result[ix] = round_to(float(values[ix]), target)
+
+    return result
+
+
 @lru_cache(maxsize=999)
-def load_bar_data(
+def load_bar_array(
     spread: SpreadData,
     interval: Interval,
     start: datetime,
     end: datetime,
     pricetick: float = 0
-):
-    """"""
+) -> Dict[str, np.ndarray]:
+    """
+    Load bar data of each spread leg as arrays, and join them on datetime.
+    Only datetime with bar of all legs is kept.
+
+    Return dict of arrays:
+        datetime, open_price, high_price, low_price, close_price of spread
+        and close price of each leg keyed by vt_symbol.
+
+    Spread open and close are calculated from leg open and close. High and
+    low of spread can not be recovered from leg bars, so the range of open
+    and close is used.
+    """
     # Load bar data of each spread leg
-    leg_bars: Dict[str, Dict] = {}
+    leg_arrays: Dict[str, Dict[str, np.ndarray]] = {}
 
     for vt_symbol in spread.legs.keys():
         symbol, exchange = extract_vt_symbol(vt_symbol)
 
-        bar_data: List[BarData] = database_manager.load_bar_data(
+        leg_arrays[vt_symbol] = database_manager.load_bar_array(
             symbol, exchange, interval, start, end
         )
 
-        bars: Dict[datetime, BarData] = {bar.datetime: bar for bar in bar_data}
-        leg_bars[vt_symbol] = bars
+    # Datetime available for all legs
+    datetimes = None
+    for data in leg_arrays.values():
+        if datetimes is None:
+            datetimes = data["datetime"]
+        else:
+            datetimes = np.intersect1d(datetimes, data["datetime"])
+
+    # Calculate spread price with aligned leg price
+    spread_open = np.zeros(len(datetimes))
+    spread_close = np.zeros(len(datetimes))
+    result = {"datetime": datetimes}
 
-    # Calculate spread bar data
-    spread_bars: List[BarData] = []
+    for vt_symbol, data in leg_arrays.items():
+        # Use the last bar of duplicated datetime
+        ix = np.searchsorted(data["datetime"], datetimes, side="right") - 1
 
-    for dt in bars.keys():
-        spread_price = 0
-        spread_available = True
+        leg_close = data["close_price"][ix]
+        result[vt_symbol] = leg_close
 
-        for leg in spread.legs.values():
-            leg_bar = leg_bars[leg.vt_symbol].get(dt, None)
+        price_multiplier = spread.price_multipliers[vt_symbol]
+        spread_open = spread_open + price_multiplier * data["open_price"][ix]
+        spread_close = spread_close + price_multiplier * leg_close
 
-            if leg_bar:
-                price_multiplier = spread.price_multipliers[leg.vt_symbol]
-                spread_price += price_multiplier * leg_bar.close_price
-            else:
-                spread_available = False
-
-        if spread_available:
-            if pricetick:
-                spread_price = round_to(spread_price, pricetick)
-
-            spread_bar = BarData(
-                symbol=spread.name,
-                exchange=exchange.LOCAL,
-                datetime=dt,
-                interval=interval,
-                open_price=spread_price,
-                high_price=spread_price,
-                low_price=spread_price,
-                close_price=spread_price,
-                gateway_name="SPREAD",
-            )
-            spread_bars.append(spread_bar)
+    if pricetick:
+        spread_open = round_to_array(spread_open, pricetick)
+        spread_close = round_to_array(spread_close, pricetick)
+
+    result["open_price"] = spread_open
+    result["high_price"] = np.maximum(spread_open, spread_close)
+    result["low_price"] = np.minimum(spread_open, spread_close)
+    result["close_price"] = spread_close
+
+    # Arrays are shared by cache
+    for array in result.values():
+        array.flags.writeable = False
+
+    return result
+
+
+@lru_cache(maxsize=999)
+def load_bar_data(
+    spread: SpreadData,
+    interval: Interval,
+    start: datetime,
+    end: datetime,
+    pricetick: float = 0
+):
+    """"""
+    data = load_bar_array(spread, interval, start, end, pricetick)
+
+    # Calculate spread bar data
+    spread_bars: List[BarData] = []
+
+    for dt, spread_price in zip(
+        data["datetime"].tolist(),
+        data["close_price"].tolist()
+    ):
+        spread_bar = BarData(
+            symbol=spread.name,
+            exchange=Exchange.LOCAL,
+            datetime=dt,
+            interval=interval,
+            open_price=spread_price,
+            high_price=spread_price,
+            low_price=spread_price,
+            close_price=spread_price,
+            gateway_name="SPREAD",
+        )
+        spread_bars.append(spread_bar)
 
     return spread_bars
 
@@ -167,10 +167,13 @@ class SpreadDataEngine:
         leg = self.legs.get(tick.vt_symbol, None)
         if not leg:
             return
-        leg.update_tick(tick)
+
+        # Spread price not changed if top of order book not changed
+        if not leg.update_tick(tick):
+            return
 
         for spread in self.symbol_spread_map[tick.vt_symbol]:
-            spread.calculate_price()
+            spread.update_leg_price(tick.vt_symbol)
             self.put_data_event(spread)
 
     def process_position_event(self, event: Event) -> None:
@@ -208,6 +211,10 @@ class SpreadDataEngine:
             # Update contract data
             leg.update_contract(contract)
 
+            # Volume of inverse contract depends on contract size
+            for spread in self.symbol_spread_map[contract.vt_symbol]:
+                spread.calculate_price()
+
             req = SubscribeRequest(
                 contract.symbol, contract.exchange
             )
@@ -294,6 +301,9 @@ class SpreadDataEngine:
         for leg in spread.legs.values():
             self.symbol_spread_map[leg.vt_symbol].append(spread)
 
+        # Legs may have received tick before
+        spread.calculate_price()
+
         if save:
             self.save_setting()
 
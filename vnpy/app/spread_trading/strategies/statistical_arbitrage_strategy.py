@@ -1,3 +1,8 @@
+from typing import Dict
+
+import numpy as np
+import talib
+
 from vnpy.trader.utility import BarGenerator, ArrayManager
 from vnpy.app.spread_trading import (
     SpreadStrategyTemplate,
@@ -55,6 +60,11 @@ class StatisticalArbitrageStrategy(SpreadStrategyTemplate):
         self.bg = BarGenerator(self.on_spread_bar)
         self.am = ArrayManager()
 
+        self.close_array: np.ndarray = None
+        self.boll_mid_array: np.ndarray = None
+        self.boll_up_array: np.ndarray = None
+        self.boll_down_array: np.ndarray = None
+
     def on_init(self):
         """
         Callback when strategy is inited.
@@ -104,33 +114,64 @@ class StatisticalArbitrageStrategy(SpreadStrategyTemplate):
         self.boll_up, self.boll_down = self.am.boll(
             self.boll_window, self.boll_dev)
 
+        self.check_signal(bar.close_price)
+
+    def on_spread_array(self, data: Dict[str, np.ndarray]):
+        """
+        Callback of spread bar arrays before fast backtesting replay.
+        """
+        self.close_array = data["close_price"]
+
+        self.boll_mid_array = talib.SMA(self.close_array, self.boll_window)
+        std_array = talib.STDDEV(self.close_array, self.boll_window)
+        self.boll_up_array = self.boll_mid_array + std_array * self.boll_dev
+        self.boll_down_array = self.boll_mid_array - std_array * self.boll_dev
+
+    def on_spread_array_bar(self, ix: int):
+        """
+        Callback when new spread bar is replayed in fast backtesting.
+        """
+        self.stop_all_algos()
+
+        # Same as ArrayManager inited
+        if ix < self.am.size - 1:
+            return
+
+        self.boll_mid = self.boll_mid_array[ix]
+        self.boll_up = self.boll_up_array[ix]
+        self.boll_down = self.boll_down_array[ix]
+
+        self.check_signal(self.close_array[ix])
+
+    def check_signal(self, close_price: float):
+        """"""
         if not self.spread_pos:
-            if bar.close_price >= self.boll_up:
+            if close_price >= self.boll_up:
                 self.start_short_algo(
-                    bar.close_price - 10,
+                    close_price - 10,
                     self.max_pos,
                     payup=self.payup,
                     interval=self.interval
                 )
-            elif bar.close_price <= self.boll_down:
+            elif close_price <= self.boll_down:
                 self.start_long_algo(
-                    bar.close_price + 10,
+                    close_price + 10,
                     self.max_pos,
                     payup=self.payup,
                     interval=self.interval
                 )
         elif self.spread_pos < 0:
-            if bar.close_price <= self.boll_mid:
+            if close_price <= self.boll_mid:
                 self.start_long_algo(
-                    bar.close_price + 10,
+                    close_price + 10,
                     abs(self.spread_pos),
                     payup=self.payup,
                     interval=self.interval
                 )
         else:
-            if bar.close_price >= self.boll_mid:
+            if close_price >= self.boll_mid:
                 self.start_short_algo(
-                    bar.close_price - 10,
+                    close_price - 10,
                     abs(self.spread_pos),
                     payup=self.payup,
                     interval=self.interval
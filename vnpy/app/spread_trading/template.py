@@ -3,6 +3,8 @@ from collections import defaultdict
 from typing import Dict, List, Set, Callable
 from copy import copy
 
+import numpy as np
+
 from vnpy.trader.object import (
     TickData, TradeData, OrderData, ContractData, BarData
 )
@@ -450,6 +452,22 @@ class SpreadStrategyTemplate:
         """
         pass
 
+    @virtual
+    def on_spread_array(self, data: Dict[str, np.ndarray]):
+        """
+        Callback of spread bar arrays before fast backtesting replay,
+        for calculating indicators of all bars at once.
+        """
+        pass
+
+    @virtual
+    def on_spread_array_bar(self, ix: int):
+        """
+        Callback when new spread bar is replayed in fast backtesting,
+        with index of the bar in spread bar arrays.
+        """
+        pass
+
     @virtual
     def on_spread_pos(self):
         """
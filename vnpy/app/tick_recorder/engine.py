@@ -5,6 +5,7 @@ tick 文件记录
 import os
 import csv
 from threading import Thread
+from typing import Callable
 from queue import Queue, Empty
 from copy import copy
 from collections import defaultdict
@@ -21,6 +22,7 @@ from vnpy.trader.object import (
 from vnpy.trader.event import EVENT_TICK, EVENT_CONTRACT
 from vnpy.trader.utility import load_json, save_json
 from vnpy.app.spread_trading.base import EVENT_SPREAD_DATA, SpreadData
+from .tick_file import append_ticks_to_bin_file, TICK_FILE_SUFFIX
 
 
 APP_NAME = "DataRecorder"
@@ -31,12 +33,17 @@ EVENT_RECORDER_UPDATE = "eRecorderUpdate"
 
 class TickFileRecorder(object):
     """ Tick 文件保存"""
-    def __init__(self, tick_folder: str):
+    def __init__(self, tick_folder: str, file_format: str = 'csv', write_log: Callable = print):
 
         self.tick_dict = defaultdict(list)   # symbol_hour_min: []
 
         self.tick_folder = tick_folder
 
+        # 文件格式: csv 文本(默认), bin 二进制定长记录(见tick_file.py)
+        self.file_format = file_format
+
+        self.write_log = write_log
+
         self.last_minute = 0
 
     def save_tick_data(self, tick_list: list = []):
@@ -61,17 +68,38 @@ class TickFileRecorder(object):
 
             self.append_ticks_2_file(symbol=vt_symbol, tick_list=tick_list)
 
+    def get_file_folder(self, trading_day: str):
+        """获取交易日的文件目录"""
+        file_folder = os.path.abspath(os.path.join(self.tick_folder, trading_day.replace('-', '/')))
+        if not os.path.exists(file_folder):
+            os.makedirs(file_folder)
+        return file_folder
+
     def append_ticks_2_file(self, symbol: str, tick_list: list):
-        """创建/追加tick list 到csv文件"""
+        """创建/追加tick list 到文件"""
         if len(tick_list) == 0:
             return
 
+        if self.file_format == 'bin':
+            self.append_ticks_2_bin_file(symbol, tick_list)
+        else:
+            self.append_ticks_2_csv_file(symbol, tick_list)
+
+    def append_ticks_2_bin_file(self, symbol: str, tick_list: list):
+        """创建/追加tick list 到二进制文件"""
         trading_day = tick_list[0].trading_day
+        file_folder = self.get_file_folder(trading_day)
+        file_name = os.path.abspath(os.path.join(file_folder, f'{symbol}_{trading_day}.{TICK_FILE_SUFFIX}'))
 
-        file_folder = os.path.abspath(os.path.join(self.tick_folder, trading_day.replace('-', '/')))
-        if not os.path.exists(file_folder):
-            os.makedirs(file_folder)
+        try:
+            append_ticks_to_bin_file(file_name, tick_list)
+        except Exception as ex:
+            self.write_log(f'write data into {file_name} exception:{str(ex)}')
 
+    def append_ticks_2_csv_file(self, symbol: str, tick_list: list):
+        """创建/追加tick list 到csv文件"""
+        trading_day = tick_list[0].trading_day
+        file_folder = self.get_file_folder(trading_day)
         file_name = os.path.abspath(os.path.join(file_folder, f'{symbol}_{trading_day}.csv'))
 
         dict_fieldnames = sorted(list(tick_list[0].__dict__))
@@ -115,10 +143,11 @@ class TickRecorderEngine(BaseEngine):
 
         self.tick_recordings = {}
         self.tick_folder = ''
+        self.tick_file_format = 'csv'
 
         self.load_setting()
 
-        self.tick_recorder = TickFileRecorder(self.tick_folder)
+        self.tick_recorder = TickFileRecorder(self.tick_folder, self.tick_file_format, self.write_log)
 
         self.register_event()
         self.start()
@@ -129,11 +158,14 @@ class TickRecorderEngine(BaseEngine):
         setting = load_json(self.setting_filename)
         self.tick_recordings = setting.get("tick", {})
         self.tick_folder = setting.get('tick_folder', os.getcwd())
+        self.tick_file_format = setting.get('tick_file_format', self.tick_file_format)
 
     def save_setting(self):
         """"""
         setting = {
-            "tick": self.tick_recordings
+            "tick": self.tick_recordings,
+            "tick_folder": self.tick_folder,
+            "tick_file_format": self.tick_file_format
         }
         save_json(self.setting_filename, setting)
 
@@ -0,0 +1,236 @@
+"""
+二进制tick文件
+华富资产
+
+文件格式:
+    8字节 magic: b'VNTICK01'
+    4字节 header长度(uint32, little endian)
+    header: json，包含合约、交易日、字段列表(名称、类型、价格放大倍数)
+    补齐到8字节
+    定长记录，按写入顺序(时间)排列
+
+datetime保存为int64微秒，价格保存为int32(价格 * price_scale)，数量保存为float64。
+无效价格(如CTP未设置时的DBL_MAX、inf、nan)及超出范围的价格保存为0。
+读取时使用内存映射，按需转换为numpy结构数组或TickData。
+"""
+import json
+import os
+import struct
+from datetime import datetime
+from typing import Iterator, List
+
+import numpy as np
+
+from vnpy.trader.constant import Exchange
+from vnpy.trader.object import TickData
+
+TICK_FILE_MAGIC = b'VNTICK01'
+TICK_FILE_SUFFIX = 'tick'
+
+# 价格字段，int32保存
+PRICE_FIELDS = [
+    'last_price', 'limit_up', 'limit_down',
+    'open_price', 'high_price', 'low_price', 'pre_close',
+    'bid_price_1', 'bid_price_2', 'bid_price_3', 'bid_price_4', 'bid_price_5',
+    'ask_price_1', 'ask_price_2', 'ask_price_3', 'ask_price_4', 'ask_price_5',
+]
+
+# 数量字段，float64保存
+VOLUME_FIELDS = [
+    'volume', 'open_interest', 'last_volume',
+    'bid_volume_1', 'bid_volume_2', 'bid_volume_3', 'bid_volume_4', 'bid_volume_5',
+    'ask_volume_1', 'ask_volume_2', 'ask_volume_3', 'ask_volume_4', 'ask_volume_5',
+]
+
+DEFAULT_PRICE_SCALE = 10000
+INT32_MAX = np.iinfo(np.int32).max
+
+
+def is_valid_price(price: float) -> bool:
+    """价格是否有效，CTP对未设置的价格推送DBL_MAX"""
+    return price is not None and abs(price) <= INT32_MAX
+
+
+def get_price_scale(tick_list: List[TickData], price_scale: int = DEFAULT_PRICE_SCALE) -> int:
+    """
+    确定价格放大倍数，最大价格放大10倍后仍不超过int32范围(忽略无效价格)
+    """
+    prices = [getattr(tick, name) for tick in tick_list for name in PRICE_FIELDS]
+    max_price = max([abs(price) for price in prices if is_valid_price(price)] + [1])
+    while price_scale > 1 and max_price * 10 * price_scale > INT32_MAX:
+        price_scale //= 10
+    return price_scale
+
+
+def make_header(tick: TickData, price_scale: int) -> dict:
+    """生成文件头"""
+    fields = [['datetime', '<i8', 0]]
+    fields.extend([[name, '<i4', price_scale] for name in PRICE_FIELDS])
+    fields.extend([[name, '<f8', 0] for name in VOLUME_FIELDS])
+
+    return {
+        'version': 1,
+        'symbol': tick.symbol,
+        'exchange': tick.exchange.value,
+        'name': tick.name,
+        'trading_day': tick.trading_day,
+        'price_scale': price_scale,
+        'fields': fields
+    }
+
+
+def header_dtype(header: dict) -> np.dtype:
+    """根据文件头生成记录的结构类型"""
+    return np.dtype([(name, dtype) for name, dtype, _ in header['fields']])
+
+
+def write_header(f, header: dict):
+    """"""
+    content = json.dumps(header).encode('utf8')
+    size = len(TICK_FILE_MAGIC) + 4 + len(content)
+    padding = b' ' * (-size % 8)
+    f.write(TICK_FILE_MAGIC)
+    f.write(struct.pack('<I', len(content) + len(padding)))
+    f.write(content + padding)
+
+
+def read_header(file_name: str):
+    """
+    读取文件头
+    :return: header, 记录开始的偏移量
+    """
+    with open(file_name, 'rb') as f:
+        magic = f.read(len(TICK_FILE_MAGIC))
+        if magic != TICK_FILE_MAGIC:
+            raise ValueError(f'{file_name}不是tick二进制文件')
+        length = struct.unpack('<I', f.read(4))[0]
+        header = json.loads(f.read(length).decode('utf8'))
+
+    return header, len(TICK_FILE_MAGIC) + 4 + length
+
+
+def to_timestamp(dt: datetime) -> int:
+    """datetime转换为int64微秒"""
+    return int(np.datetime64(dt.replace(tzinfo=None), 'us').astype(np.int64))
+
+
+def ticks_to_records(tick_list: List[TickData], header: dict) -> np.ndarray:
+    """TickData列表转换为定长记录"""
+    dtype = header_dtype(header)
+    records = np.zeros(len(tick_list), dtype=dtype)
+
+    records['datetime'] = [to_timestamp(tick.datetime) for tick in tick_list]
+    for name, _, scale in header['fields'][1:]:
+        values = np.array([getattr(tick, name, 0) or 0 for tick in tick_list], dtype=np.float64)
+        if scale:
+            with np.errstate(over='ignore', invalid='ignore'):
+                values = np.round(values * scale)
+                # 无效或超出范围的价格保存为0
+                values[~(np.abs(values) <= INT32_MAX)] = 0
+        records[name] = values
+
+    return records
+
+
+def append_ticks_to_bin_file(file_name: str, tick_list: List[TickData]):
+    """
+    创建/追加tick list到二进制文件
+    """
+    if len(tick_list) == 0:
+        return
+
+    if os.path.exists(file_name) and os.path.getsize(file_name) > 0:
+        header, _ = read_header(file_name)
+        records = ticks_to_records(tick_list, header)
+        with open(file_name, 'ab') as f:
+            f.write(records.tobytes())
+    else:
+        header = make_header(tick_list[0], get_price_scale(tick_list))
+        records = ticks_to_records(tick_list, header)
+        with open(file_name, 'wb') as f:
+            write_header(f, header)
+            f.write(records.tobytes())
+
+
+class TickFileReader(object):
+    """
+    tick二进制文件读取
+    使用内存映射，记录在访问时才从磁盘读取
+    """
+
+    def __init__(self, file_name: str):
+        self.file_name = file_name
+        self.header, self.offset = read_header(file_name)
+        self.dtype = header_dtype(self.header)
+        self.symbol = self.header['symbol']
+        self.exchange = Exchange(self.header['exchange'])
+        self.name = self.header.get('name', '')
+        self.trading_day = self.header.get('trading_day', '')
+
+        # 只映射完整的记录，正在写入的不完整记录忽略
+        count = (os.path.getsize(file_name) - self.offset) // self.dtype.itemsize
+        if count > 0:
+            self.records = np.memmap(file_name, dtype=self.dtype, mode='r', offset=self.offset, shape=(count,))
+        else:
+            self.records = np.zeros(0, dtype=self.dtype)
+
+    def __len__(self):
+        return len(self.records)
+
+    def get_records(self, start: datetime = None, end: datetime = None) -> np.ndarray:
+        """
+        获取原始记录(内存映射)，start <= datetime <= end
+        """
+        records = self.records
+        timestamps = records['datetime']
+        ix_start = np.searchsorted(timestamps, to_timestamp(start), side='left') if start else 0
+        ix_end = np.searchsorted(timestamps, to_timestamp(end), side='right') if end else len(records)
+        return records[ix_start:ix_end]
+
+    def get_array(self, start: datetime = None, end: datetime = None) -> np.ndarray:
+        """
+        获取numpy结构数组，datetime为datetime64[us]，价格已还原为float64
+        """
+        records = self.get_records(start, end)
+        dtype = [('datetime', 'datetime64[us]')]
+        dtype.extend([(name, np.float64) for name, _, _ in self.header['fields'][1:]])
+
+        data = np.empty(len(records), dtype=dtype)
+        data['datetime'] = records['datetime'].astype('datetime64[us]')
+        for name, _, scale in self.header['fields'][1:]:
+            data[name] = records[name] / scale if scale else records[name]
+
+        return data
+
+    def iter_ticks(self, start: datetime = None, end: datetime = None, batch_size: int = 10000) -> Iterator[TickData]:
+        """
+        逐个生成TickData，每次只转换batch_size条记录
+        """
+        records = self.get_records(start, end)
+        fields = self.header['fields'][1:]
+        names = [name for name, _, _ in fields]
+
+        for i in range(0, len(records), batch_size):
+            batch = np.array(records[i:i + batch_size])
+            datetimes = batch['datetime'].astype('datetime64[us]')
+            # 'YYYY-MM-DDTHH:MM:SS.ffffff'，一次转换整批日期和时间字符串
+            dt_strs = np.datetime_as_string(datetimes, unit='us').tolist()
+            columns = [(batch[name] / scale if scale else batch[name]).tolist() for name, _, scale in fields]
+
+            for dt, dt_str, values in zip(datetimes.tolist(), dt_strs, zip(*columns)):
+                tick = TickData(
+                    gateway_name='',
+                    symbol=self.symbol,
+                    exchange=self.exchange,
+                    datetime=dt,
+                    date=dt_str[:10],
+                    time=dt_str[11:],
+                    trading_day=self.trading_day,
+                    name=self.name,
+                    **dict(zip(names, values))
+                )
+                yield tick
+
+    def load_ticks(self, start: datetime = None, end: datetime = None) -> List[TickData]:
+        """读取全部TickData"""
+        return list(self.iter_ticks(start, end))
@@ -4,7 +4,7 @@
 
 import sys
 from time import sleep
-from pymongo import MongoClient, ASCENDING
+from pymongo import MongoClient, ASCENDING, UpdateOne
 from pymongo.errors import ConnectionFailure, AutoReconnect
 
 
@@ -242,6 +242,45 @@ class MongoData(object):
 
         return None
 
+    def db_update_many(self, db_name, col_name, update_list, upsert=False):
+        """
+        批量更新数据，一次提交到MongoDB
+        :param db_name:
+        :param col_name:
+        :param update_list: [(filter_dict, data_dict)]
+        :param upsert: 若无是否要插入
+        :return: BulkWriteResult, 失败时返回None
+        """
+        if len(update_list) == 0:
+            return None
+        try:
+            if self.db_client:
+                db = self.db_client[db_name]
+                collection = db[col_name]
+                requests = [UpdateOne(filter_dict, {'$set': data_dict}, upsert=upsert)
+                            for filter_dict, data_dict in update_list]
+                return collection.bulk_write(requests, ordered=False)
+
+            else:
+                self.write_log('db update many fail')
+                if self.db_has_connected:
+                    self.write_log(u'重新尝试连接数据库')
+                    self.db_connect()
+
+        except AutoReconnect as ex:
+            self.write_error(u'数据库连接断开重连:{}'.format(str(ex)))
+            sleep(1)
+        except ConnectionFailure:
+            self.db_client = None
+            self.write_error(u'数据库连接断开')
+            if self.db_has_connected:
+                self.write_log(u'重新尝试连接数据库')
+                self.db_connect()
+        except Exception as ex:
+            self.write_error(u'dbUpdateMany exception:{}'.format(str(ex)))
+
+        return None
+
     def db_delete(self, db_name, col_name, flt):
         """
         向mongodb中，删除数据，flt是过滤条件
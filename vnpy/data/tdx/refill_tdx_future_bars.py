@@ -22,16 +22,20 @@ bar_data_folder = os.path.abspath(os.path.join(vnpy_root, 'bar_data'))
 # 开始日期（每年大概需要几分钟）
 start_date = '20200120'
 
+# 并行下载的连接数
+pool_size = 4
+
 # 创建API对象
 api_01 = TdxFutureData()
 
 # 更新本地合约缓存信息
 api_01.update_mi_contracts()
 
-# 逐一指数合约下载并更新
+# 逐一指数合约确定下载开始时间
+tasks = []
+old_dfs = {}
 for underlying_symbol in api_01.future_contracts.keys():
     index_symbol = underlying_symbol + '99'
-    print(f'开始更新:{index_symbol}')
     # csv数据文件名
     bar_file_path = os.path.abspath(os.path.join(bar_data_folder, f'{underlying_symbol}99_{start_date}_1m.csv'))
 
@@ -49,11 +53,24 @@ for underlying_symbol in api_01.future_contracts.keys():
         start_dt = datetime.strptime(start_date, '%Y%m%d')
         print(f'文件{bar_file_path}不存在，开始时间:{start_date}')
 
-    result, bars = api_01.get_bars(symbol=index_symbol,
-                           period='1min',
-                           callback=None,
-                           start_dt=start_dt,
-                           return_bar=False)
+    old_dfs[index_symbol] = (bar_file_path, df_old)
+    tasks.append({'symbol': index_symbol,
+                  'period': '1min',
+                  'callback': None,
+                  'start_dt': start_dt,
+                  'return_bar': False})
+
+# 多个连接并行下载
+pool = TdxFutureDataPool(pool_size=pool_size)
+results = pool.get_bars(tasks)
+print(f'下载统计:{pool.get_statistics()}')
+
+# 逐一指数合约更新文件
+for task, (result, bars) in zip(tasks, results):
+    index_symbol = task['symbol']
+    bar_file_path, df_old = old_dfs[index_symbol]
+    print(f'开始更新:{index_symbol}')
+
     # [dict] => dataframe
     if not result or len(bars) == 0:
         continue
@@ -15,7 +15,11 @@ import bz2
 import copy
 import traceback
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, time
+from queue import Queue
+from threading import Lock
+from time import sleep
 from logging import ERROR
 from typing import Dict, Callable
 
@@ -91,14 +95,16 @@ def get_tdx_marketid(symbol):
 class TdxFutureData(object):
 
     # ----------------------------------------------------------------------
-    def __init__(self, strategy=None, best_ip={}):
+    def __init__(self, strategy=None, best_ip={}, fixed_ip=False):
         """
         构造函数
         :param strategy: 上层策略，主要用与使用write_log（）
+        :param fixed_ip: 重连时仍使用best_ip，不从缓存重新读取（连接池使用）
         """
         self.api = None
         self.connection_status = False  # 连接状态
         self.best_ip = best_ip
+        self.fixed_ip = fixed_ip
         self.symbol_exchange_dict = {}  # tdx合约与vn交易所的字典
         self.symbol_market_dict = copy.copy(INIT_TDX_MARKET_MAP)  # tdx合约与tdx市场的字典
         self.strategy = strategy
@@ -129,7 +135,7 @@ class TdxFutureData(object):
                 self.api = TdxExHq_API(heartbeat=True, auto_retry=True, raise_exception=True)
 
                 # 选取最佳服务器
-                if is_reconnect or len(self.best_ip) == 0:
+                if (is_reconnect and not self.fixed_ip) or len(self.best_ip) == 0:
                     self.best_ip = get_cache_json(TDX_FUTURE_CONFIG)
                     last_datetime_str = self.best_ip.get('datetime', None)
                     if last_datetime_str:
@@ -799,3 +805,149 @@ class TdxFutureData(object):
 
         if should_save:
             save_future_contracts(self.future_contracts)
+
+
+class TdxFutureDataPool(object):
+    """
+    多连接并行下载
+    1. 对行情服务器测速排序，选取最快的pool_size个服务器，每个服务器一个TdxFutureData连接
+    2. 下载任务分派到空闲连接并行执行
+    3. 任务失败后，退避等待，换一个连接重试，最多max_retry次
+    分笔数据通过TdxFutureData的缓存(save_cache)写入缓存目录
+    """
+
+    def __init__(self,
+                 strategy=None,
+                 pool_size: int = 4,
+                 max_retry: int = 3,
+                 retry_interval: float = 1,
+                 client_class=TdxFutureData):
+        self.strategy = strategy
+        self.pool_size = pool_size
+        self.max_retry = max_retry
+        self.retry_interval = retry_interval
+        self.client_class = client_class
+
+        self.clients = []
+        self.idle_clients = Queue()
+
+        # 统计
+        self.lock = Lock()
+        self.task_count = 0
+        self.failed_count = 0
+        self.retried_count = 0
+
+    def write_log(self, content):
+        if self.strategy:
+            self.strategy.write_log(content)
+        else:
+            print(content)
+
+    def write_error(self, content):
+        if self.strategy:
+            self.strategy.write_log(content, level=ERROR)
+        else:
+            print(content, file=sys.stderr)
+
+    def select_best_ips(self):
+        """
+        并行测速所有行情服务器，返回最快的pool_size个
+        """
+        api = self.client_class(self.strategy)
+        with ThreadPoolExecutor(max_workers=len(TDX_FUTURE_HOSTS)) as executor:
+            timings = list(executor.map(lambda x: api.ping(x['ip'], x['port']), TDX_FUTURE_HOSTS))
+
+        ranked = sorted(zip(timings, range(len(TDX_FUTURE_HOSTS))))
+        best_ips = [copy.copy(TDX_FUTURE_HOSTS[i]) for timing, i in ranked
+                    if timing < timedelta(9, 9, 0)][:self.pool_size]
+
+        self.write_log(u'选取服务器:{}'.format(['{}:{}'.format(x['ip'], x['port']) for x in best_ips]))
+        return best_ips
+
+    def connect(self, best_ips: list = None):
+        """
+        创建连接池，best_ips不指定时自动测速选取
+        """
+        if self.clients:
+            return
+
+        if best_ips is None:
+            best_ips = self.select_best_ips()
+
+        for best_ip in best_ips[:self.pool_size]:
+            # 每个连接固定使用自己的服务器，出错重连时不会切换到缓存的同一服务器
+            client = self.client_class(self.strategy, best_ip=best_ip, fixed_ip=True)
+            client.connect()
+            if client.connection_status:
+                self.clients.append(client)
+                self.idle_clients.put(client)
+
+        self.write_log(u'连接池创建完成，可用连接数:{}'.format(len(self.clients)))
+
+    def run_task(self, method: str, kwargs: dict):
+        """
+        在空闲连接上执行TdxFutureData的方法，失败则退避后换连接重试
+        """
+        result = (False, [])
+        for retry in range(self.max_retry + 1):
+            if retry > 0:
+                with self.lock:
+                    self.retried_count += 1
+                sleep(self.retry_interval * 2 ** (retry - 1))
+
+            client = self.idle_clients.get()
+            try:
+                result = getattr(client, method)(**kwargs)
+            except Exception as ex:
+                self.write_error(u'{}执行异常:{},{}'.format(method, kwargs, str(ex)))
+                result = (False, [])
+            finally:
+                self.idle_clients.put(client)
+
+            if result[0]:
+                return result
+
+        with self.lock:
+            self.failed_count += 1
+        self.write_error(u'{}重试{}次后失败:{}'.format(method, self.max_retry, kwargs))
+        return result
+
+    def run_tasks(self, method: str, tasks: list):
+        """
+        并行执行任务清单
+        :param method: TdxFutureData的方法名，返回 (bool, list)
+        :param tasks: [kwargs]
+        :return: 与tasks顺序对应的结果 [(bool, list)]
+        """
+        self.connect()
+        if not self.clients:
+            self.write_error(u'没有可用的连接')
+            return [(False, []) for _ in tasks]
+
+        self.task_count += len(tasks)
+        with ThreadPoolExecutor(max_workers=len(self.clients)) as executor:
+            futures = [executor.submit(self.run_task, method, kwargs) for kwargs in tasks]
+            return [future.result() for future in futures]
+
+    def get_bars(self, tasks: list):
+        """
+        并行下载多个合约的k线
+        :param tasks: [{'symbol':, 'period':, 'start_dt':, 'end_dt':, 'return_bar':}]，参数同TdxFutureData.get_bars
+        """
+        return self.run_tasks('get_bars', tasks)
+
+    def get_history_transaction_data(self, tasks: list):
+        """
+        并行下载多个合约/交易日的历史分笔数据
+        :param tasks: [{'symbol':, 'trading_date':, 'cache_folder':}]，参数同TdxFutureData.get_history_transaction_data
+        """
+        return self.run_tasks('get_history_transaction_data', tasks)
+
+    def get_statistics(self):
+        """"""
+        return {
+            'client_count': len(self.clients),
+            'task_count': self.task_count,
+            'retried_count': self.retried_count,
+            'failed_count': self.failed_count
+        }
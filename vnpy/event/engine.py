@@ -2,11 +2,11 @@
 Event-driven framework of vn.py framework.
 """
 import sys
-from collections import defaultdict
+from collections import defaultdict, deque
 from queue import Empty, Queue
-from threading import Thread
-from time import sleep, time
-from typing import Any, Callable
+from threading import Event as ThreadEvent, Thread
+from time import perf_counter, sleep
+from typing import Any, Callable, Dict, List, Tuple
 
 EVENT_TIMER = "eTimer"
 
@@ -28,6 +28,132 @@ class Event:
 HandlerType = Callable[[Event], None]
 
 
+def copy_container(container, copy_func: Callable = list):
+    """
+    Copy deque/dict updated by dispatch thread without lock,
+    retry if it is changed during copy.
+    """
+    while True:
+        try:
+            return copy_func(container)
+        except RuntimeError:
+            continue
+
+
+class LatencyStat:
+    """
+    Rolling window of latency samples in microseconds.
+    """
+
+    def __init__(self, window: int = 1000):
+        """"""
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.max = 0.0
+
+    def add(self, value: float):
+        """"""
+        self.samples.append(value)
+        self.count += 1
+        if value > self.max:
+            self.max = value
+
+    def get_data(self) -> dict:
+        """
+        Get count, p50/p99/max of rolling window and max since start.
+        """
+        data = sorted(copy_container(self.samples))
+        n = len(data)
+        if not n:
+            return {"count": self.count, "p50": 0, "p99": 0, "max": 0, "total_max": self.max}
+
+        return {
+            "count": self.count,
+            "p50": data[int(n * 0.50)],
+            "p99": data[min(int(n * 0.99), n - 1)],
+            "max": data[-1],
+            "total_max": self.max
+        }
+
+
+class EventStatistics:
+    """
+    Latency statistics of event engine, collected in debug mode:
+    1. handler execution time, per (event type, handler qualname)
+    2. queue wait time (put -> dispatch), per event type
+    3. event rate, per event type
+    """
+
+    def __init__(self, window: int = 1000):
+        """"""
+        self.window = window
+        self.latencies: Dict[Tuple[str, str], LatencyStat] = {}
+        self.waits: Dict[str, LatencyStat] = {}
+        self.counts: Dict[str, int] = defaultdict(int)
+
+        # Time and counts of last call of each reader
+        self.start_time = perf_counter()
+        self.baselines: Dict[str, Tuple[float, Dict[str, int]]] = {}
+
+    def add_latency(self, type: str, handler_name: str, value: float):
+        """"""
+        key = (type, handler_name)
+        stat = self.latencies.get(key, None)
+        if not stat:
+            stat = LatencyStat(self.window)
+            self.latencies[key] = stat
+        stat.add(value)
+
+    def add_wait(self, type: str, value: float):
+        """"""
+        stat = self.waits.get(type, None)
+        if not stat:
+            stat = LatencyStat(self.window)
+            self.waits[type] = stat
+        stat.add(value)
+
+    def add_event(self, type: str):
+        """"""
+        self.counts[type] += 1
+
+    def get_rates(self, reader: str = "") -> Dict[str, float]:
+        """
+        Get events per second of each type since last call of the same
+        reader, so that readers do not reset the interval of each other.
+        """
+        now = perf_counter()
+        last_time, last_counts = self.baselines.get(reader, (self.start_time, {}))
+        elapsed = now - last_time
+        counts = copy_container(self.counts, dict)
+
+        rates = {}
+        if elapsed > 0:
+            for type, count in counts.items():
+                rates[type] = (count - last_counts.get(type, 0)) / elapsed
+
+        self.baselines[reader] = (now, counts)
+        return rates
+
+    def get_data(self, reader: str = "") -> dict:
+        """"""
+        latencies = copy_container(self.latencies, dict)
+        waits = copy_container(self.waits, dict)
+
+        return {
+            "handler": {f"{type} {name}": stat.get_data() for (type, name), stat in latencies.items()},
+            "wait": {type: stat.get_data() for type, stat in waits.items()},
+            "rate": self.get_rates(reader)
+        }
+
+    def clear(self):
+        """"""
+        self.latencies.clear()
+        self.waits.clear()
+        self.counts.clear()
+        self.start_time = perf_counter()
+        self.baselines.clear()
+
+
 class EventEngine:
     """
     Event engine distributes event object based on its type
@@ -37,7 +163,14 @@ class EventEngine:
     which can be used for timing purpose.
     """
 
-    def __init__(self, interval: int = 1, debug: bool = False, over_ms: int = 500):
+    def __init__(
+        self,
+        interval: int = 1,
+        debug: bool = False,
+        over_ms: int = 500,
+        batch_size: int = 0,
+        dump_interval: int = 0
+    ):
         """
         Timer event is generated every 1 second by default, if
         interval not specified.
@@ -45,13 +178,31 @@ class EventEngine:
             debug: performance debug
             over_ms: over micro seconds for each handler execution.
             add try catch handel event exception
+            dump_interval: >0 时每隔dump_interval秒(随EVENT_TIMER)输出延时统计
+        批量模式：
+            batch_size: >0 时启用批量分发，每次唤醒最多取出batch_size个事件，
+                        按顺序分发，减少队列加锁和线程切换开销
         """
         self._interval = interval
         self._queue = Queue()
         self._active = False
         self._debug = debug
         self._over_ms = over_ms
-        self._thread = Thread(target=self._run)
+        self._dump_interval = dump_interval
+        self._last_dump = perf_counter()
+        self._statistics = EventStatistics()
+
+        # 批量模式：deque的append/popleft在CPython中是原子操作，
+        # 生产者无需加锁，只通过_wakeup唤醒分发线程
+        self._batch_size = batch_size
+        self._buffer = deque()
+        self._wakeup = ThreadEvent()
+        self._high_water = 0
+
+        if self._batch_size > 0:
+            self._thread = Thread(target=self._run_batch)
+        else:
+            self._thread = Thread(target=self._run)
         self._timer = Thread(target=self._run_timer)
         self._handlers = defaultdict(list)
         self._general_handlers = []
@@ -67,15 +218,47 @@ class EventEngine:
             except Empty:
                 pass
 
+    def _run_batch(self):
+        """
+        Drain events from buffer in batches and process them in order.
+        """
+        buffer = self._buffer
+        process = self._process if not self._debug else self._process_debug
+
+        while self._active:
+            self._wakeup.wait(timeout=1)
+            self._wakeup.clear()
+
+            while buffer:
+                depth = len(buffer)
+                if depth > self._high_water:
+                    self._high_water = depth
+
+                count = min(depth, self._batch_size)
+                batch = [buffer.popleft() for _ in range(count)]
+
+                for event in batch:
+                    try:
+                        process(event)
+                    except Exception as ex:
+                        print(f'运行 {event.type} 异常:{str(ex)}', file=sys.stderr)
+
     def _process_debug(self, event: Event):
         """
         process event with debug mode:
         1.performance
         2.try catch exception
+        3.latency statistics
 
         """
+        t0 = perf_counter()
+        put_time = getattr(event, "put_time", None)
+        if put_time:
+            self._statistics.add_wait(event.type, (t0 - put_time) * 1000000)
+        self._statistics.add_event(event.type)
+
         for handler in self._handlers[event.type]:
-            t1 = time()
+            t1 = perf_counter()
             handler_name = str(handler.__qualname__)
             try:
                 handler(event)
@@ -83,23 +266,28 @@ class EventEngine:
                 print(f'运行 {event.type} {handler_name} 异常:{str(ex)}',
                       file=sys.stderr)
                 continue
-            t2 = time()
-            execute_ms = (int(round(t2 * 1000))) - (int(round(t1 * 1000)))
-            if execute_ms > self._over_ms:
-                print(f'运行{event.type} {handler_name} 耗时:{execute_ms}ms >{self._over_ms}ms',
+            execute_us = (perf_counter() - t1) * 1000000
+            self._statistics.add_latency(event.type, handler_name, execute_us)
+            if execute_us > self._over_ms * 1000:
+                print(f'运行{event.type} {handler_name} 耗时:{execute_us / 1000:.3f}ms >{self._over_ms}ms',
                       file=sys.stderr)
 
         if self._general_handlers:
             for handler in self._general_handlers:
-                t1 = time()
+                t1 = perf_counter()
                 handler_name = str(handler.__qualname__)
                 handler(event)
-                t2 = time()
-                execute_ms = (int(round(t2 * 1000))) - (int(round(t1 * 1000)))
-                if execute_ms > self._over_ms:
-                    print(f'运行 general {event.type} {handler_name} 耗时:{execute_ms}ms > {self._over_ms}ms',
+                execute_us = (perf_counter() - t1) * 1000000
+                self._statistics.add_latency(event.type, handler_name, execute_us)
+                if execute_us > self._over_ms * 1000:
+                    print(f'运行 general {event.type} {handler_name} 耗时:{execute_us / 1000:.3f}ms > {self._over_ms}ms',
                           file=sys.stderr)
 
+        if event.type == EVENT_TIMER and self._dump_interval > 0:
+            if t0 - self._last_dump >= self._dump_interval:
+                self._last_dump = t0
+                self.dump_statistics()
+
     def _process(self, event: Event):
         """
         First ditribute event to those handlers registered listening
@@ -136,6 +324,7 @@ class EventEngine:
         Stop event engine.
         """
         self._active = False
+        self._wakeup.set()
         self._timer.join()
         self._thread.join()
 
@@ -143,7 +332,75 @@ class EventEngine:
         """
         Put an event object into event queue.
         """
-        self._queue.put(event)
+        if self._debug:
+            event.put_time = perf_counter()
+
+        if self._batch_size > 0:
+            self._buffer.append(event)
+            self._wakeup.set()
+        else:
+            self._queue.put(event)
+
+    def get_queue_size(self) -> int:
+        """
+        Get number of events waiting to be processed.
+        """
+        if self._batch_size > 0:
+            return len(self._buffer)
+        else:
+            return self._queue.qsize()
+
+    def get_high_water(self) -> int:
+        """
+        Get the max queue depth seen by dispatch thread (batch mode only).
+        """
+        return self._high_water
+
+    def reset_high_water(self):
+        """
+        Reset the high-water mark of queue depth.
+        """
+        self._high_water = 0
+
+    def get_statistics(self, reader: str = "") -> dict:
+        """
+        Get latency statistics (in microseconds) collected in debug mode.
+        Event rate is calculated since last call of the same reader.
+        """
+        data = self._statistics.get_data(reader)
+        data["queue"] = {
+            "size": self.get_queue_size(),
+            "high_water": self._high_water
+        }
+        return data
+
+    def clear_statistics(self):
+        """
+        Clear latency statistics.
+        """
+        self._statistics.clear()
+
+    def dump_statistics(self):
+        """
+        Print latency statistics to stderr.
+        """
+        data = self.get_statistics("dump")
+
+        lines = [f'事件引擎统计 队列:{data["queue"]["size"]} 最高:{data["queue"]["high_water"]}']
+        for type, rate in sorted(data["rate"].items()):
+            wait = data["wait"].get(type, {})
+            lines.append(
+                f'  事件 {type} {rate:.1f}/s 排队 p50:{wait.get("p50", 0):.0f}us '
+                f'p99:{wait.get("p99", 0):.0f}us max:{wait.get("max", 0):.0f}us'
+            )
+
+        for name, d in sorted(data["handler"].items(), key=lambda item: item[1]["p99"], reverse=True):
+            lines.append(
+                f'  处理 {name} 次数:{d["count"]} p50:{d["p50"]:.0f}us '
+                f'p99:{d["p99"]:.0f}us max:{d["max"]:.0f}us'
+            )
+
+        print("\n".join(lines), file=sys.stderr)
 
     def register(self, type: str, handler: HandlerType):
         """
@@ -180,3 +437,116 @@ class EventEngine:
         """
         if handler in self._general_handlers:
             self._general_handlers.remove(handler)
+
+
+class ShardedEventEngine(EventEngine):
+    """
+    Event engine which distributes tick events onto several worker threads.
+
+    Events whose type starts with one of shard_prefixes are hashed by
+    the vt_symbol of event data onto shard_count queues, so events of the
+    same symbol (e.g. eTick. and eTick.rb2010.SHFE) keep their order while
+    different symbols are processed in parallel.
+
+    All other events (order/trade/position/account/timer...) stay on the
+    serialized lane of EventEngine, so OmsEngine and OffsetConverter see
+    them in the same order as before.
+
+    Notice: handlers registered for sharded event types are called from
+    several threads, and must not rely on being called serially across
+    different symbols.
+    """
+
+    def __init__(
+        self,
+        interval: int = 1,
+        debug: bool = False,
+        over_ms: int = 500,
+        batch_size: int = 0,
+        dump_interval: int = 0,
+        shard_count: int = 4,
+        shard_prefixes: Tuple[str, ...] = ("eTick.",)
+    ):
+        """"""
+        super().__init__(interval, debug, over_ms, batch_size, dump_interval)
+
+        self._shard_count = max(shard_count, 1)
+        self._shard_prefixes = tuple(shard_prefixes)
+
+        self._shard_queues = [Queue() for _ in range(self._shard_count)]
+        self._shard_threads = [
+            Thread(target=self._run_shard, args=(queue,))
+            for queue in self._shard_queues
+        ]
+
+        # vt_symbol -> shard queue
+        self._shard_map: Dict[str, Queue] = {}
+
+    def _run_shard(self, queue: Queue):
+        """
+        Get event from shard queue and then process it.
+        """
+        process = self._process if not self._debug else self._process_debug
+
+        while self._active:
+            try:
+                event = queue.get(block=True, timeout=1)
+            except Empty:
+                continue
+
+            try:
+                process(event)
+            except Exception as ex:
+                print(f'运行 {event.type} 异常:{str(ex)}', file=sys.stderr)
+
+    def get_shard_queue(self, key: str) -> Queue:
+        """
+        Get shard queue of a key (vt_symbol).
+        """
+        queue = self._shard_map.get(key, None)
+        if not queue:
+            queue = self._shard_queues[hash(key) % self._shard_count]
+            self._shard_map[key] = queue
+        return queue
+
+    def start(self):
+        """
+        Start serialized lane, timer and all shard threads.
+        """
+        super().start()
+        for thread in self._shard_threads:
+            thread.start()
+
+    def stop(self):
+        """
+        Stop event engine.
+        """
+        super().stop()
+        for thread in self._shard_threads:
+            thread.join()
+
+    def put(self, event: Event):
+        """
+        Put tick event into its shard queue, others into serialized lane.
+        """
+        if event.type.startswith(self._shard_prefixes):
+            key = getattr(event.data, "vt_symbol", None)
+            if key:
+                if self._debug:
+                    event.put_time = perf_counter()
+                self.get_shard_queue(key).put(event)
+                return
+
+        super().put(event)
+
+    def get_queue_size(self) -> int:
+        """
+        Get number of events waiting in serialized lane and all shards.
+        """
+        return super().get_queue_size() + sum(self.get_shard_sizes())
+
+    def get_shard_sizes(self) -> List[int]:
+        """
+        Get number of events waiting in each shard queue.
+        """
+        return [queue.qsize() for queue in self._shard_queues]
@@ -1,5 +1,5 @@
 from vnpy.event import Event
-from vnpy.rpc import RpcClient
+from vnpy.rpc import RpcClient, CODECS
 from vnpy.trader.gateway import BaseGateway
 from vnpy.trader.object import (
     SubscribeRequest,
@@ -16,7 +16,9 @@ class RpcGateway(BaseGateway):
 
     default_setting = {
         "主动请求地址": "tcp://127.0.0.1:2014",
-        "推送订阅地址": "tcp://127.0.0.1:4102"
+        "推送订阅地址": "tcp://127.0.0.1:4102",
+        "编码格式": ["pickle", "binary"],
+        "多帧推送": ["否", "是"]
     }
 
     exchanges = list(Exchange)
@@ -35,6 +37,12 @@ class RpcGateway(BaseGateway):
         req_address = setting["主动请求地址"]
         pub_address = setting["推送订阅地址"]
 
+        # Codec and multipart publish must be the same as RpcService
+        codec = CODECS[setting.get("编码格式", "pickle")]()
+        multipart = setting.get("多帧推送", "否") == "是"
+        self.client = RpcClient(codec, multipart)
+        self.client.callback = self.client_callback
+
         self.client.subscribe_topic("")
         self.client.start(req_address, pub_address)
 
@@ -1,4 +1,3 @@
-from zmq.backend.cython.constants import NOBLOCK
 import signal
 import threading
 import traceback
@@ -8,6 +7,8 @@ from typing import Any, Callable
 
 import zmq
 
+from .codec import PickleCodec, BinaryCodec, CODECS
+
 
 def _(x): return x
 
@@ -42,10 +43,20 @@ class RemoteException(Exception):
 class RpcServer:
     """"""
 
-    def __init__(self):
+    def __init__(self, codec: PickleCodec = None, multipart: bool = False):
         """
         Constructor
+
+        Default codec and single frame publish are compatible with
+        RpcClient of older versions. Use BinaryCodec and multipart
+        only when all clients are updated with the same setting.
         """
+        # Codec used to serialize request, reply and published data
+        self.codec = codec if codec else PickleCodec()
+
+        # Publish topic as a separate frame
+        self.multipart = multipart
+
         # Save functions dict: key is fuction name, value is fuction object
         self.__functions = {}
 
@@ -123,7 +134,7 @@ class RpcServer:
                 continue
 
             # Receive request data from Reply socket
-            req = self.__socket_rep.recv_pyobj()
+            req = self.codec.decode(self.__socket_rep.recv())
 
             # Get function name and parameters
             name, args, kwargs = req
@@ -137,13 +148,19 @@ class RpcServer:
                 rep = [False, traceback.format_exc()]
 
             # send callable response by Reply socket
-            self.__socket_rep.send_pyobj(rep)
+            self.__socket_rep.send(self.codec.encode(rep))
 
     def publish(self, topic: str, data: Any):
         """
         Publish data
+
+        With multipart, topic is sent as the first frame, so that
+        subscribers filter it by zmq subscription before decoding data.
         """
-        self.__socket_pub.send_pyobj([topic, data])
+        if self.multipart:
+            self.__socket_pub.send_multipart([topic.encode("utf-8"), self.codec.encode(data)])
+        else:
+            self.__socket_pub.send(self.codec.encode([topic, data]))
 
     def register(self, func: Callable):
         """
@@ -161,8 +178,12 @@ class RpcServer:
 class RpcClient:
     """"""
 
-    def __init__(self):
+    def __init__(self, codec: PickleCodec = None, multipart: bool = False):
         """Constructor"""
+        # Codec and multipart must be the same as RpcServer
+        self.codec = codec if codec else PickleCodec()
+        self.multipart = multipart
+
         # zmq port related
         self.__context = zmq.Context()
 
@@ -192,8 +213,8 @@ class RpcClient:
 
             # Send request and wait for response
             with self.__lock:
-                self.__socket_req.send_pyobj(req)
-                rep = self.__socket_req.recv_pyobj()
+                self.__socket_req.send(self.codec.encode(req))
+                rep = self.codec.decode(self.__socket_req.recv())
 
             # Return response if successed; Trigger exception if failed
             if rep[0]:
@@ -214,6 +235,10 @@ class RpcClient:
         self.__socket_req.connect(req_address)
         self.__socket_sub.connect(sub_address)
 
+        # Keep alive message is always needed
+        if self.multipart:
+            self.subscribe_topic(KEEP_ALIVE_TOPIC)
+
         # Start RpcClient status
         self.__active = True
 
@@ -230,13 +255,10 @@ class RpcClient:
         if not self.__active:
             return
 
-        # Stop RpcClient status
+        # Stop RpcClient status, sockets are closed after thread exits,
+        # since they can not be closed while polled by the thread
         self.__active = False
 
-        # Close socket
-        self.__socket_req.close()
-        self.__socket_sub.close()
-
     def join(self):
         # Wait for RpcClient thread to exit
         if self.__thread and self.__thread.is_alive():
@@ -254,7 +276,12 @@ class RpcClient:
                 continue
 
             # Receive data from subscribe socket
-            topic, data = self.__socket_sub.recv_pyobj(flags=NOBLOCK)
+            if self.multipart:
+                topic, data = self.__socket_sub.recv_multipart(flags=zmq.NOBLOCK)
+                topic = topic.decode("utf-8")
+                data = self.codec.decode(data)
+            else:
+                topic, data = self.codec.decode(self.__socket_sub.recv(flags=zmq.NOBLOCK))
 
             if topic == KEEP_ALIVE_TOPIC:
                 self._last_received_ping = data
@@ -262,6 +289,11 @@ class RpcClient:
                 # Process data by callable function
                 self.callback(topic, data)
 
+        # Close socket
+        with self.__lock:
+            self.__socket_req.close()
+        self.__socket_sub.close()
+
     @staticmethod
     def _on_unexpected_disconnected():
         print(_("RpcServer has no response over {tolerance} seconds, please check you connection."
@@ -275,6 +307,9 @@ class RpcClient:
 
     def subscribe_topic(self, topic: str):
         """
-        Subscribe data
+        Subscribe data, "" for all topics.
+
+        Topic is matched by prefix with multipart, otherwise only ""
+        receives data.
         """
         self.__socket_sub.setsockopt_string(zmq.SUBSCRIBE, topic)
@@ -0,0 +1,224 @@
+"""
+Serialization codecs of rpc messages.
+"""
+import pickle
+import struct
+from dataclasses import fields
+from datetime import datetime, timedelta
+from enum import Enum
+from typing import Any
+
+from vnpy.event import Event
+from vnpy.trader.object import TickData, OrderData, TradeData, BarData
+
+
+class PickleCodec:
+    """
+    Encode any python object with pickle.
+    """
+
+    def encode(self, obj: Any) -> bytes:
+        """"""
+        return pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def decode(self, data: bytes) -> Any:
+        """"""
+        return pickle.loads(data)
+
+
+EPOCH = datetime(1970, 1, 1)
+ONE_MICROSECOND = timedelta(microseconds=1)
+NONE_TIMESTAMP = -2 ** 63
+
+# Attributes generated by __post_init__, and how they are generated
+DERIVED_NAMES = {
+    "vt_symbol": lambda d: f"{d['symbol']}.{d['exchange'].value}",
+    "vt_orderid": lambda d: f"{d['gateway_name']}.{d['orderid']}",
+    "vt_tradeid": lambda d: f"{d['gateway_name']}.{d['tradeid']}",
+}
+
+TAG_PICKLE = b"P"
+TAG_OBJECT = b"O"
+TAG_EVENT = b"E"
+
+
+class ObjectSchema:
+    """
+    Binary layout of a dataclass type:
+        float fields and datetime fields packed as one struct,
+        followed by length of each string/enum field and utf-8 bytes,
+        followed by pickled dict of other attributes if there is any.
+
+    Attributes computed in __post_init__ (vt_symbol etc.) are generated
+    again when decoding, they are sent only if changed after init.
+    """
+
+    def __init__(self, type_id: int, cls: type):
+        """"""
+        self.type_id = type_id
+        self.cls = cls
+
+        self.float_names = []
+        self.datetime_names = []
+        self.str_names = []
+        self.enum_maps = {}     # name: {value: enum member}
+        self.other_names = []
+
+        for field in fields(cls):
+            if field.type is float:
+                self.float_names.append(field.name)
+            elif field.type is datetime:
+                self.datetime_names.append(field.name)
+            elif field.type is str:
+                self.str_names.append(field.name)
+            elif isinstance(field.type, type) and issubclass(field.type, Enum):
+                self.str_names.append(field.name)
+                self.enum_maps[field.name] = {e.value: e for e in field.type}
+            else:
+                self.other_names.append(field.name)
+
+        self.field_names = set(f.name for f in fields(cls))
+        self.post_init = hasattr(cls, "__post_init__")
+
+        self.head = struct.Struct(
+            "<" + "d" * len(self.float_names)
+            + "q" * len(self.datetime_names)
+            + "H" * len(self.str_names)
+            + "B"
+        )
+
+    def encode(self, obj: Any) -> bytes:
+        """
+        Raise TypeError/struct.error if obj does not match the schema.
+        """
+        d = obj.__dict__
+
+        timestamps = []
+        for name in self.datetime_names:
+            dt = d[name]
+            if dt is None:
+                timestamps.append(NONE_TIMESTAMP)
+            elif dt.tzinfo is None:
+                timestamps.append((dt - EPOCH) // ONE_MICROSECOND)
+            else:
+                raise TypeError("timezone aware datetime")
+
+        strs = []
+        for name in self.str_names:
+            value = d[name]
+            if isinstance(value, Enum):
+                value = value.value
+            strs.append(value.encode("utf-8"))
+
+        others = {k: v for k, v in d.items() if k not in self.field_names and k not in DERIVED_NAMES}
+        for name in self.other_names:
+            others[name] = d[name]
+
+        for name, derive in DERIVED_NAMES.items():
+            if name in d and d[name] != derive(d):
+                others[name] = d[name]
+
+        head = self.head.pack(
+            *[d[name] for name in self.float_names],
+            *timestamps,
+            *[len(s) for s in strs],
+            1 if others else 0
+        )
+        data = head + b"".join(strs)
+
+        if others:
+            data += pickle.dumps(others, protocol=pickle.HIGHEST_PROTOCOL)
+        return data
+
+    def decode(self, data: bytes, offset: int) -> Any:
+        """"""
+        values = self.head.unpack_from(data, offset)
+        offset += self.head.size
+
+        n_float = len(self.float_names)
+        n_datetime = len(self.datetime_names)
+
+        d = dict(zip(self.float_names, values[:n_float]))
+
+        for name, timestamp in zip(self.datetime_names, values[n_float:n_float + n_datetime]):
+            d[name] = None if timestamp == NONE_TIMESTAMP else EPOCH + ONE_MICROSECOND * timestamp
+
+        for name, length in zip(self.str_names, values[n_float + n_datetime:-1]):
+            value = data[offset:offset + length].decode("utf-8")
+            offset += length
+
+            enum_map = self.enum_maps.get(name)
+            if enum_map is not None:
+                value = enum_map.get(value, value)
+            d[name] = value
+
+        others = pickle.loads(data[offset:]) if values[-1] else {}
+        d.update(others)
+
+        obj = self.cls.__new__(self.cls)
+        obj.__dict__.update(d)
+        if self.post_init:
+            obj.__post_init__()
+
+            # Keep derived attributes changed after init
+            for name in DERIVED_NAMES:
+                if name in others:
+                    setattr(obj, name, others[name])
+        return obj
+
+
+class BinaryCodec(PickleCodec):
+    """
+    Compact binary encoding for TickData, OrderData, TradeData, BarData
+    and Event containing them, other objects are pickled.
+    """
+
+    types = [TickData, OrderData, TradeData, BarData]
+
+    def __init__(self):
+        """"""
+        self.schemas = [ObjectSchema(i, cls) for i, cls in enumerate(self.types)]
+        self.type_schemas = {schema.cls: schema for schema in self.schemas}
+
+    def encode(self, obj: Any) -> bytes:
+        """"""
+        try:
+            if type(obj) is Event:
+                schema = self.type_schemas.get(type(obj.data), None)
+                if schema:
+                    event_type = obj.type.encode("utf-8")
+                    return b"".join([
+                        TAG_EVENT,
+                        struct.pack("<BH", schema.type_id, len(event_type)),
+                        event_type,
+                        schema.encode(obj.data)
+                    ])
+            else:
+                schema = self.type_schemas.get(type(obj), None)
+                if schema:
+                    return TAG_OBJECT + struct.pack("<B", schema.type_id) + schema.encode(obj)
+        except (TypeError, AttributeError, KeyError, struct.error):
+            pass
+
+        return TAG_PICKLE + super().encode(obj)
+
+    def decode(self, data: bytes) -> Any:
+        """"""
+        tag = data[:1]
+
+        if tag == TAG_EVENT:
+            type_id, length = struct.unpack_from("<BH", data, 1)
+            offset = 4 + length
+            event_type = data[4:offset].decode("utf-8")
+            return Event(event_type, self.schemas[type_id].decode(data, offset))
+        elif tag == TAG_OBJECT:
+            return self.schemas[data[1]].decode(data, 2)
+        else:
+            return super().decode(data[1:])
+
+
+# Codec classes by name used in settings
+CODECS = {
+    "pickle": PickleCodec,
+    "binary": BinaryCodec
+}
@@ -1,7 +1,9 @@
 from abc import ABC, abstractmethod
 from datetime import datetime
 from enum import Enum
-from typing import Optional, Sequence, TYPE_CHECKING
+from typing import Dict, List, Optional, Sequence, TYPE_CHECKING
+
+import numpy as np
 
 if TYPE_CHECKING:
     from vnpy.trader.constant import Interval, Exchange  # noqa
@@ -13,6 +15,66 @@ class Driver(Enum):
     MYSQL = "mysql"
     POSTGRESQL = "postgresql"
     MONGODB = "mongodb"
+    FILE = "file"
+
+
+# Columns returned by load_bar_array
+BAR_ARRAY_FIELDS = [
+    "datetime",
+    "volume",
+    "open_interest",
+    "open_price",
+    "high_price",
+    "low_price",
+    "close_price",
+]
+
+# Columns returned by load_tick_array
+TICK_ARRAY_FIELDS = [
+    "datetime",
+    "volume",
+    "open_interest",
+    "last_price",
+    "last_volume",
+    "limit_up",
+    "limit_down",
+    "open_price",
+    "high_price",
+    "low_price",
+    "pre_close",
+] + [
+    f"{side}_{kind}_{level}"
+    for kind in ("price", "volume")
+    for side in ("bid", "ask")
+    for level in range(1, 6)
+]
+
+
+# Depth fields of level 2-5, which are only loaded when bid_price_2 is set
+TICK_DEPTH_FIELDS = [
+    f"{side}_{kind}_{level}"
+    for kind in ("price", "volume")
+    for side in ("bid", "ask")
+    for level in range(2, 6)
+]
+
+
+def rows_to_array(rows: List[Sequence], names: List[str]) -> Dict[str, np.ndarray]:
+    """
+    Convert rows (tuples in order of names) into columnar numpy arrays.
+
+    datetime is converted to datetime64[us], other columns to float64
+    (missing value as nan).
+    """
+    columns = list(zip(*rows)) if rows else [()] * len(names)
+
+    data = {}
+    for name, column in zip(names, columns):
+        if name == "datetime":
+            data[name] = np.array(column, dtype="datetime64[us]")
+        else:
+            data[name] = np.array(column, dtype=float)
+    return data
 
 
 class BaseDatabaseManager(ABC):
@@ -40,6 +102,37 @@ class BaseDatabaseManager(ABC):
     ) -> Sequence["TickData"]:
         pass
 
+    def load_bar_array(
+        self,
+        symbol: str,
+        exchange: "Exchange",
+        interval: "Interval",
+        start: datetime,
+        end: datetime
+    ) -> Dict[str, np.ndarray]:
+        """
+        Load bar data as columnar numpy arrays, keyed by BAR_ARRAY_FIELDS.
+        Drivers can override this to skip creating BarData objects.
+        """
+        bars = self.load_bar_data(symbol, exchange, interval, start, end)
+        rows = [[getattr(bar, name) for name in BAR_ARRAY_FIELDS] for bar in bars]
+        return rows_to_array(rows, BAR_ARRAY_FIELDS)
+
+    def load_tick_array(
+        self,
+        symbol: str,
+        exchange: "Exchange",
+        start: datetime,
+        end: datetime
+    ) -> Dict[str, np.ndarray]:
+        """
+        Load tick data as columnar numpy arrays, keyed by TICK_ARRAY_FIELDS.
+        Drivers can override this to skip creating TickData objects.
+        """
+        ticks = self.load_tick_data(symbol, exchange, start, end)
+        rows = [[getattr(tick, name) for name in TICK_ARRAY_FIELDS] for tick in ticks]
+        return rows_to_array(rows, TICK_ARRAY_FIELDS)
+
     @abstractmethod
     def save_bar_data(
         self,
@@ -0,0 +1,335 @@
+""""""
+import hashlib
+import os
+import pickle
+import sys
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from threading import RLock
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.object import BarData, TickData
+from vnpy.trader.utility import get_folder_path
+from .database import BaseDatabaseManager
+
+
+def estimate_size(data) -> int:
+    """Estimate memory bytes used by one BarData/TickData object."""
+    return (
+        sys.getsizeof(data)
+        + sys.getsizeof(data.__dict__)
+        + sum(sys.getsizeof(v) for v in data.__dict__.values())
+    )
+
+
+class Segment:
+    """
+    Cached data of a continuous datetime range [start, end].
+    """
+
+    def __init__(self, start: datetime, end: datetime, datas: list, record_size: int):
+        """"""
+        self.start = start
+        self.end = end
+        self.datas = datas
+        self.datetimes = [d.datetime for d in datas]
+        self.size = record_size * len(datas) + 256
+
+    def slice(self, start: datetime, end: datetime) -> list:
+        """Get data with start <= datetime <= end."""
+        ix_start = bisect_left(self.datetimes, start)
+        ix_end = bisect_right(self.datetimes, end)
+        return self.datas[ix_start:ix_end]
+
+
+class CachedDatabaseManager(BaseDatabaseManager):
+    """
+    Range aware read-through cache in front of another database manager.
+
+    Loaded data is kept as segments of continuous datetime range for every
+    (type, symbol, exchange, interval). A query inside one segment is served
+    by binary search. Otherwise only the uncovered gaps are loaded from
+    database, and stitched with overlapping or adjacent segments into one.
+
+    Segments are evicted by LRU when total size exceeds max_bytes, and are
+    optionally persisted into cache_path, to be reused by next process.
+
+    Data newer than now - safe_delay is never cached, since it may still be
+    written by recorders.
+    """
+
+    def __init__(
+        self,
+        database_manager: BaseDatabaseManager,
+        max_bytes: int,
+        cache_path: str = "",
+        safe_delay: timedelta = timedelta(days=1)
+    ):
+        """"""
+        self.database_manager = database_manager
+        self.max_bytes = max_bytes
+        self.cache_path = str(get_folder_path(cache_path)) if cache_path else ""
+        self.safe_delay = safe_delay
+
+        self.segments = {}          # key: list of Segment sorted by start
+        self.lru = OrderedDict()    # id(segment): (key, segment)
+        self.total_bytes = 0
+        self.record_sizes = {}
+
+        self.hit_count = 0
+        self.miss_count = 0
+
+        self.lock = RLock()
+
+    def load_bar_data(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime,
+        **kwargs
+    ) -> Sequence[BarData]:
+        if not kwargs.pop("cache", True):
+            return self.database_manager.load_bar_data(symbol, exchange, interval, start, end, **kwargs)
+
+        def loader(_start: datetime, _end: datetime):
+            return self.database_manager.load_bar_data(symbol, exchange, interval, _start, _end, **kwargs)
+
+        key = ("bar", symbol, exchange.value, interval.value)
+        return self.load(key, start, end, loader)
+
+    def load_tick_data(
+        self, symbol: str, exchange: Exchange, start: datetime, end: datetime, **kwargs
+    ) -> Sequence[TickData]:
+        if not kwargs.pop("cache", True):
+            return self.database_manager.load_tick_data(symbol, exchange, start, end, **kwargs)
+
+        def loader(_start: datetime, _end: datetime):
+            return self.database_manager.load_tick_data(symbol, exchange, _start, _end, **kwargs)
+
+        key = ("tick", symbol, exchange.value, "")
+        return self.load(key, start, end, loader)
+
+    def load_bar_array(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime
+    ) -> Dict[str, np.ndarray]:
+        """Arrays are loaded from raw rows of database, not cached."""
+        return self.database_manager.load_bar_array(symbol, exchange, interval, start, end)
+
+    def load_tick_array(
+        self, symbol: str, exchange: Exchange, start: datetime, end: datetime
+    ) -> Dict[str, np.ndarray]:
+        """Arrays are loaded from raw rows of database, not cached."""
+        return self.database_manager.load_tick_array(symbol, exchange, start, end)
+
+    def load(self, key: tuple, start: datetime, end: datetime, loader) -> list:
+        """
+        Load data of [start, end], from cache if possible.
+        """
+        # Only the part before safe end is cached
+        safe_end = datetime.now(start.tzinfo) - self.safe_delay
+        if start > safe_end:
+            return loader(start, end)
+
+        if end > safe_end:
+            return self.load(key, start, safe_end, loader) + [
+                d for d in loader(safe_end, end) if d.datetime > safe_end
+            ]
+
+        with self.lock:
+            segments = self.get_segments(key)
+
+            # Segments overlapping with or adjacent to [start, end]
+            related = [s for s in segments if s.start <= end and s.end >= start]
+
+            for segment in related:
+                if segment.start <= start and segment.end >= end:
+                    self.hit_count += 1
+                    self.lru.move_to_end(id(segment))
+                    return segment.slice(start, end)
+
+            self.miss_count += 1
+
+            # Load the gaps not covered by related segments
+            parts = []
+            cursor = start
+            for segment in related:
+                if segment.start > cursor:
+                    parts.append(loader(cursor, segment.start))
+                parts.append(segment.datas)
+                cursor = max(cursor, segment.end)
+            if cursor < end:
+                parts.append(loader(cursor, end))
+
+            # Stitch into one segment, without duplicated datetime
+            datas = []
+            last_dt = None
+            for part in parts:
+                for d in part:
+                    if last_dt is None or d.datetime > last_dt:
+                        datas.append(d)
+                        last_dt = d.datetime
+
+            new_start = min([start] + [s.start for s in related])
+            new_end = max([end] + [s.end for s in related])
+            for segment in related:
+                self.remove_segment(key, segment)
+            segment = self.add_segment(key, new_start, new_end, datas)
+
+            self.evict()
+            self.persist(key)
+
+            return segment.slice(start, end)
+
+    def get_segments(self, key: tuple) -> List[Segment]:
+        """Get segments of key, load from disk if not in memory."""
+        if key not in self.segments:
+            self.segments[key] = []
+
+            for start, end, datas in self.read_disk(key):
+                self.add_segment(key, start, end, datas)
+
+        return self.segments[key]
+
+    def add_segment(self, key: tuple, start: datetime, end: datetime, datas: list) -> Segment:
+        """"""
+        record_size = self.record_sizes.get(key[0])
+        if record_size is None and datas:
+            record_size = estimate_size(datas[0])
+            self.record_sizes[key[0]] = record_size
+
+        segment = Segment(start, end, datas, record_size or 0)
+
+        segments = self.segments[key]
+        segments.append(segment)
+        segments.sort(key=lambda s: s.start)
+
+        self.lru[id(segment)] = (key, segment)
+        self.total_bytes += segment.size
+        return segment
+
+    def remove_segment(self, key: tuple, segment: Segment):
+        """"""
+        self.segments[key].remove(segment)
+        self.lru.pop(id(segment))
+        self.total_bytes -= segment.size
+
+    def evict(self):
+        """Remove least recently used segments until within max_bytes."""
+        while self.total_bytes > self.max_bytes and self.lru:
+            key, segment = next(iter(self.lru.values()))
+            self.remove_segment(key, segment)
+
+            # Reload from disk next time
+            if not self.segments[key]:
+                self.segments.pop(key)
+
+    def invalidate(self, key: tuple, start: datetime, end: datetime):
+        """Remove segments overlapping with saved data."""
+        with self.lock:
+            segments = self.get_segments(key)
+            related = [s for s in segments if s.start <= end and s.end >= start]
+            if not related:
+                return
+
+            for segment in related:
+                self.remove_segment(key, segment)
+            self.persist(key)
+
+    def get_disk_file(self, key: tuple) -> str:
+        """"""
+        name = hashlib.md5("|".join(key).encode("UTF-8")).hexdigest()
+        return os.path.join(self.cache_path, f"{key[0]}_{key[1]}_{name}.pkl")
+
+    def read_disk(self, key: tuple) -> list:
+        """"""
+        if not self.cache_path:
+            return []
+
+        filepath = self.get_disk_file(key)
+        if not os.path.exists(filepath):
+            return []
+
+        try:
+            with open(filepath, mode="rb") as f:
+                return pickle.load(f)
+        except Exception:
+            return []
+
+    def persist(self, key: tuple):
+        """Save all segments of key into disk."""
+        if not self.cache_path:
+            return
+
+        filepath = self.get_disk_file(key)
+        tmp_filepath = f"{filepath}.{os.getpid()}.tmp"
+
+        data = [(s.start, s.end, s.datas) for s in self.segments.get(key, [])]
+        with open(tmp_filepath, mode="wb") as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_filepath, filepath)
+
+    def get_statistics(self) -> dict:
+        """"""
+        return {
+            "segment_count": len(self.lru),
+            "total_bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hit_count": self.hit_count,
+            "miss_count": self.miss_count
+        }
+
+    def save_bar_data(self, datas: Sequence[BarData]):
+        self.database_manager.save_bar_data(datas)
+
+        ranges = {}
+        for bar in datas:
+            key = ("bar", bar.symbol, bar.exchange.value, bar.interval.value)
+            start, end = ranges.get(key, (bar.datetime, bar.datetime))
+            ranges[key] = (min(start, bar.datetime), max(end, bar.datetime))
+
+        for key, (start, end) in ranges.items():
+            self.invalidate(key, start, end)
+
+    def save_tick_data(self, datas: Sequence[TickData]):
+        self.database_manager.save_tick_data(datas)
+
+        ranges = {}
+        for tick in datas:
+            key = ("tick", tick.symbol, tick.exchange.value, "")
+            start, end = ranges.get(key, (tick.datetime, tick.datetime))
+            ranges[key] = (min(start, tick.datetime), max(end, tick.datetime))
+
+        for key, (start, end) in ranges.items():
+            self.invalidate(key, start, end)
+
+    def get_newest_bar_data(
+        self, symbol: str, exchange: "Exchange", interval: "Interval"
+    ) -> Optional["BarData"]:
+        return self.database_manager.get_newest_bar_data(symbol, exchange, interval)
+
+    def get_newest_tick_data(
+        self, symbol: str, exchange: "Exchange"
+    ) -> Optional["TickData"]:
+        return self.database_manager.get_newest_tick_data(symbol, exchange)
+
+    def clean(self, symbol: str):
+        self.database_manager.clean(symbol)
+
+        with self.lock:
+            keys = [key for key in self.segments if key[1] == symbol]
+            for key in keys:
+                for segment in list(self.segments[key]):
+                    self.remove_segment(key, segment)
+                self.persist(key)
+                self.segments.pop(key)
@@ -0,0 +1,342 @@
+""""""
+import json
+import os
+import shutil
+from datetime import datetime
+from threading import Lock
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.object import BarData, TickData
+from vnpy.trader.utility import get_file_path
+from .database import (
+    BaseDatabaseManager,
+    Driver,
+    BAR_ARRAY_FIELDS,
+    TICK_ARRAY_FIELDS
+)
+
+
+def init(_: Driver, settings: dict):
+    database = settings["database"]
+    path = str(get_file_path(database))
+    return FileManager(path)
+
+
+def make_dtype(names: List[str]) -> np.dtype:
+    """
+    Fixed width record: datetime as int64 microseconds, others as float64.
+    """
+    return np.dtype([(name, np.int64 if name == "datetime" else np.float64) for name in names])
+
+
+BAR_DTYPE = make_dtype(BAR_ARRAY_FIELDS)
+TICK_DTYPE = make_dtype(TICK_ARRAY_FIELDS)
+
+META_FILENAME = "meta.json"
+
+
+def to_timestamp(dt: datetime) -> int:
+    """Convert datetime into int64 microseconds."""
+    return int(np.datetime64(dt.replace(tzinfo=None), "us").astype(np.int64))
+
+
+def from_timestamps(values: np.ndarray) -> list:
+    """Convert int64 microseconds into list of datetime."""
+    return values.astype("datetime64[us]").tolist()
+
+
+class FileManager(BaseDatabaseManager):
+    """
+    Local file database, without running database server.
+
+    Data of each symbol is partitioned by month:
+        {root}/bar/{exchange}/{symbol}/{interval}/{YYYYMM}.bin
+        {root}/tick/{exchange}/{symbol}/{YYYYMM}.bin
+
+    Each partition is an array of fixed width records sorted by datetime,
+    which is memory mapped for reading. meta.json in every series folder
+    records count, start and end of each partition, so that a query only
+    reads partitions overlapping its datetime range, and newest data is
+    found without scanning.
+
+    New data later than the end of a partition is appended to the file,
+    otherwise the partition is merged and rewritten (upsert by datetime).
+    """
+
+    def __init__(self, path: str):
+        """"""
+        self.path = path
+        self.lock = Lock()
+
+    def get_bar_folder(self, symbol: str, exchange: Exchange, interval: Interval) -> str:
+        """"""
+        return os.path.join(self.path, "bar", exchange.value, symbol, interval.value)
+
+    def get_tick_folder(self, symbol: str, exchange: Exchange) -> str:
+        """"""
+        return os.path.join(self.path, "tick", exchange.value, symbol)
+
+    def load_meta(self, folder: str) -> dict:
+        """"""
+        filepath = os.path.join(folder, META_FILENAME)
+        if not os.path.exists(filepath):
+            return {"partitions": {}}
+
+        with open(filepath, mode="r", encoding="UTF-8") as f:
+            return json.load(f)
+
+    def save_meta(self, folder: str, meta: dict):
+        """"""
+        filepath = os.path.join(folder, META_FILENAME)
+        tmp_filepath = filepath + ".tmp"
+        with open(tmp_filepath, mode="w", encoding="UTF-8") as f:
+            json.dump(meta, f, indent=4)
+        os.replace(tmp_filepath, filepath)
+
+    def read_partition(self, folder: str, month: str, dtype: np.dtype) -> np.ndarray:
+        """Memory map records of one partition."""
+        filepath = os.path.join(folder, f"{month}.bin")
+        if not os.path.exists(filepath) or not os.path.getsize(filepath):
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(filepath, dtype=dtype, mode="r")
+
+    def query(self, folder: str, dtype: np.dtype, start: datetime, end: datetime) -> np.ndarray:
+        """
+        Read records with start <= datetime <= end.
+
+        Partitions not overlapping the range are skipped with meta data,
+        and records inside a partition are located by binary search.
+        """
+        meta = self.load_meta(folder)
+        start_ts = to_timestamp(start)
+        end_ts = to_timestamp(end)
+
+        results = []
+        for month in sorted(meta["partitions"]):
+            info = meta["partitions"][month]
+            if info["end"] < start_ts or info["start"] > end_ts:
+                continue
+
+            records = self.read_partition(folder, month, dtype)
+            timestamps = records["datetime"]
+            ix_start = np.searchsorted(timestamps, start_ts, side="left")
+            ix_end = np.searchsorted(timestamps, end_ts, side="right")
+            results.append(np.array(records[ix_start:ix_end]))
+
+        if not results:
+            return np.zeros(0, dtype=dtype)
+        return np.concatenate(results)
+
+    def newest(self, folder: str, dtype: np.dtype) -> Optional[np.void]:
+        """Get the last record of the newest partition."""
+        meta = self.load_meta(folder)
+        months = [month for month, info in meta["partitions"].items() if info["count"]]
+        if not months:
+            return None
+
+        records = self.read_partition(folder, max(months), dtype)
+        if not len(records):
+            return None
+        return np.array(records[-1:])[0]
+
+    def write(self, folder: str, dtype: np.dtype, rows: List[tuple], extra: dict = None):
+        """
+        Save rows into monthly partitions, update if datetime exists.
+        """
+        if not rows:
+            return
+
+        records = np.array(rows, dtype=dtype)
+        months = records["datetime"].astype("datetime64[us]").astype("datetime64[M]")
+
+        with self.lock:
+            os.makedirs(folder, exist_ok=True)
+            meta = self.load_meta(folder)
+            if extra:
+                meta.update(extra)
+
+            for month in np.unique(months):
+                month_str = str(month).replace("-", "")
+                new = records[months == month]
+                # Keep the last one of duplicated datetime, sorted by datetime
+                reversed_new = new[::-1]
+                _, ix = np.unique(reversed_new["datetime"], return_index=True)
+                new = reversed_new[ix]
+
+                filepath = os.path.join(folder, f"{month_str}.bin")
+                info = meta["partitions"].get(month_str)
+
+                if info and info["count"] and new["datetime"][0] > info["end"]:
+                    # Append to the end of partition file
+                    with open(filepath, mode="ab") as f:
+                        f.write(new.tobytes())
+                    info["count"] += len(new)
+                    info["end"] = int(new["datetime"][-1])
+                    continue
+
+                if info and info["count"]:
+                    old = np.array(self.read_partition(folder, month_str, dtype))
+                    old = old[~np.isin(old["datetime"], new["datetime"])]
+                    merged = np.concatenate([old, new])
+                    merged = merged[np.argsort(merged["datetime"], kind="stable")]
+                else:
+                    merged = new
+
+                tmp_filepath = filepath + ".tmp"
+                with open(tmp_filepath, mode="wb") as f:
+                    f.write(merged.tobytes())
+                os.replace(tmp_filepath, filepath)
+
+                meta["partitions"][month_str] = {
+                    "count": len(merged),
+                    "start": int(merged["datetime"][0]),
+                    "end": int(merged["datetime"][-1]),
+                }
+
+            self.save_meta(folder, meta)
+
+    def to_bars(self, records: np.ndarray, symbol: str, exchange: Exchange, interval: Interval) -> List[BarData]:
+        """"""
+        columns = [records[name].tolist() for name in BAR_ARRAY_FIELDS[1:]]
+        datetimes = from_timestamps(records["datetime"])
+
+        return [
+            BarData(
+                symbol=symbol,
+                exchange=exchange,
+                datetime=dt,
+                interval=interval,
+                volume=volume,
+                open_interest=open_interest,
+                open_price=open_price,
+                high_price=high_price,
+                low_price=low_price,
+                close_price=close_price,
+                gateway_name="DB",
+            )
+            for dt, volume, open_interest, open_price, high_price, low_price, close_price
+            in zip(datetimes, *columns)
+        ]
+
+    def to_ticks(self, records: np.ndarray, symbol: str, exchange: Exchange, name: str) -> List[TickData]:
+        """"""
+        names = TICK_ARRAY_FIELDS[1:]
+        columns = [records[n].tolist() for n in names]
+        datetimes = from_timestamps(records["datetime"])
+
+        return [
+            TickData(
+                symbol=symbol,
+                exchange=exchange,
+                datetime=dt,
+                name=name,
+                gateway_name="DB",
+                **dict(zip(names, values))
+            )
+            for dt, values in zip(datetimes, zip(*columns))
+        ]
+
+    def load_bar_data(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime,
+        **kwargs
+    ) -> Sequence[BarData]:
+        folder = self.get_bar_folder(symbol, exchange, interval)
+        records = self.query(folder, BAR_DTYPE, start, end)
+        return self.to_bars(records, symbol, exchange, interval)
+
+    def load_tick_data(
+        self, symbol: str, exchange: Exchange, start: datetime, end: datetime, **kwargs
+    ) -> Sequence[TickData]:
+        folder = self.get_tick_folder(symbol, exchange)
+        records = self.query(folder, TICK_DTYPE, start, end)
+        name = self.load_meta(folder).get("name", "")
+        return self.to_ticks(records, symbol, exchange, name)
+
+    def load_bar_array(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime
+    ) -> Dict[str, np.ndarray]:
+        folder = self.get_bar_folder(symbol, exchange, interval)
+        records = self.query(folder, BAR_DTYPE, start, end)
+        return self.to_array(records)
+
+    def load_tick_array(
+        self, symbol: str, exchange: Exchange, start: datetime, end: datetime
+    ) -> Dict[str, np.ndarray]:
+        folder = self.get_tick_folder(symbol, exchange)
+        records = self.query(folder, TICK_DTYPE, start, end)
+        return self.to_array(records)
+
+    @staticmethod
+    def to_array(records: np.ndarray) -> Dict[str, np.ndarray]:
+        """"""
+        data = {name: records[name] for name in records.dtype.names}
+        data["datetime"] = data["datetime"].astype("datetime64[us]")
+        return data
+
+    def save_bar_data(self, datas: Sequence[BarData]):
+        series = {}
+        for bar in datas:
+            key = (bar.symbol, bar.exchange, bar.interval)
+            row = (to_timestamp(bar.datetime),) + tuple(getattr(bar, name) for name in BAR_ARRAY_FIELDS[1:])
+            series.setdefault(key, []).append(row)
+
+        for (symbol, exchange, interval), rows in series.items():
+            folder = self.get_bar_folder(symbol, exchange, interval)
+            self.write(folder, BAR_DTYPE, rows)
+
+    def save_tick_data(self, datas: Sequence[TickData]):
+        series = {}
+        names = {}
+        for tick in datas:
+            key = (tick.symbol, tick.exchange)
+            row = (to_timestamp(tick.datetime),) + tuple(getattr(tick, name) or 0 for name in TICK_ARRAY_FIELDS[1:])
+            series.setdefault(key, []).append(row)
+            names[key] = tick.name
+
+        for key, rows in series.items():
+            folder = self.get_tick_folder(*key)
+            self.write(folder, TICK_DTYPE, rows, {"name": names[key]})
+
+    def get_newest_bar_data(
+        self, symbol: str, exchange: "Exchange", interval: "Interval"
+    ) -> Optional["BarData"]:
+        folder = self.get_bar_folder(symbol, exchange, interval)
+        record = self.newest(folder, BAR_DTYPE)
+        if record is None:
+            return None
+        return self.to_bars(np.array([record]), symbol, exchange, interval)[0]
+
+    def get_newest_tick_data(
+        self, symbol: str, exchange: "Exchange"
+    ) -> Optional["TickData"]:
+        folder = self.get_tick_folder(symbol, exchange)
+        record = self.newest(folder, TICK_DTYPE)
+        if record is None:
+            return None
+        name = self.load_meta(folder).get("name", "")
+        return self.to_ticks(np.array([record]), symbol, exchange, name)[0]
+
+    def clean(self, symbol: str):
+        with self.lock:
+            for kind in ("bar", "tick"):
+                kind_path = os.path.join(self.path, kind)
+                if not os.path.exists(kind_path):
+                    continue
+
+                for exchange in os.listdir(kind_path):
+                    folder = os.path.join(kind_path, exchange, symbol)
+                    if os.path.isdir(folder):
+                        shutil.rmtree(folder)
@@ -1,12 +1,22 @@
 from datetime import datetime
 from enum import Enum
-from typing import Optional, Sequence
+from typing import Dict, Iterator, List, Optional, Sequence, Type
+
+import numpy as np
 
 from mongoengine import DateTimeField, Document, FloatField, StringField, connect
+from pymongo import UpdateOne
 
 from vnpy.trader.constant import Exchange, Interval
 from vnpy.trader.object import BarData, TickData
-from .database import BaseDatabaseManager, Driver
+from .database import (
+    BaseDatabaseManager,
+    Driver,
+    BAR_ARRAY_FIELDS,
+    TICK_ARRAY_FIELDS,
+    TICK_DEPTH_FIELDS,
+    rows_to_array
+)
 
 
 def init(_: Driver, settings: dict):
@@ -31,7 +41,10 @@ def init(_: Driver, settings: dict):
         authentication_source=authentication_source,
     )
 
-    return MongoManager()
+    # Number of upserts sent by one bulk_write
+    batch_size = settings.get("batch_size", 1000)
+
+    return MongoManager(batch_size)
 
 
 class DbBarData(Document):
@@ -271,6 +284,65 @@ class DbTickData(Document):
 
 class MongoManager(BaseDatabaseManager):
 
+    def __init__(self, batch_size: int = 1000):
+        self.batch_size = batch_size
+
+    def find_rows(
+        self,
+        document: Type[Document],
+        query: dict,
+        names: List[str]
+    ) -> Iterator[tuple]:
+        """
+        Find raw documents with projection of the named fields, sorted by
+        datetime, and yield them as tuples. Documents are fetched from the
+        server side cursor batch_size at a time.
+        """
+        projection = {name: 1 for name in names}
+        projection["_id"] = 0
+
+        cursor = (
+            document._get_collection()
+            .find(query, projection, batch_size=self.batch_size)
+            .sort("datetime", 1)
+        )
+        for d in cursor:
+            yield tuple(d.get(name) for name in names)
+
+    def find_bar_rows(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime,
+        names: List[str]
+    ) -> Iterator[tuple]:
+        """"""
+        query = {
+            "symbol": symbol,
+            "exchange": exchange.value,
+            "interval": interval.value,
+            "datetime": {"$gte": start, "$lte": end},
+        }
+        return self.find_rows(DbBarData, query, names)
+
+    def find_tick_rows(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        start: datetime,
+        end: datetime,
+        names: List[str]
+    ) -> Iterator[tuple]:
+        """"""
+        query = {
+            "symbol": symbol,
+            "exchange": exchange.value,
+            "datetime": {"$gte": start, "$lte": end},
+        }
+        return self.find_rows(DbTickData, query, names)
+
     def load_bar_data(
         self,
         symbol: str,
@@ -280,28 +352,59 @@ class MongoManager(BaseDatabaseManager):
         end: datetime,
         **kwargs
     ) -> Sequence[BarData]:
-        s = DbBarData.objects(
-            symbol=symbol,
-            exchange=exchange.value,
-            interval=interval.value,
-            datetime__gte=start,
-            datetime__lte=end,
-        )
-        data = [db_bar.to_bar() for db_bar in s]
+        rows = self.find_bar_rows(symbol, exchange, interval, start, end, BAR_ARRAY_FIELDS)
+        data = [
+            BarData(
+                symbol=symbol,
+                exchange=exchange,
+                datetime=dt,
+                interval=interval,
+                volume=volume,
+                open_interest=open_interest,
+                open_price=open_price,
+                high_price=high_price,
+                low_price=low_price,
+                close_price=close_price,
+                gateway_name="DB",
+            )
+            for dt, volume, open_interest, open_price, high_price, low_price, close_price in rows
+        ]
         return data
 
     def load_tick_data(
         self, symbol: str, exchange: Exchange, start: datetime, end: datetime, **kwargs
     ) -> Sequence[TickData]:
-        s = DbTickData.objects(
-            symbol=symbol,
-            exchange=exchange.value,
-            datetime__gte=start,
-            datetime__lte=end,
-        )
-        data = [db_tick.to_tick() for db_tick in s]
+        names = ["date", "time", "trading_day", "name"] + TICK_ARRAY_FIELDS
+        rows = self.find_tick_rows(symbol, exchange, start, end, names)
+
+        data = []
+        for row in rows:
+            values = dict(zip(names, row))
+            if not values["bid_price_2"]:
+                for name in TICK_DEPTH_FIELDS:
+                    del values[name]
+
+            tick = TickData(symbol=symbol, exchange=exchange, gateway_name="DB", **values)
+            data.append(tick)
         return data
 
+    def load_bar_array(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime
+    ) -> Dict[str, np.ndarray]:
+        rows = list(self.find_bar_rows(symbol, exchange, interval, start, end, BAR_ARRAY_FIELDS))
+        return rows_to_array(rows, BAR_ARRAY_FIELDS)
+
+    def load_tick_array(
+        self, symbol: str, exchange: Exchange, start: datetime, end: datetime
+    ) -> Dict[str, np.ndarray]:
+        rows = list(self.find_tick_rows(symbol, exchange, start, end, TICK_ARRAY_FIELDS))
+        return rows_to_array(rows, TICK_ARRAY_FIELDS)
+
     @staticmethod
     def to_update_param(d):
         return {
@@ -309,27 +412,46 @@ class MongoManager(BaseDatabaseManager):
             for k, v in d.__dict__.items()
         }
 
+    @staticmethod
+    def to_document(d, document: Type[Document]):
+        """
+        Convert data object into raw document with fields of the model.
+        """
+        return {
+            k: v.value if isinstance(v, Enum) else v
+            for k, v in d.__dict__.items()
+            if k in document._fields and k != "id"
+        }
+
+    def bulk_upsert(self, document: Type[Document], ops: List[UpdateOne]):
+        """
+        Send upsert operations with bulk_write, batch_size ops at a time.
+        """
+        collection = document._get_collection()
+        for i in range(0, len(ops), self.batch_size):
+            collection.bulk_write(ops[i:i + self.batch_size], ordered=False)
+
     def save_bar_data(self, datas: Sequence[BarData]):
-        for d in datas:
-            updates = self.to_update_param(d)
-            updates.pop("set__gateway_name")
-            updates.pop("set__vt_symbol")
-            (
-                DbBarData.objects(
-                    symbol=d.symbol, interval=d.interval.value, datetime=d.datetime
-                ).update_one(upsert=True, **updates)
+        ops = [
+            UpdateOne(
+                {"symbol": d.symbol, "interval": d.interval.value, "datetime": d.datetime},
+                {"$set": self.to_document(d, DbBarData)},
+                upsert=True
             )
+            for d in datas
+        ]
+        self.bulk_upsert(DbBarData, ops)
 
     def save_tick_data(self, datas: Sequence[TickData]):
-        for d in datas:
-            updates = self.to_update_param(d)
-            updates.pop("set__gateway_name")
-            updates.pop("set__vt_symbol")
-            (
-                DbTickData.objects(
-                    symbol=d.symbol, exchange=d.exchange.value, datetime=d.datetime
-                ).update_one(upsert=True, **updates)
+        ops = [
+            UpdateOne(
+                {"symbol": d.symbol, "exchange": d.exchange.value, "datetime": d.datetime},
+                {"$set": self.to_document(d, DbTickData)},
+                upsert=True
             )
+            for d in datas
+        ]
+        self.bulk_upsert(DbTickData, ops)
 
     def get_newest_bar_data(
         self, symbol: str, exchange: "Exchange", interval: "Interval"
@@ -1,12 +1,15 @@
 """"""
 from datetime import datetime
-from typing import List, Optional, Sequence, Type
+from typing import Dict, Iterator, List, Optional, Sequence, Type
+
+import numpy as np
 
 from peewee import (
     AutoField,
     CharField,
     Database,
     DateTimeField,
+    EXCLUDED,
     FloatField,
     Model,
     MySQLDatabase,
@@ -18,7 +21,14 @@ from peewee import (
 from vnpy.trader.constant import Exchange, Interval
 from vnpy.trader.object import BarData, TickData
 from vnpy.trader.utility import get_file_path
-from .database import BaseDatabaseManager, Driver
+from .database import (
+    BaseDatabaseManager,
+    Driver,
+    BAR_ARRAY_FIELDS,
+    TICK_ARRAY_FIELDS,
+    TICK_DEPTH_FIELDS,
+    rows_to_array
+)
 
 
 def init(driver: Driver, settings: dict):
@@ -29,8 +39,11 @@ def init(driver: Driver, settings: dict):
     }
     assert driver in init_funcs
 
+    # Number of rows written by one multi-row INSERT statement
+    batch_size = settings.pop("batch_size", 50)
+
     db = init_funcs[driver](settings)
-    bar, tick = init_models(db, driver)
+    bar, tick = init_models(db, driver, batch_size)
     return SqlManager(bar, tick)
 
 
@@ -61,7 +74,33 @@ class ModelBase(Model):
         return self.__data__
 
 
-def init_models(db: Database, driver: Driver):
+def upsert_all(model: Type[Model], dicts: List[dict], conflict_target: tuple, batch_size: int):
+    """
+    Multi-row INSERT ... ON CONFLICT DO UPDATE for PostgreSQL.
+
+    Every column except primary key and conflict target is updated
+    with value of the row proposed for insertion (EXCLUDED).
+    """
+    key_names = [field.name for field in conflict_target]
+    update = {
+        field: getattr(EXCLUDED, field.column_name)
+        for field in model._meta.sorted_fields
+        if field.name != "id" and field.name not in key_names
+    }
+
+    # One statement can not affect the same row twice, keep the last one of duplicated rows
+    unique_dicts = {}
+    for d in dicts:
+        unique_dicts[tuple(d[name] for name in key_names)] = d
+
+    for c in chunked(list(unique_dicts.values()), batch_size):
+        model.insert_many(c).on_conflict(
+            conflict_target=conflict_target,
+            update=update,
+        ).execute()
+
+
+def init_models(db: Database, driver: Driver, batch_size: int = 50):
     class DbBarData(ModelBase):
         """
         Candlestick bar data for database storage.
@@ -133,18 +172,19 @@ def init_models(db: Database, driver: Driver):
             dicts = [i.to_dict() for i in objs]
             with db.atomic():
                 if driver is Driver.POSTGRESQL:
-                    for bar in dicts:
-                        DbBarData.insert(bar).on_conflict(
-                            update=bar,
-                            conflict_target=(
-                                DbBarData.symbol,
-                                DbBarData.exchange,
-                                DbBarData.interval,
-                                DbBarData.datetime,
-                            ),
-                        ).execute()
+                    upsert_all(
+                        DbBarData,
+                        dicts,
+                        conflict_target=(
+                            DbBarData.symbol,
+                            DbBarData.exchange,
+                            DbBarData.interval,
+                            DbBarData.datetime,
+                        ),
+                        batch_size=batch_size,
+                    )
                 else:
-                    for c in chunked(dicts, 50):
+                    for c in chunked(dicts, batch_size):
                         DbBarData.insert_many(
                             c).on_conflict_replace().execute()
 
@@ -306,17 +346,18 @@ def init_models(db: Database, driver: Driver):
             dicts = [i.to_dict() for i in objs]
             with db.atomic():
                 if driver is Driver.POSTGRESQL:
-                    for tick in dicts:
-                        DbTickData.insert(tick).on_conflict(
-                            update=tick,
-                            conflict_target=(
-                                DbTickData.symbol,
-                                DbTickData.exchange,
-                                DbTickData.datetime,
-                            ),
-                        ).execute()
+                    upsert_all(
+                        DbTickData,
+                        dicts,
+                        conflict_target=(
+                            DbTickData.symbol,
+                            DbTickData.exchange,
+                            DbTickData.datetime,
+                        ),
+                        batch_size=batch_size,
+                    )
                 else:
-                    for c in chunked(dicts, 50):
+                    for c in chunked(dicts, batch_size):
                         DbTickData.insert_many(c).on_conflict_replace().execute()
 
     db.connect()
@@ -330,17 +371,22 @@ class SqlManager(BaseDatabaseManager):
         self.class_bar = class_bar
         self.class_tick = class_tick
 
-    def load_bar_data(
+    def query_bar_rows(
         self,
         symbol: str,
         exchange: Exchange,
         interval: Interval,
         start: datetime,
         end: datetime,
-        **kwargs
-    ) -> Sequence[BarData]:
+        names: List[str]
+    ) -> Iterator[tuple]:
+        """
+        Select bar rows as tuples of the named columns, ordered by datetime.
+        Rows are iterated without creating model objects or caching results.
+        """
+        fields = [getattr(self.class_bar, name) for name in names]
         s = (
-            self.class_bar.select()
+            self.class_bar.select(*fields)
                 .where(
                 (self.class_bar.symbol == symbol)
                 & (self.class_bar.exchange == exchange.value)
@@ -349,15 +395,25 @@ class SqlManager(BaseDatabaseManager):
                 & (self.class_bar.datetime <= end)
             )
             .order_by(self.class_bar.datetime)
+            .tuples()
         )
-        data = [db_bar.to_bar() for db_bar in s]
-        return data
+        return s.iterator()
 
-    def load_tick_data(
-        self, symbol: str, exchange: Exchange, start: datetime, end: datetime, **kwargs
-    ) -> Sequence[TickData]:
+    def query_tick_rows(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        start: datetime,
+        end: datetime,
+        names: List[str]
+    ) -> Iterator[tuple]:
+        """
+        Select tick rows as tuples of the named columns, ordered by datetime.
+        Rows are iterated without creating model objects or caching results.
+        """
+        fields = [getattr(self.class_tick, name) for name in names]
         s = (
-            self.class_tick.select()
+            self.class_tick.select(*fields)
                 .where(
                 (self.class_tick.symbol == symbol)
                 & (self.class_tick.exchange == exchange.value)
@@ -365,11 +421,72 @@ class SqlManager(BaseDatabaseManager):
                 & (self.class_tick.datetime <= end)
             )
             .order_by(self.class_tick.datetime)
+            .tuples()
         )
+        return s.iterator()
+
+    def load_bar_data(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime,
+        **kwargs
+    ) -> Sequence[BarData]:
+        rows = self.query_bar_rows(symbol, exchange, interval, start, end, BAR_ARRAY_FIELDS)
+        data = [
+            BarData(
+                symbol=symbol,
+                exchange=exchange,
+                datetime=dt,
+                interval=interval,
+                volume=volume,
+                open_interest=open_interest,
+                open_price=open_price,
+                high_price=high_price,
+                low_price=low_price,
+                close_price=close_price,
+                gateway_name="DB",
+            )
+            for dt, volume, open_interest, open_price, high_price, low_price, close_price in rows
+        ]
+        return data
 
-        data = [db_tick.to_tick() for db_tick in s]
+    def load_tick_data(
+        self, symbol: str, exchange: Exchange, start: datetime, end: datetime, **kwargs
+    ) -> Sequence[TickData]:
+        names = ["name"] + TICK_ARRAY_FIELDS
+        rows = self.query_tick_rows(symbol, exchange, start, end, names)
+
+        data = []
+        for row in rows:
+            values = dict(zip(names, row))
+            if not values["bid_price_2"]:
+                for name in TICK_DEPTH_FIELDS:
+                    del values[name]
+
+            tick = TickData(symbol=symbol, exchange=exchange, gateway_name="DB", **values)
+            data.append(tick)
         return data
 
+    def load_bar_array(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime
+    ) -> Dict[str, np.ndarray]:
+        rows = list(self.query_bar_rows(symbol, exchange, interval, start, end, BAR_ARRAY_FIELDS))
+        return rows_to_array(rows, BAR_ARRAY_FIELDS)
+
+    def load_tick_array(
+        self, symbol: str, exchange: Exchange, start: datetime, end: datetime
+    ) -> Dict[str, np.ndarray]:
+        rows = list(self.query_tick_rows(symbol, exchange, start, end, TICK_ARRAY_FIELDS))
+        return rows_to_array(rows, TICK_ARRAY_FIELDS)
+
     def save_bar_data(self, datas: Sequence[BarData]):
         ds = [self.class_bar.from_bar(i) for i in datas]
         self.class_bar.save_all(ds)
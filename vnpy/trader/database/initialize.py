@@ -5,14 +5,17 @@ from .database import BaseDatabaseManager, Driver
 def init(settings: dict) -> BaseDatabaseManager:
     driver = Driver(settings["driver"])
     if driver is Driver.MONGODB:
-        return init_nosql(driver=driver, settings=settings)
+        _database_manager = init_nosql(driver=driver, settings=settings)
+    elif driver is Driver.FILE:
+        _database_manager = init_file(driver=driver, settings=settings)
     else:
-        return init_sql(driver=driver, settings=settings)
+        _database_manager = init_sql(driver=driver, settings=settings)
+    return init_cache(_database_manager, settings=settings)
 
 
 def init_sql(driver: Driver, settings: dict):
     from .database_sql import init
-    keys = {'database', "host", "port", "user", "password"}
+    keys = {'database', "host", "port", "user", "password", "batch_size"}
     settings = {k: v for k, v in settings.items() if k in keys}
     _database_manager = init(driver, settings)
     return _database_manager
@@ -22,3 +25,22 @@ def init_nosql(driver: Driver, settings: dict):
     from .database_mongo import init
     _database_manager = init(driver, settings=settings)
     return _database_manager
+
+
+def init_file(driver: Driver, settings: dict):
+    from .database_file import init
+    _database_manager = init(driver, settings=settings)
+    return _database_manager
+
+
+def init_cache(database_manager: BaseDatabaseManager, settings: dict):
+    cache_size = settings.get("cache_size", 0)
+    if not cache_size:
+        return database_manager
+
+    from .database_cache import CachedDatabaseManager
+    return CachedDatabaseManager(
+        database_manager,
+        max_bytes=int(cache_size * 1024 * 1024),
+        cache_path=settings.get("cache_path", "")
+    )
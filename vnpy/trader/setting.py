@@ -32,6 +32,8 @@ SETTINGS = {
     "database.user": "root",
     "database.password": "",
     "database.authentication_source": "admin",  # for mongodb
+    "database.cache_size": 0,  # MB of read cache for backtesting, 0 to disable
+    "database.cache_path": "",  # folder to persist read cache, empty to disable
 }
 
 # Load global setting from json file.
@@ -761,6 +761,172 @@ class BarGenerator:
         self.bar = None
 
 
+def aggregate_tick_array(
+    data,
+    window: int = 1,
+    interval: Interval = Interval.MINUTE
+) -> Dict[str, np.ndarray]:
+    """
+    Aggregate one day of tick data into bars in batch, with the same rules
+    as BarGenerator:
+    1. ticks with 0 last price are filtered
+    2. volume of bar is the sum of positive change of tick volume
+    3. a new 1 minute bar starts when minute of tick changes, bar datetime
+       is the minute of its last tick
+    4. x minute/x hour bars are combined from 1 minute bars as update_bar
+
+    For Interval.SECOND, ticks are grouped into window seconds bars.
+
+    data is a dict or numpy structured array with datetime, last_price,
+    volume, open_interest and optional trading_day. The last bar is
+    returned even if not finished, which BarGenerator keeps pending.
+    """
+    names = data.dtype.names if hasattr(data, "dtype") else data.keys()
+
+    last_price = np.asarray(data["last_price"], dtype=np.float64)
+    mask = last_price != 0
+
+    timestamps = np.asarray(data["datetime"], dtype="datetime64[us]")[mask].astype(np.int64)
+    last_price = last_price[mask]
+    volume = np.asarray(data["volume"], dtype=np.float64)[mask]
+    open_interest = np.asarray(data["open_interest"], dtype=np.float64)[mask]
+    trading_day = np.asarray(data["trading_day"])[mask] if "trading_day" in names else None
+
+    if not len(timestamps):
+        return {
+            "datetime": np.zeros(0, dtype="datetime64[us]"),
+            "open_price": np.zeros(0),
+            "high_price": np.zeros(0),
+            "low_price": np.zeros(0),
+            "close_price": np.zeros(0),
+            "volume": np.zeros(0),
+            "open_interest": np.zeros(0)
+        }
+
+    volume_change = np.maximum(np.diff(volume, prepend=volume[0]), 0)
+
+    if interval == Interval.SECOND:
+        key = timestamps // (window * 1000000)
+    else:
+        key = timestamps // 60000000 % 60
+    new_bar = np.empty(len(key), dtype=bool)
+    new_bar[0] = True
+    new_bar[1:] = key[1:] != key[:-1]
+
+    starts = np.flatnonzero(new_bar)
+    ends = np.append(starts[1:], len(key)) - 1
+
+    if interval == Interval.SECOND:
+        bar_timestamps = key[starts] * window * 1000000
+    else:
+        bar_timestamps = timestamps[ends] // 60000000 * 60000000
+
+    bars = {
+        "datetime": bar_timestamps,
+        "open_price": last_price[starts],
+        "high_price": np.maximum.reduceat(last_price, starts),
+        "low_price": np.minimum.reduceat(last_price, starts),
+        "close_price": last_price[ends],
+        "volume": np.add.reduceat(volume_change, starts),
+        "open_interest": open_interest[ends]
+    }
+    if trading_day is not None:
+        bars["trading_day"] = trading_day[ends]
+
+    if interval == Interval.MINUTE and window > 1 or interval == Interval.HOUR:
+        bars = aggregate_window_bars(bars, window, interval)
+
+    bars["datetime"] = bars["datetime"].astype("datetime64[us]")
+    return bars
+
+
+def aggregate_window_bars(bars: Dict[str, np.ndarray], window: int, interval: Interval) -> Dict[str, np.ndarray]:
+    """
+    Combine 1 minute bars (datetime as int64 microseconds) into x minute/x hour
+    bars, with the same finishing rule as BarGenerator.update_bar.
+    """
+    timestamps = bars["datetime"]
+
+    if interval == Interval.MINUTE:
+        minute = timestamps // 60000000 % 60
+        finished = (minute + 1) % window == 0
+    else:
+        hour = timestamps // 3600000000 % 24
+        changed = np.zeros(len(hour), dtype=bool)
+        changed[1:] = hour[1:] != hour[:-1]
+        finished = changed & (np.cumsum(changed) % window == 0)
+
+    # Window bar index is the count of finished window bars before
+    group = np.cumsum(finished) - finished
+    new_bar = np.empty(len(group), dtype=bool)
+    new_bar[0] = True
+    new_bar[1:] = group[1:] != group[:-1]
+
+    starts = np.flatnonzero(new_bar)
+    ends = np.append(starts[1:], len(group)) - 1
+
+    if interval == Interval.MINUTE:
+        window_timestamps = timestamps[starts]
+    else:
+        window_timestamps = timestamps[starts] // 3600000000 * 3600000000
+
+    window_bars = {
+        "datetime": window_timestamps,
+        "open_price": bars["open_price"][starts],
+        "high_price": np.maximum.reduceat(bars["high_price"], starts),
+        "low_price": np.minimum.reduceat(bars["low_price"], starts),
+        "close_price": bars["close_price"][ends],
+        "volume": np.add.reduceat(bars["volume"].astype(np.int64), starts).astype(np.float64),
+        "open_interest": bars["open_interest"][ends]
+    }
+    if "trading_day" in bars:
+        window_bars["trading_day"] = bars["trading_day"][ends]
+
+    return window_bars
+
+
+class RollingArray(object):
+    """
+    Fixed size time series backed by a double capacity numpy buffer.
+
+    New value is written after the last one, and only when the buffer
+    is full, the latest size-1 values are moved back to the front, so
+    append is amortized O(1) instead of shifting the whole array.
+
+    array is always a contiguous view of the latest size values,
+    which can be handed to talib directly.
+    """
+
+    def __init__(self, size: int, init_array: np.ndarray = None):
+        """Constructor"""
+        self.size = size
+        self.buffer = np.zeros(size * 2)
+        self.end = size
+
+        if init_array is not None and size > 0:
+            init_array = init_array[-size:]
+            self.buffer[size - len(init_array):size] = init_array
+
+        self.array = self.buffer[0:size]
+
+    def append(self, value: float) -> np.ndarray:
+        """
+        Append new value and return the latest view.
+        """
+        if self.size <= 0:
+            return self.array
+
+        if self.end == len(self.buffer):
+            self.buffer[:self.size - 1] = self.buffer[self.end - self.size + 1:self.end]
+            self.end = self.size - 1
+
+        self.buffer[self.end] = value
+        self.end += 1
+
+        self.array = self.buffer[self.end - self.size:self.end]
+        return self.array
+
+
 class ArrayManager(object):
     """
     For:
@@ -774,11 +940,17 @@ class ArrayManager(object):
         self.size = size
         self.inited = False
 
-        self.open_array = np.zeros(size)
-        self.high_array = np.zeros(size)
-        self.low_array = np.zeros(size)
-        self.close_array = np.zeros(size)
-        self.volume_array = np.zeros(size)
+        self.open_series = RollingArray(size)
+        self.high_series = RollingArray(size)
+        self.low_series = RollingArray(size)
+        self.close_series = RollingArray(size)
+        self.volume_series = RollingArray(size)
+
+        self.open_array = self.open_series.array
+        self.high_array = self.high_series.array
+        self.low_array = self.low_series.array
+        self.close_array = self.close_series.array
+        self.volume_array = self.volume_series.array
 
     def update_bar(self, bar):
         """
@@ -788,17 +960,11 @@ class ArrayManager(object):
         if not self.inited and self.count >= self.size:
             self.inited = True
 
-        self.open_array[:-1] = self.open_array[1:]
-        self.high_array[:-1] = self.high_array[1:]
-        self.low_array[:-1] = self.low_array[1:]
-        self.close_array[:-1] = self.close_array[1:]
-        self.volume_array[:-1] = self.volume_array[1:]
-
-        self.open_array[-1] = bar.open_price
-        self.high_array[-1] = bar.high_price
-        self.low_array[-1] = bar.low_price
-        self.close_array[-1] = bar.close_price
-        self.volume_array[-1] = bar.volume
+        self.open_array = self.open_series.append(bar.open_price)
+        self.high_array = self.high_series.append(bar.high_price)
+        self.low_array = self.low_series.append(bar.low_price)
+        self.close_array = self.close_series.append(bar.close_price)
+        self.volume_array = self.volume_series.append(bar.volume)
 
     @property
     def open(self):